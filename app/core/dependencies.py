@@ -0,0 +1,34 @@
+from functools import lru_cache
+from app.services.llm_extraction_service import LLMExtractionService
+from app.services.resume_service import ResumeService
+from app.services.resume_batch_service import ResumeBatchService
+from app.services.job_description_service import JobDescriptionService
+from app.services.job_description_batch_service import JobDescriptionBatchService
+from app.services.cover_letter_service import CoverLetterService
+
+# Process-wide singletons handed to routes through FastAPI's Depends().
+# Built lazily on first use, or eagerly from the app lifespan.
+
+@lru_cache
+def get_llm_extraction_service() -> LLMExtractionService:
+    return LLMExtractionService()
+
+@lru_cache
+def get_resume_service() -> ResumeService:
+    return ResumeService(llm_service=get_llm_extraction_service())
+
+@lru_cache
+def get_resume_batch_service() -> ResumeBatchService:
+    return ResumeBatchService(resume_service=get_resume_service())
+
+@lru_cache
+def get_job_description_service() -> JobDescriptionService:
+    return JobDescriptionService(llm_service=get_llm_extraction_service())
+
+@lru_cache
+def get_job_description_batch_service() -> JobDescriptionBatchService:
+    return JobDescriptionBatchService(job_description_service=get_job_description_service())
+
+@lru_cache
+def get_cover_letter_service() -> CoverLetterService:
+    return CoverLetterService()
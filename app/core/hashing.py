@@ -0,0 +1,35 @@
+import hashlib
+import json
+import re
+from typing import Type
+from pydantic import BaseModel
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def sha256_bytes(data: bytes) -> str:
+    """Hex SHA-256 digest of raw bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Hex SHA-256 digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while chunk := handle.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def normalize_whitespace(text: str) -> str:
+    """Collapse runs of whitespace into single spaces."""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace and case so cosmetic re-exports hash the same."""
+    return normalize_whitespace(text).lower()
+
+def sha256_text(text: str) -> str:
+    """Hex SHA-256 digest of the normalized text."""
+    return sha256_bytes(normalize_text(text).encode("utf-8"))
+
+def schema_hash(model: Type[BaseModel]) -> str:
+    """Hex SHA-256 digest of a Pydantic model's JSON schema."""
+    return sha256_bytes(json.dumps(model.model_json_schema(), sort_keys=True).encode("utf-8"))
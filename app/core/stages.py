@@ -0,0 +1,43 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+import time
+
+class StageRecorder:
+    """Collects named, timed pipeline stages for the current task."""
+
+    def __init__(self):
+        self.stages: List[Dict[str, Any]] = []
+
+    def add(self, name: str, started_at: datetime, seconds: float):
+        self.stages.append({"name": name, "started_at": started_at, "seconds": round(seconds, 4)})
+
+_recorder: ContextVar[Optional[StageRecorder]] = ContextVar("stage_recorder", default=None)
+
+@contextmanager
+def recording_stages() -> Iterator[StageRecorder]:
+    """Record every `stage()` entered (in this task or tasks it spawns) until the block exits."""
+    recorder = StageRecorder()
+    token = _recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _recorder.reset(token)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a pipeline step. A no-op unless a caller is recording stages,
+    so services can mark their steps unconditionally.
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        yield
+        return
+    started_at = datetime.now(timezone.utc)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        recorder.add(name, started_at, time.perf_counter() - started)
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from typing import Optional
+from fastapi import UploadFile
+from app.core.config import settings
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+# PDF files start with this header (within the first 1KB per the spec; in practice at 0)
+PDF_MAGIC = b"%PDF-"
+
+class UploadTooLargeError(ValueError):
+    """The upload exceeded the byte limit while being spooled."""
+
+class UploadRejectedError(ValueError):
+    """The upload is not the kind of file it claims to be."""
+
+@dataclass
+class SpooledUpload:
+    path: str
+    size: int
+    sha256: str
+
+    def read_bytes(self) -> bytes:
+        with open(self.path, "rb") as handle:
+            return handle.read()
+
+    def remove(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+def spool_file(suffix: str = ".pdf"):
+    """A named temp file in UPLOAD_SPOOL_DIR that the caller must delete."""
+    return tempfile.NamedTemporaryFile(prefix="upload-", suffix=suffix, dir=settings.UPLOAD_SPOOL_DIR, delete=False)
+
+async def spool_upload(file: UploadFile, max_bytes: int, magic: Optional[bytes] = PDF_MAGIC) -> SpooledUpload:
+    """
+    Copy an upload to a named temp file chunk by chunk, hashing it on the way.
+    Never holds more than one chunk in memory; rejects declared-oversized uploads
+    before reading, and real ones as soon as the limit is crossed.
+    The caller owns the file and must call `remove()`.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(f"Upload is {file.size} bytes, the limit is {max_bytes}")
+
+    chunk_size = settings.UPLOAD_SPOOL_CHUNK_BYTES
+    digest = hashlib.sha256()
+    size = 0
+    handle = spool_file()
+    try:
+        while chunk := await file.read(chunk_size):
+            if size == 0 and magic and magic not in chunk[:1024]:
+                raise UploadRejectedError("Upload is not a PDF file")
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+            digest.update(chunk)
+            await asyncio.to_thread(handle.write, chunk)
+        handle.close()
+    except BaseException:
+        handle.close()
+        os.unlink(handle.name)
+        raise
+
+    logger.debug(f"Spooled {size} byte upload to {handle.name}")
+    return SpooledUpload(path=handle.name, size=size, sha256=digest.hexdigest())
@@ -5,8 +5,17 @@ from app.routes import job_description_routes
 
 from app.services.browser_service import browser_service
 from app.services.db_service import db_service
+from app.services.pdf_service import pdf_service
+from app.services.page_fetch_service import page_fetch_service
+from app.services.session_manager import session_manager
+from app.services.job_queue_service import job_queue_service
+from app.services.rag_service import rag_service
+from app.services.job_handlers import JOB_HANDLERS
 from app.routes import resume_routes
 from app.routes import cover_letter_routes
+from app.routes import metrics_routes
+from app.routes import job_routes
+from app.core.dependencies import get_llm_extraction_service
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -16,12 +25,25 @@ async def lifespan(app: FastAPI):
     # Initialize Services
     await db_service.start()
     await browser_service.start()
+    await page_fetch_service.start()
+    await session_manager.start()
+    # Build the extraction agents once, before the first request
+    get_llm_extraction_service()
+    # Re-embed only what the vector store is missing, without holding up startup
+    await rag_service.start()
+    # Background workers last, once everything they use is up
+    await job_queue_service.start(JOB_HANDLERS)
     
     yield
     
     # Teardown logic
     print("Shutting down...")
+    await job_queue_service.stop()
+    await rag_service.stop()
+    await session_manager.stop()
+    await page_fetch_service.stop()
     await browser_service.stop()
+    pdf_service.stop()
     await db_service.stop()
 
 def get_application() -> FastAPI:
@@ -30,6 +52,8 @@ def get_application() -> FastAPI:
     _app.include_router(job_description_routes.router, tags=["job-descriptions"])
     _app.include_router(resume_routes.router, prefix="/api/resumes", tags=["resumes"])
     _app.include_router(cover_letter_routes.router, prefix="/api/cover-letters", tags=["cover-letters"])
+    _app.include_router(metrics_routes.router, prefix="/api/metrics", tags=["metrics"])
+    _app.include_router(job_routes.router, prefix="/api/jobs", tags=["jobs"])
 
     @_app.get("/")
     def root():
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
 from beanie import Document, Indexed
 from app.models.job_description_data import JobDescriptionData
 
@@ -8,12 +9,31 @@ class JobDescription(Document):
     title: Optional[str] = None
     description: Optional[str] = None
     structured_data: Optional[JobDescriptionData] = None
+    fetched_at: Optional[datetime] = None  # When the page was last fetched and extracted
 
     class Settings:
         name = "job_descriptions"
 
 class JobDescriptionRequest(BaseModel):
     url: str
+    force_refresh: bool = Field(False, description="Re-fetch and re-extract even if a fresh copy is stored")
+
+class JobDescriptionBatchRequest(BaseModel):
+    urls: List[str] = Field(..., min_length=1)
+    force_refresh: bool = Field(False, description="Re-fetch and re-extract even if fresh copies are stored")
+
+class ResumeMatch(BaseModel):
+    resume_id: str
+    score: float
+    requirement_scores: List[float] = Field(default_factory=list, description="Best chunk similarity per requirement, in requirement order")
+
+class JobDescriptionMatchesResponse(BaseModel):
+    job_description_id: str
+    requirements: List[str]
+    aggregate: str
+    resumes_scored: int
+    matches: List[ResumeMatch]
+    seconds: float
 
 class JobDescriptionResponse(BaseModel):
     message: Optional[str] = None   
@@ -0,0 +1,93 @@
+from beanie import Document
+from pydantic import BaseModel, Field
+from pymongo import IndexModel, ASCENDING
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+TERMINAL_STATUSES = (JobStatus.SUCCEEDED, JobStatus.FAILED)
+
+class JobStage(BaseModel):
+    name: str
+    started_at: datetime
+    seconds: float
+
+class Job(Document):
+    """
+    A unit of background work (resume upload, JD ingestion) and its progress.
+    Jobs survive restarts: anything still queued, or running with an expired
+    lease, is picked up again when a worker starts.
+    """
+    kind: str
+    status: JobStatus = JobStatus.QUEUED
+    payload: Dict[str, Any] = Field(default_factory=dict)
+    input_data: Optional[bytes] = None  # Legacy inline upload bytes (uploads now go to GridFS); cleared once the job finishes
+    result_id: Optional[str] = None     # ID of the document the job produced
+    error: Optional[str] = None
+    attempts: int = 0
+    stages: List[JobStage] = Field(default_factory=list)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    lease_until: Optional[datetime] = None  # A running job past this is assumed abandoned
+    run_after: Optional[datetime] = None    # A deferred job is not claimed before this
+
+    class Settings:
+        name = "jobs"
+        indexes = [
+            IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+            # Only finished jobs have finished_at, so queued and running ones never expire
+            IndexModel([("finished_at", ASCENDING)], expireAfterSeconds=settings.JOB_RETENTION_SECONDS),
+        ]
+
+class JobAccepted(BaseModel):
+    job_id: str
+    status: JobStatus
+    status_url: str
+
+    @classmethod
+    def from_job(cls, job: Job) -> "JobAccepted":
+        return cls(job_id=str(job.id), status=job.status, status_url=f"/api/jobs/{job.id}")
+
+class JobStatusResponse(BaseModel):
+    id: str
+    kind: str
+    status: JobStatus
+    result_id: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    stages: List[JobStage] = Field(default_factory=list)
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    queue_seconds: Optional[float] = None
+    run_seconds: Optional[float] = None
+
+    @classmethod
+    def from_job(cls, job: Job) -> "JobStatusResponse":
+        def elapsed(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+            if not start or not end:
+                return None
+            return round((end.replace(tzinfo=end.tzinfo or timezone.utc) - start.replace(tzinfo=start.tzinfo or timezone.utc)).total_seconds(), 4)
+
+        return cls(
+            id=str(job.id),
+            kind=job.kind,
+            status=job.status,
+            result_id=job.result_id,
+            error=job.error,
+            attempts=job.attempts,
+            stages=job.stages,
+            created_at=job.created_at,
+            started_at=job.started_at,
+            finished_at=job.finished_at,
+            queue_seconds=elapsed(job.created_at, job.started_at),
+            run_seconds=elapsed(job.started_at, job.finished_at),
+        )
@@ -0,0 +1,14 @@
+from beanie import Document, Indexed
+from datetime import datetime
+
+class Lease(Document):
+    """
+    A named, expiring lock shared by every process using the database, for work
+    only one of them should do at a time (e.g. the vector store startup sync).
+    """
+    name: Indexed(str, unique=True)
+    holder: str
+    expires_at: datetime
+
+    class Settings:
+        name = "leases"
@@ -0,0 +1,24 @@
+from beanie import Document, Indexed
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+from datetime import datetime, timezone
+from typing import Any, Dict
+from app.core.config import settings
+
+class LLMCacheEntry(Document):
+    """
+    Persisted LLM extraction result.
+    The key already includes the model name and schema hash, so a schema change
+    simply stops matching old entries and the TTL index cleans them up.
+    """
+    key: Indexed(str, unique=True)
+    model_name: str
+    schema_hash: str
+    payload: Dict[str, Any]
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+    class Settings:
+        name = "llm_extraction_cache"
+        indexes = [
+            IndexModel([("created_at", ASCENDING)], expireAfterSeconds=settings.LLM_CACHE_TTL_SECONDS),
+        ]
@@ -1,12 +1,25 @@
 from beanie import Document
 from pydantic import Field
+from pymongo import IndexModel, ASCENDING
 from datetime import datetime, timezone
+from typing import Optional
 from app.models.resume_data import ResumeData
 
 class Resume(Document):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     content: ResumeData  # Embed the extraction result here
     original_text: str   # Store raw extracted text for reference
+    content_hash: Optional[str] = None  # SHA-256 of the uploaded file bytes
+    text_hash: Optional[str] = None     # SHA-256 of the normalized extracted text
 
     class Settings:
         name = "resumes"
+        indexes = [
+            # Partial so resumes stored before hashing existed don't collide on null
+            IndexModel(
+                [("content_hash", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"content_hash": {"$type": "string"}},
+            ),
+            IndexModel([("text_hash", ASCENDING)]),
+        ]
@@ -1,7 +1,19 @@
 from typing import Optional, List, Dict, Any
 from beanie import PydanticObjectId
+from beanie.operators import In
+from beanie.odm.utils.dump import get_dict
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from pydantic import BaseModel
 from app.models.job_description_models import JobDescription
 
+class JobDescriptionId(BaseModel):
+    """Projection that loads only the document ID."""
+    id: PydanticObjectId
+
+    class Settings:
+        projection = {"id": "$_id"}
+
 class JobDescriptionRepository:
     """
     Repository for interacting with JobDescription documents in MongoDB.
@@ -30,6 +42,73 @@ class JobDescriptionRepository:
         """
         return await JobDescription.find_one(JobDescription.url == url)
 
+    async def get_job_descriptions_by_urls(self, urls: List[str]) -> List[JobDescription]:
+        """
+        Fetch every job description whose URL is in the list, in one query.
+        """
+        if not urls:
+            return []
+        return await JobDescription.find(In(JobDescription.url, urls)).to_list()
+
+    async def upsert_job_descriptions(self, job_descriptions: List[JobDescription]) -> Dict[int, str]:
+        """
+        Insert or refresh many job descriptions in one unordered bulk write, matched by
+        ID when it is known and by URL otherwise. IDs are set on the passed documents.
+        Returns an error per index of the documents that could not be written because
+        another document already owns their URL.
+        """
+        if not job_descriptions:
+            return {}
+        operations = []
+        for job_description in job_descriptions:
+            fields = get_dict(job_description, to_db=True)
+            fields.pop("_id", None)
+            key = {"_id": job_description.id} if job_description.id else {"url": job_description.url}
+            operations.append(UpdateOne(key, {"$set": fields}, upsert=True))
+
+        collection = JobDescription.get_pymongo_collection()
+        failed: Dict[int, str] = {}
+        try:
+            result = await collection.bulk_write(operations, ordered=False)
+            upserted_ids = result.upserted_ids
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != 11000 for error in errors):
+                raise
+            retry = []
+            for error in errors:
+                index = error["index"]
+                if job_descriptions[index].id:
+                    # Refreshing a document onto a URL another document owns: retrying can't help
+                    failed[index] = f"URL {job_descriptions[index].url} already belongs to another job description"
+                else:
+                    retry.append(operations[index])
+            # Two upserts raced on the same URL; the retry matches the winner's document
+            if retry:
+                try:
+                    await collection.bulk_write(retry, ordered=False)
+                except BulkWriteError as retry_error:
+                    # Raced again: the URLs are stored by someone else either way, their IDs are read back below
+                    if any(error.get("code") != 11000 for error in retry_error.details.get("writeErrors", [])):
+                        raise
+            upserted_ids = {upsert["index"]: upsert["_id"] for upsert in e.details.get("upserted", [])}
+
+        for index, oid in upserted_ids.items():
+            job_descriptions[index].id = oid
+        unresolved = [job_description for job_description in job_descriptions if job_description.id is None]
+        if unresolved:
+            stored = {doc.url: doc.id for doc in await self.get_job_descriptions_by_urls([jd.url for jd in unresolved])}
+            for job_description in unresolved:
+                job_description.id = stored.get(job_description.url)
+        return failed
+
+    async def get_structured_job_description_ids(self) -> List[str]:
+        """
+        Fetch the IDs of job descriptions that have structured data, without loading them.
+        """
+        docs = await JobDescription.find(JobDescription.structured_data != None).project(JobDescriptionId).to_list()  # noqa: E711
+        return [str(doc.id) for doc in docs]
+
     async def get_all_job_descriptions(self) -> List[JobDescription]:
         """
         Fetch all job descriptions.
@@ -0,0 +1,104 @@
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime, timezone, timedelta
+from beanie import PydanticObjectId
+from beanie.odm.queries.update import UpdateResponse
+from pydantic import BaseModel
+from app.models.job_model import Job, JobStatus
+
+class JobId(BaseModel):
+    """Projection that avoids loading job payloads and uploaded bytes."""
+    id: PydanticObjectId
+
+    class Settings:
+        projection = {"id": "$_id"}
+
+def _runnable(now: datetime) -> Dict[str, Any]:
+    """Queued jobs that are not deferred, or whose deferral has passed."""
+    return {"status": JobStatus.QUEUED, "$or": [{"run_after": None}, {"run_after": {"$lte": now}}]}
+
+class JobRepository:
+    """
+    Repository for interacting with Job documents in MongoDB.
+    """
+
+    async def create_job(self, job: Job) -> Job:
+        """
+        Create a new job in the database.
+        """
+        await job.insert()
+        return job
+
+    async def get_job_by_id(self, job_id: str) -> Optional[Job]:
+        """
+        Fetch a job by its ID.
+        """
+        try:
+            oid = PydanticObjectId(job_id)
+            return await Job.get(oid)
+        except Exception:
+            return None
+
+    async def claim_job(self, job_id: str, lease_seconds: int) -> Optional[Job]:
+        """
+        Atomically move a queued job to running. Returns None if another worker got it
+        first, or if it is deferred until later.
+        """
+        now = datetime.now(timezone.utc)
+        return await Job.find_one(Job.id == PydanticObjectId(job_id), _runnable(now)).update(
+            {
+                "$set": {"status": JobStatus.RUNNING, "started_at": now, "lease_until": now + timedelta(seconds=lease_seconds), "run_after": None},
+                "$inc": {"attempts": 1},
+            },
+            response_type=UpdateResponse.NEW_DOCUMENT,
+        )
+
+    async def update_job(self, job_id: str, updates: Dict[str, Any]) -> Optional[Job]:
+        """
+        Update a job by its ID.
+        """
+        job = await self.get_job_by_id(job_id)
+        if not job:
+            return None
+
+        await job.set(updates)
+        return job
+
+    async def get_queued_job_ids(self, limit: int) -> List[str]:
+        """
+        Oldest runnable queued jobs first; deferred jobs are left until their time comes.
+        """
+        jobs = await Job.find(_runnable(datetime.now(timezone.utc))).sort("+created_at").limit(limit).project(JobId).to_list()
+        return [str(job.id) for job in jobs]
+
+    async def requeue_expired_jobs(self, max_attempts: int) -> Tuple[int, int]:
+        """
+        Put running jobs whose lease has expired (their worker died) back in the queue,
+        or fail them once they have used up their attempts, so a job that keeps
+        crashing or hanging its worker isn't retried forever.
+        Returns (requeued, failed).
+        """
+        now = datetime.now(timezone.utc)
+        failed = await Job.find(Job.status == JobStatus.RUNNING, Job.lease_until < now, Job.attempts >= max_attempts).update(
+            {"$set": {
+                "status": JobStatus.FAILED,
+                "error": f"Worker did not finish the job within its lease after {max_attempts} attempt(s)",
+                "finished_at": now,
+                "lease_until": None,
+                "input_data": None,
+            }}
+        )
+        requeued = await Job.find(Job.status == JobStatus.RUNNING, Job.lease_until < now).update(
+            {"$set": {"status": JobStatus.QUEUED, "lease_until": None}}
+        )
+        return getattr(requeued, "modified_count", 0), getattr(failed, "modified_count", 0)
+
+    async def requeue_jobs(self, job_ids: List[str]) -> int:
+        """
+        Put specific running jobs back in the queue (graceful shutdown).
+        """
+        if not job_ids:
+            return 0
+        result = await Job.find(
+            {"_id": {"$in": [PydanticObjectId(job_id) for job_id in job_ids]}}, Job.status == JobStatus.RUNNING
+        ).update({"$set": {"status": JobStatus.QUEUED, "lease_until": None}})
+        return getattr(result, "modified_count", 0)
@@ -0,0 +1,40 @@
+from datetime import datetime, timezone, timedelta
+from pymongo.errors import DuplicateKeyError
+from app.models.lease_model import Lease
+
+class LeaseRepository:
+    """
+    Repository for Lease documents.
+    """
+
+    async def acquire(self, name: str, holder: str, seconds: float) -> bool:
+        """
+        Take the lease if it is free, expired or already ours. Returns False while another holder has it.
+        """
+        now = datetime.now(timezone.utc)
+        try:
+            # No match while someone else holds it: the upsert then collides with their document
+            await Lease.get_pymongo_collection().find_one_and_update(
+                {"name": name, "$or": [{"expires_at": {"$lt": now}}, {"holder": holder}]},
+                {"$set": {"holder": holder, "expires_at": now + timedelta(seconds=seconds)}},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def renew(self, name: str, holder: str, seconds: float) -> bool:
+        """
+        Extend a lease we hold. Returns False if it expired and someone else took it.
+        """
+        result = await Lease.get_pymongo_collection().update_one(
+            {"name": name, "holder": holder},
+            {"$set": {"expires_at": datetime.now(timezone.utc) + timedelta(seconds=seconds)}},
+        )
+        return result.matched_count == 1
+
+    async def release(self, name: str, holder: str):
+        """
+        Give the lease up, if we still hold it.
+        """
+        await Lease.get_pymongo_collection().delete_one({"name": name, "holder": holder})
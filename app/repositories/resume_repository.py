@@ -1,7 +1,16 @@
 from typing import Optional, List, Dict, Any
 from beanie import PydanticObjectId
+from pymongo.errors import BulkWriteError
+from pydantic import BaseModel
 from app.models.resume_model import Resume
 
+class ResumeId(BaseModel):
+    """Projection that loads only the document ID."""
+    id: PydanticObjectId
+
+    class Settings:
+        projection = {"id": "$_id"}
+
 class ResumeRepository:
     """
     Repository for interacting with Resume documents in MongoDB.
@@ -14,6 +23,26 @@ class ResumeRepository:
         await resume.insert()
         return resume
 
+    async def create_resumes(self, resumes: List[Resume]) -> List[int]:
+        """
+        Insert many resumes in one round trip. The insert is unordered, so one
+        duplicate doesn't stop the rest; returns the positions rejected as duplicates.
+        """
+        if not resumes:
+            return []
+        for resume in resumes:
+            # insert_many doesn't write generated ids back onto the documents
+            resume.id = resume.id or PydanticObjectId()
+        try:
+            await Resume.insert_many(resumes, ordered=False)
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            duplicates = [error["index"] for error in errors if error.get("code") == 11000]
+            if len(duplicates) != len(errors):
+                raise
+            return duplicates
+        return []
+
     async def get_resume_by_id(self, resume_id: str) -> Optional[Resume]:
         """
         Fetch a resume by its ID.
@@ -24,6 +53,24 @@ class ResumeRepository:
         except Exception:
             return None
 
+    async def get_resume_by_content_hash(self, content_hash: str) -> Optional[Resume]:
+        """
+        Fetch a resume by the SHA-256 of its uploaded file bytes.
+        """
+        return await Resume.find_one(Resume.content_hash == content_hash)
+
+    async def get_resume_by_text_hash(self, text_hash: str) -> Optional[Resume]:
+        """
+        Fetch the earliest resume whose normalized extracted text matches.
+        """
+        return await Resume.find(Resume.text_hash == text_hash).sort("+created_at").first_or_none()
+
+    async def get_all_resume_ids(self) -> List[str]:
+        """
+        Fetch the IDs of all resumes without loading their content.
+        """
+        return [str(doc.id) for doc in await Resume.find_all().project(ResumeId).to_list()]
+
     async def get_all_resumes(self) -> List[Resume]:
         """
         Fetch all resumes.
@@ -0,0 +1,43 @@
+from typing import Any, Dict, Optional
+from bson import ObjectId
+from gridfs.errors import NoFile
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from app.services.db_service import db_service
+
+class UploadRepository:
+    """
+    Repository for uploaded files kept in GridFS (bucket "uploads") until a
+    background job has processed them. Files are streamed in chunks, so they are
+    never held in memory whole and are not bound by the 16 MiB document limit.
+    """
+
+    def _bucket(self) -> AsyncIOMotorGridFSBucket:
+        return AsyncIOMotorGridFSBucket(db_service.database, bucket_name="uploads")
+
+    async def save_file(self, path: str, filename: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Stream a local file into GridFS. Returns the stored file's ID.
+        """
+        with open(path, "rb") as source:
+            file_id = await self._bucket().upload_from_stream(filename, source, metadata=metadata or {})
+        return str(file_id)
+
+    async def download_to_file(self, file_id: str, path: str):
+        """
+        Stream a stored file to a local path. Raises FileNotFoundError if it is gone.
+        """
+        try:
+            with open(path, "wb") as destination:
+                await self._bucket().download_to_stream(ObjectId(file_id), destination)
+        except NoFile:
+            raise FileNotFoundError(f"Upload {file_id} not found")
+
+    async def delete_file(self, file_id: str) -> bool:
+        """
+        Delete a stored file. Returns True if deleted, False if not found.
+        """
+        try:
+            await self._bucket().delete(ObjectId(file_id))
+            return True
+        except NoFile:
+            return False
@@ -1,13 +1,16 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, Path, Body
+from fastapi import APIRouter, HTTPException, Path, Body, Depends
 from app.models.cover_letter_model import CoverLetter, CoverLetterCreate, CoverLetterUpdate
 from app.services.cover_letter_service import CoverLetterService
+from app.core.dependencies import get_cover_letter_service
 
 router = APIRouter()
-cover_letter_service = CoverLetterService()
 
 @router.post("/", response_model=CoverLetter, status_code=201)
-async def create_cover_letter(cover_letter_data: CoverLetterCreate):
+async def create_cover_letter(
+    cover_letter_data: CoverLetterCreate,
+    cover_letter_service: CoverLetterService = Depends(get_cover_letter_service)
+):
     """
     Create a new cover letter.
     """
@@ -23,14 +26,17 @@ async def create_cover_letter(cover_letter_data: CoverLetterCreate):
     return await cover_letter_service.create_cover_letter(cover_letter)
 
 @router.get("/", response_model=List[CoverLetter])
-async def get_all_cover_letters():
+async def get_all_cover_letters(cover_letter_service: CoverLetterService = Depends(get_cover_letter_service)):
     """
     Get all cover letters.
     """
     return await cover_letter_service.get_all_cover_letters()
 
 @router.get("/{id}", response_model=CoverLetter)
-async def get_cover_letter(id: str = Path(..., title="The ID of the cover letter to get")):
+async def get_cover_letter(
+    id: str = Path(..., title="The ID of the cover letter to get"),
+    cover_letter_service: CoverLetterService = Depends(get_cover_letter_service)
+):
     """
     Get a specific cover letter by ID.
     """
@@ -42,7 +48,8 @@ async def get_cover_letter(id: str = Path(..., title="The ID of the cover letter
 @router.patch("/{id}", response_model=CoverLetter)
 async def update_cover_letter(
     id: str = Path(..., title="The ID of the cover letter to update"),
-    updates: CoverLetterUpdate = Body(...)
+    updates: CoverLetterUpdate = Body(...),
+    cover_letter_service: CoverLetterService = Depends(get_cover_letter_service)
 ):
     """
     Update a cover letter.
@@ -82,7 +89,10 @@ async def update_cover_letter(
     return cover_letter
 
 @router.delete("/{id}", response_model=bool)
-async def delete_cover_letter(id: str = Path(..., title="The ID of the cover letter to delete")):
+async def delete_cover_letter(
+    id: str = Path(..., title="The ID of the cover letter to delete"),
+    cover_letter_service: CoverLetterService = Depends(get_cover_letter_service)
+):
     """
     Delete a cover letter.
     """
@@ -1,13 +1,66 @@
-from fastapi import APIRouter, status
-from app.models.job_description_models import JobDescriptionRequest
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from app.models.job_description_models import JobDescriptionRequest, JobDescriptionBatchRequest
 from app.services.job_description_service import JobDescriptionService
-from app.models.job_description_models import JobDescriptionResponse
+from app.services.job_description_batch_service import JobDescriptionBatchService
+from app.models.job_description_models import JobDescriptionResponse, JobDescriptionMatchesResponse
+from app.core.dependencies import get_job_description_service, get_job_description_batch_service
+from app.models.job_model import JobAccepted
+from app.services.llm_scheduler import LLMUnavailableError
+from app.services.job_queue_service import job_queue_service, JOB_DESCRIPTION
+from app.services.matching_service import matching_service, MEAN
+from app.core.config import settings
+from app.core.urls import canonicalize_url
+import json
+import math
 
 router = APIRouter()
 
-@router.post("/", response_model=JobDescriptionResponse, status_code=status.HTTP_200_OK)
-async def store_job_description(job_description: JobDescriptionRequest) -> JobDescriptionResponse:
+@router.post("/", response_model=JobDescriptionResponse, status_code=status.HTTP_200_OK, responses={status.HTTP_202_ACCEPTED: {"model": JobAccepted}})
+async def store_job_description(
+    job_description: JobDescriptionRequest,
+    background: bool = Query(False, description="Queue the fetch and extraction and answer 202 with a job ID instead of waiting"),
+    job_description_service: JobDescriptionService = Depends(get_job_description_service)
+) -> JobDescriptionResponse:
     """Store job description from a URL"""
-    job_description = await JobDescriptionService().extract_job_description(job_description)
+    try:
+        canonicalize_url(job_description.url)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if background:
+        job = await job_queue_service.submit(JOB_DESCRIPTION, payload=job_description.model_dump())
+        accepted = JobAccepted.from_job(job)
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=accepted.model_dump(mode="json"), headers={"Location": accepted.status_url})
+    try:
+        job_description = await job_description_service.extract_job_description(job_description)
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     return JobDescriptionResponse(job_description=job_description, message="Job description extracted successfully")
-    
\ No newline at end of file
+    
+@router.post("/batch")
+async def store_job_description_batch(
+    batch: JobDescriptionBatchRequest,
+    batch_service: JobDescriptionBatchService = Depends(get_job_description_batch_service)
+):
+    """
+    Store job descriptions for many URLs. Results stream back as NDJSON, one line
+    per distinct URL as it finishes, followed by a summary line.
+    """
+    async def lines():
+        async for result in batch_service.process(batch.urls, force_refresh=batch.force_refresh):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/api/job-descriptions/{job_description_id}/matches", response_model=JobDescriptionMatchesResponse)
+async def match_resumes(
+    job_description_id: str,
+    top_k: int = Query(10, ge=1, le=settings.MATCHING_MAX_TOP_K),
+    aggregate: str = Query(MEAN, pattern="^(mean|max)$", description="Combine per-requirement scores by mean (coverage) or max (best single hit)"),
+) -> JobDescriptionMatchesResponse:
+    """Rank every stored resume against a job description's requirements"""
+    try:
+        result = await matching_service.match_job_description(job_description_id, top_k=top_k, aggregate=aggregate)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return JobDescriptionMatchesResponse(**result)
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException, Path, Query
+from fastapi.responses import StreamingResponse
+from app.core.config import settings
+from app.models.job_model import JobStatusResponse, TERMINAL_STATUSES
+from app.services.job_queue_service import job_queue_service
+
+router = APIRouter()
+
+@router.get("/{id}", response_model=JobStatusResponse)
+async def get_job(
+    id: str = Path(..., title="The ID of the job to get"),
+    wait: float = Query(0, ge=0, description="Long-poll: seconds to wait for the job to finish before answering"),
+):
+    """
+    Get a job's status, per-stage timings and, once finished, its result ID or error.
+    """
+    if wait:
+        job = await job_queue_service.wait(id, timeout=min(wait, settings.JOB_MAX_WAIT_SECONDS))
+    else:
+        job = await job_queue_service.get_job(id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobStatusResponse.from_job(job)
+
+@router.get("/{id}/events")
+async def stream_job_events(id: str = Path(..., title="The ID of the job to follow")):
+    """
+    Server-sent events: one `status` event per status change, ending when the job finishes.
+    """
+    job = await job_queue_service.get_job(id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        current = job
+        while True:
+            yield f"event: status\ndata: {JobStatusResponse.from_job(current).model_dump_json()}\n\n"
+            if current.status in TERMINAL_STATUSES:
+                return
+            previous = current.status
+            while current and current.status == previous:
+                current = await job_queue_service.wait(id, timeout=settings.JOB_MAX_WAIT_SECONDS, since=previous)
+                if current and current.status == previous:
+                    # Keep idle connections alive through proxies
+                    yield ": keep-alive\n\n"
+            if current is None:
+                return
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
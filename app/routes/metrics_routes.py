@@ -0,0 +1,35 @@
+from fastapi import APIRouter
+from app.services.llm_cache_service import llm_cache_service
+from app.services.session_manager import session_manager
+from app.services.browser_service import browser_service
+from app.services.page_fetch_service import page_fetch_service
+from app.services.crawl_cache_service import crawl_cache_service
+from app.services.content_extraction_service import content_extraction_service
+from app.services.text_preprocessor import text_preprocessor
+from app.services.llm_scheduler import llm_scheduler
+from app.services.job_queue_service import job_queue_service
+from app.services.rag_service import rag_service
+from app.services.embedding_service import embedding_service
+from app.services.matching_service import matching_service
+
+router = APIRouter()
+
+@router.get("/")
+async def get_metrics():
+    """
+    Runtime counters for caches and pools.
+    """
+    return {
+        "llm_cache": llm_cache_service.stats(),
+        "adk_sessions": session_manager.stats(),
+        "browser_pool": browser_service.stats(),
+        "page_fetch": page_fetch_service.stats(),
+        "crawl_cache": crawl_cache_service.stats(),
+        "content_extraction": content_extraction_service.stats(),
+        "llm_input": text_preprocessor.stats(),
+        "llm_scheduler": llm_scheduler.stats(),
+        "jobs": job_queue_service.stats(),
+        "vector_store": rag_service.stats(),
+        "embeddings": embedding_service.stats(),
+        "matching": matching_service.stats(),
+    }
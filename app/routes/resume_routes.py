@@ -1,18 +1,108 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query, status
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from typing import List
 from app.services.resume_service import ResumeService
+from app.services.resume_batch_service import ResumeBatchService
 from app.models.resume_model import Resume
+from app.core.dependencies import get_resume_service, get_resume_batch_service
+from app.models.job_model import JobAccepted
+from app.services.llm_scheduler import LLMUnavailableError
+from app.services.job_queue_service import job_queue_service, RESUME_UPLOAD
+from app.services.pdf_service import PdfTooLargeError
+from app.core.config import settings
+from app.core.uploads import spool_upload, SpooledUpload, UploadRejectedError, UploadTooLargeError
+from app.repositories.upload_repository import UploadRepository
+import json
+import math
 
 router = APIRouter()
-resume_service = ResumeService()
 
-@router.post("/upload", response_model=Resume)
-async def upload_resume(file: UploadFile = File(...)):
+class _CleanupStreamingResponse(StreamingResponse):
+    """
+    Runs its background task even when sending fails (client gone before or while
+    the body streams), which StreamingResponse skips on a disconnect.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        except BaseException:
+            if self.background is not None:
+                await self.background()
+            raise
+
+@router.post("/upload", response_model=Resume, responses={status.HTTP_202_ACCEPTED: {"model": JobAccepted}})
+async def upload_resume(
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="Queue the extraction and answer 202 with a job ID instead of waiting"),
+    resume_service: ResumeService = Depends(get_resume_service)
+):
     if file.content_type != "application/pdf":
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
+    # Spool to disk in chunks instead of reading the whole file into memory
     try:
-        content = await file.read()
-        resume = await resume_service.extract_and_save_resume(content)
+        upload = await spool_upload(file, settings.PDF_MAX_BYTES)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        if background:
+            # Streamed to GridFS, so any worker can pick the job up and no upload is limited by the document size
+            upload_id = await UploadRepository().save_file(upload.path, file.filename or "resume.pdf", metadata={"sha256": upload.sha256})
+            job = await job_queue_service.submit(RESUME_UPLOAD, payload={"filename": file.filename, "upload_id": upload_id, "content_hash": upload.sha256})
+            accepted = JobAccepted.from_job(job)
+            return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=accepted.model_dump(mode="json"), headers={"Location": accepted.status_url})
+        resume = await resume_service.extract_and_save_resume(upload.path, content_hash=upload.sha256)
         return resume
+    except PdfTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        upload.remove()
+
+@router.post("/batch")
+async def upload_resume_batch(
+    files: List[UploadFile] = File(..., description="PDF files and/or zip archives of PDFs"),
+    batch_service: ResumeBatchService = Depends(get_resume_batch_service)
+):
+    """
+    Extract and store many resumes at once. Results stream back as NDJSON, one line
+    per file as it finishes, followed by a summary line.
+    """
+    # Spool each upload to disk instead of holding the whole batch in memory
+    uploads: List[SpooledUpload] = []
+    total = 0
+    try:
+        for file in files:
+            upload = await spool_upload(file, settings.BATCH_MAX_TOTAL_BYTES - total, magic=None)
+            uploads.append(upload)
+            total += upload.size
+    except UploadTooLargeError:
+        for upload in uploads:
+            upload.remove()
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {settings.BATCH_MAX_TOTAL_BYTES} bytes in total")
+    except BaseException:
+        for upload in uploads:
+            upload.remove()
+        raise
+
+    def remove_uploads():
+        for upload in uploads:
+            upload.remove()
+
+    async def lines():
+        try:
+            async for result in batch_service.process([(file.filename or f"file-{index}", upload.path) for index, (file, upload) in enumerate(zip(files, uploads))]):
+                yield json.dumps(result) + "\n"
+        finally:
+            remove_uploads()
+
+    # The background task also covers a client that disconnects before the body is iterated
+    return _CleanupStreamingResponse(lines(), media_type="application/x-ndjson", background=BackgroundTask(remove_uploads))
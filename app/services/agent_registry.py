@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Type
+from pydantic import BaseModel
+from google.adk.agents.llm_agent import Agent
+from google.adk.models import Gemini
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService
+from app.models.resume_data import ResumeData
+from app.models.job_description_data import JobDescriptionData
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class ExtractorSpec:
+    """Everything needed to build a structured-output extraction agent."""
+    name: str
+    app_name: str
+    schema: Type[BaseModel]
+    output_key: str
+    description: str
+
+@dataclass
+class Extractor:
+    spec: ExtractorSpec
+    agent: Agent
+    runner: Runner
+
+RESUME_EXTRACTOR = ExtractorSpec(
+    name="resume_extractor",
+    app_name="Resume Extractor",
+    schema=ResumeData,
+    output_key="resume_data",
+    description="You are an expert resume parser. Extract the following information from the resume text accurately.",
+)
+
+JOB_DESCRIPTION_EXTRACTOR = ExtractorSpec(
+    name="jd_extractor",
+    app_name="JDExtractor",
+    schema=JobDescriptionData,
+    output_key="jd_data",
+    description="You are an expert job description parser.",
+)
+
+DEFAULT_EXTRACTORS = (RESUME_EXTRACTOR, JOB_DESCRIPTION_EXTRACTOR)
+
+class AgentRegistry:
+    """
+    Builds each extractor's Agent and Runner once and hands them out by output schema.
+    """
+
+    def __init__(self, model: Gemini, session_service: BaseSessionService, specs: Iterable[ExtractorSpec] = DEFAULT_EXTRACTORS):
+        self.model = model
+        self.session_service = session_service
+        self._extractors: Dict[Type[BaseModel], Extractor] = {}
+        for spec in specs:
+            self.register(spec)
+
+    def register(self, spec: ExtractorSpec) -> Extractor:
+        """Build and store the agent/runner pair for a spec (no-op if the schema is already registered)."""
+        if spec.schema in self._extractors:
+            return self._extractors[spec.schema]
+
+        agent = Agent(
+            name=spec.name,
+            model=self.model,
+            description=spec.description,
+            instruction=f"Return only the JSON object in the following format: {json.dumps(spec.schema.model_json_schema())}",
+            output_schema=spec.schema,
+            output_key=spec.output_key
+        )
+        runner = Runner(agent=agent, app_name=spec.app_name, session_service=self.session_service)
+        extractor = Extractor(spec=spec, agent=agent, runner=runner)
+        self._extractors[spec.schema] = extractor
+        logger.info(f"Registered extractor '{spec.name}' for {spec.schema.__name__}")
+        return extractor
+
+    def get(self, schema: Type[BaseModel]) -> Extractor:
+        try:
+            return self._extractors[schema]
+        except KeyError:
+            raise ValueError(f"No extractor registered for {schema.__name__}")
@@ -1,46 +1,224 @@
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
-from typing import Optional
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Route
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from contextlib import asynccontextmanager
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+from urllib.parse import urlparse
+from app.core.config import settings
+from app.services.fetch_profiles import FetchProfile, TRACKER_DOMAINS, host_matches, profile_for_url
+import asyncio
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+@dataclass
+class PooledPage:
+    context: BrowserContext
+    page: Page
+    uses: int = 0
+
 class BrowserService:
-    def __init__(self):
+    def __init__(self, pool_size: Optional[int] = None, max_context_uses: Optional[int] = None, warm_size: Optional[int] = None):
         self._playwright = None
         self._browser: Optional[Browser] = None
+        self.pool_size = pool_size or settings.BROWSER_POOL_SIZE
+        self.max_context_uses = max_context_uses or settings.BROWSER_CONTEXT_MAX_USES
+        self.warm_size = min(self.pool_size, warm_size if warm_size is not None else settings.BROWSER_POOL_WARM_SIZE)
+        # Caps how many contexts can be checked out at once; waiters queue here
+        self._semaphore = asyncio.Semaphore(self.pool_size)
+        self._idle: Deque[PooledPage] = deque()
+        # Serializes launching (and relaunching) Chromium
+        self._launch_lock = asyncio.Lock()
+        self._in_use = 0
+        self._waiting = 0
+        self.acquisitions = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.contexts_created = 0
+        self.contexts_recycled = 0
+        self.unhealthy_discarded = 0
+        self.blocked_requests = 0
+        self.deadline_exceeded = 0
+        self.relaunches = 0
 
     async def start(self):
-        """Initialize the global browser instance"""
-        if not self._browser:
-            logger.info("Starting global browser instance...")
-            self._playwright = await async_playwright().start()
+        """Initialize the global browser instance and warm the context pool"""
+        async with self._launch_lock:
+            if not self._browser:
+                logger.info("Starting global browser instance...")
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                for _ in range(self.warm_size - len(self._idle)):
+                    self._idle.append(await self._new_pooled_page())
+
+    async def _ensure_connected(self):
+        """Relaunch Chromium if it crashed or disconnected; the pooled contexts died with it."""
+        if self._browser is not None and self._browser.is_connected():
+            return
+        async with self._launch_lock:
+            # Another checkout may have relaunched it while we waited
+            if self._browser is None or self._browser.is_connected():
+                return
+            logger.warning("Browser disconnected, relaunching...")
+            while self._idle:
+                self.unhealthy_discarded += 1
+                await self._close(self._idle.popleft())
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.debug(f"Error closing disconnected browser: {e}")
             self._browser = await self._playwright.chromium.launch(headless=True)
+            self.relaunches += 1
 
     async def stop(self):
         """Close the global browser instance"""
         if self._browser:
             logger.info("Closing global browser instance...")
+            while self._idle:
+                await self._close(self._idle.popleft())
             await self._browser.close()
             await self._playwright.stop()
             self._browser = None
             self._playwright = None
 
-    async def fetch_html(self, url: str, wait_until: str = "networkidle") -> str:
-        """Fetch rendered HTML from a URL"""
-        if not self._browser:
-            await self.start()
-        
+    async def _new_pooled_page(self) -> PooledPage:
         context: BrowserContext = await self._browser.new_context()
         page: Page = await context.new_page()
+        self.contexts_created += 1
+        return PooledPage(context=context, page=page)
+
+    async def _close(self, pooled: PooledPage):
+        try:
+            await pooled.context.close()
+        except Exception as e:
+            logger.debug(f"Error closing browser context: {e}")
+
+    def _is_healthy(self, pooled: PooledPage) -> bool:
+        return self._browser is not None and self._browser.is_connected() and not pooled.page.is_closed()
+
+    async def _checkout(self) -> PooledPage:
+        await self._ensure_connected()
+        while self._idle:
+            pooled = self._idle.popleft()
+            if self._is_healthy(pooled):
+                return pooled
+            self.unhealthy_discarded += 1
+            await self._close(pooled)
+        return await self._new_pooled_page()
+
+    async def _checkin(self, pooled: PooledPage, reusable: bool):
+        pooled.uses += 1
+        if not reusable or not self._is_healthy(pooled):
+            self.unhealthy_discarded += 1
+            await self._close(pooled)
+            return
+        if pooled.uses >= self.max_context_uses:
+            self.contexts_recycled += 1
+            await self._close(pooled)
+            return
+        try:
+            # Drop the previous document so an idle page holds no JS heap
+            await pooled.page.goto("about:blank")
+        except Exception:
+            self.unhealthy_discarded += 1
+            await self._close(pooled)
+            return
+        self._idle.append(pooled)
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """
+        Check a warm page out of the pool, waiting if every context is in use.
+        Contexts are recycled after BROWSER_CONTEXT_MAX_USES uses or after an error.
+        """
+        if not self._browser:
+            await self.start()
+
+        queued_at = time.perf_counter()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        waited = time.perf_counter() - queued_at
+        self.acquisitions += 1
+        self.total_wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+        self._in_use += 1
         try:
+            pooled = await self._checkout()
+            reusable = True
+            try:
+                yield pooled.page
+            except BaseException:
+                reusable = False
+                raise
+            finally:
+                await self._checkin(pooled, reusable)
+        finally:
+            self._in_use -= 1
+            self._semaphore.release()
+
+    async def fetch_html(self, url: str, wait_until: Optional[str] = None, profile: Optional[FetchProfile] = None) -> str:
+        """
+        Fetch rendered HTML from a URL.
+        The profile (per-domain by default) controls resource blocking, what to
+        wait for and the hard deadline; wait_until overrides the profile's value.
+        """
+        profile = profile or profile_for_url(url)
+        async with self.page() as page:
             logger.info(f"Fetching URL: {url}")
+            try:
+                return await asyncio.wait_for(self._load(page, url, profile, wait_until or profile.wait_until), profile.deadline_seconds)
+            except asyncio.TimeoutError:
+                self.deadline_exceeded += 1
+                raise TimeoutError(f"Fetching {url} exceeded {profile.deadline_seconds}s")
+
+    async def _load(self, page: Page, url: str, profile: FetchProfile, wait_until: str) -> str:
+        async def handle_route(route: Route):
+            request = route.request
+            host = urlparse(request.url).hostname or ""
+            if request.resource_type in profile.blocked_resource_types or (profile.block_trackers and host_matches(host, TRACKER_DOMAINS)):
+                self.blocked_requests += 1
+                await route.abort()
+            else:
+                await route.continue_()
+
+        blocking = bool(profile.blocked_resource_types) or profile.block_trackers
+        if blocking:
+            await page.route("**/*", handle_route)
+        try:
             await page.goto(url, wait_until=wait_until)
-            # Short extra wait for safety if needed, or specific selectors
-            content = await page.content()
-            return content
+            if profile.wait_for_selector:
+                try:
+                    await page.wait_for_selector(profile.wait_for_selector, timeout=profile.selector_timeout_ms)
+                except PlaywrightTimeoutError:
+                    # Not fatal, take whatever has rendered so far
+                    logger.debug(f"Selector '{profile.wait_for_selector}' not found on {url}")
+            return await page.content()
         finally:
-            await page.close()
-            await context.close()
+            if blocking:
+                await page.unroute("**/*", handle_route)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool_size": self.pool_size,
+            "in_use": self._in_use,
+            "idle": len(self._idle),
+            "waiting": self._waiting,
+            "acquisitions": self.acquisitions,
+            "avg_wait_seconds": self.total_wait_seconds / self.acquisitions if self.acquisitions else 0.0,
+            "max_wait_seconds": self.max_wait_seconds,
+            "contexts_created": self.contexts_created,
+            "contexts_recycled": self.contexts_recycled,
+            "unhealthy_discarded": self.unhealthy_discarded,
+            "blocked_requests": self.blocked_requests,
+            "deadline_exceeded": self.deadline_exceeded,
+            "relaunches": self.relaunches,
+        }
 
 # Global instance
 browser_service = BrowserService()
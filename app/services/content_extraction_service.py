@@ -0,0 +1,218 @@
+from bs4 import BeautifulSoup, Tag
+from dataclasses import dataclass
+import copy
+from typing import Any, Dict, Iterable, List, Optional, Protocol
+import json
+import logging
+import re
+
+try:
+    import lxml  # noqa: F401  # only needed as a faster BeautifulSoup backend
+    DEFAULT_PARSER = "lxml"
+except ImportError:
+    DEFAULT_PARSER = "html.parser"
+
+logger = logging.getLogger(__name__)
+
+# Tags that never hold the posting itself
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "nav", "footer", "header", "aside", "form", "iframe", "svg", "button"]
+# Whole class/id tokens of page chrome: cookie banners, menus, "similar jobs" rails, share widgets...
+# Matched per token, so "job-header" or "has-sidebar" (which wrap the posting) are left alone.
+BOILERPLATE_TOKEN_PATTERN = re.compile(
+    r"^(?:(?:site|global)[-_])?"
+    r"(?:cookies?|consent|banner|breadcrumbs?|footer|header|masthead|menu|nav|navbar|navigation|sidebar|"
+    r"similar-jobs|related-jobs|related|recommendations?|share|social|subscribe|newsletter|promo|advert|ads?|popup|modal)"
+    r"(?:[-_](?:banner|bar|notice|wrapper|container|links|list|menu))?$",
+    re.IGNORECASE,
+)
+CANDIDATE_TAGS = ["div", "section", "article", "main", "td"]
+PARAGRAPH_TAGS = ["p", "li", "pre", "h2", "h3", "h4"]
+
+@dataclass
+class ExtractedContent:
+    text: str
+    title: Optional[str]
+    method: str
+    original_chars: int
+    structured: Optional[Dict[str, Any]] = None
+
+    @property
+    def removed_chars(self) -> int:
+        return max(0, self.original_chars - len(self.text))
+
+@dataclass
+class StageResult:
+    text: str
+    structured: Optional[Dict[str, Any]] = None
+
+class ExtractionStage(Protocol):
+    """One strategy for pulling the posting out of a page; returns None to defer to the next stage."""
+    name: str
+
+    def extract(self, soup: BeautifulSoup) -> Optional[StageResult]:
+        ...
+
+def _html_to_text(html: str, parser: str) -> str:
+    return BeautifulSoup(html, parser).get_text(separator="\n", strip=True)
+
+class JsonLdJobPostingStage:
+    """Use schema.org JobPosting JSON-LD when the page ships it; no heuristics needed."""
+    name = "json_ld"
+
+    def __init__(self, parser: str = DEFAULT_PARSER, min_description_chars: int = 200):
+        self.parser = parser
+        self.min_description_chars = min_description_chars
+
+    def _iter_nodes(self, data: Any) -> Iterable[Dict[str, Any]]:
+        if isinstance(data, list):
+            for item in data:
+                yield from self._iter_nodes(item)
+        elif isinstance(data, dict):
+            yield data
+            if "@graph" in data:
+                yield from self._iter_nodes(data["@graph"])
+
+    def _find_posting(self, soup: BeautifulSoup) -> Optional[Dict[str, Any]]:
+        for script in soup.find_all("script", type="application/ld+json"):
+            try:
+                data = json.loads(script.string or "")
+            except (TypeError, ValueError):
+                continue
+            for node in self._iter_nodes(data):
+                node_type = node.get("@type")
+                types = node_type if isinstance(node_type, list) else [node_type]
+                if "JobPosting" in types:
+                    return node
+        return None
+
+    def extract(self, soup: BeautifulSoup) -> Optional[StageResult]:
+        posting = self._find_posting(soup)
+        if not posting:
+            return None
+        description = _html_to_text(str(posting.get("description") or ""), self.parser)
+        if len(description) < self.min_description_chars:
+            return None
+
+        lines: List[str] = []
+        if posting.get("title"):
+            lines.append(str(posting["title"]))
+        organization = posting.get("hiringOrganization")
+        if isinstance(organization, dict) and organization.get("name"):
+            lines.append(f"Company: {organization['name']}")
+        if posting.get("employmentType"):
+            employment_type = posting["employmentType"]
+            lines.append(f"Employment type: {', '.join(employment_type) if isinstance(employment_type, list) else employment_type}")
+        locations = posting.get("jobLocation")
+        for location in locations if isinstance(locations, list) else [locations]:
+            address = location.get("address") if isinstance(location, dict) else None
+            if isinstance(address, dict):
+                parts = [address.get(key) for key in ("addressLocality", "addressRegion", "addressCountry")]
+                parts = [part if isinstance(part, str) else (part or {}).get("name") for part in parts]
+                if any(parts):
+                    lines.append(f"Location: {', '.join(part for part in parts if part)}")
+        lines.append(description)
+        for key, label in (("responsibilities", "Responsibilities"), ("qualifications", "Qualifications"), ("skills", "Skills")):
+            if posting.get(key):
+                lines.append(f"{label}:\n{_html_to_text(str(posting[key]), self.parser)}")
+        return StageResult(text="\n".join(lines), structured=posting)
+
+class TextDensityStage:
+    """
+    Readability-style scoring: strip page chrome, credit each paragraph's text to
+    its parent and grandparent (discounted by link density) and keep the best block.
+    """
+    name = "density"
+
+    def __init__(self, min_chars: int = 200):
+        self.min_chars = min_chars
+
+    def _strip_boilerplate(self, soup: BeautifulSoup):
+        for tag in soup(BOILERPLATE_TAGS):
+            tag.decompose()
+        for tag in soup.find_all(True):
+            if tag.decomposed or tag.name in ("html", "body", "main", "article"):
+                continue
+            tokens = [tag.get("id") or ""] + list(tag.get("class") or [])
+            if any(token and BOILERPLATE_TOKEN_PATTERN.match(token) for token in tokens):
+                tag.decompose()
+
+    @staticmethod
+    def _link_density(tag: Tag) -> float:
+        text_length = len(tag.get_text(strip=True))
+        if not text_length:
+            return 1.0
+        link_length = sum(len(link.get_text(strip=True)) for link in tag.find_all("a"))
+        return link_length / text_length
+
+    def extract(self, soup: BeautifulSoup) -> Optional[StageResult]:
+        # Stripping is destructive; later stages must still see the whole page
+        soup = copy.copy(soup)
+        self._strip_boilerplate(soup)
+        scores: Dict[int, float] = {}
+        nodes: Dict[int, Tag] = {}
+        for paragraph in soup.find_all(PARAGRAPH_TAGS):
+            text = paragraph.get_text(" ", strip=True)
+            if len(text) < 25:
+                continue
+            # Longer paragraphs and ones with commas read like prose, not menus
+            score = 1 + text.count(",") + min(len(text) // 100, 3)
+            parent = paragraph.parent
+            for weight, node in ((1.0, parent), (0.5, parent.parent if parent else None)):
+                if isinstance(node, Tag) and node.name in CANDIDATE_TAGS + ["body"]:
+                    nodes[id(node)] = node
+                    scores[id(node)] = scores.get(id(node), 0.0) + score * weight
+
+        if not scores:
+            return None
+        best_id = max(scores, key=lambda node_id: scores[node_id] * (1 - self._link_density(nodes[node_id])))
+        text = nodes[best_id].get_text(separator="\n", strip=True)
+        return StageResult(text=text) if len(text) >= self.min_chars else None
+
+class FallbackStage:
+    """The original heuristic: <main>, <article> or the whole <body>."""
+    name = "fallback"
+
+    def extract(self, soup: BeautifulSoup) -> Optional[StageResult]:
+        main_content = soup.find('main') or soup.find('article') or soup.body
+        return StageResult(text=main_content.get_text(separator="\n", strip=True)) if main_content else None
+
+class ContentExtractionService:
+    """
+    Turns a fetched page into the posting text sent to the LLM by running
+    pluggable stages in order until one produces content.
+    """
+
+    def __init__(self, stages: Optional[List[ExtractionStage]] = None, parser: str = DEFAULT_PARSER):
+        self.parser = parser
+        self.stages = stages or [JsonLdJobPostingStage(parser), TextDensityStage(), FallbackStage()]
+        self.chars_in = 0
+        self.chars_out = 0
+
+    def extract(self, html: str) -> ExtractedContent:
+        soup = BeautifulSoup(html, self.parser)
+        title = soup.title.string.strip() if soup.title and soup.title.string else None
+        original_chars = len(soup.body.get_text(separator="\n", strip=True)) if soup.body else len(soup.get_text(strip=True))
+
+        text, method, structured = "", "none", None
+        for stage in self.stages:
+            result = stage.extract(soup)
+            if result and result.text:
+                text, method, structured = result.text, stage.name, result.structured
+                break
+
+        content = ExtractedContent(text=text, title=title, method=method, original_chars=original_chars, structured=structured)
+        self.chars_in += content.original_chars
+        self.chars_out += len(content.text)
+        logger.info(f"Extracted {len(content.text)} chars via {method}, removed {content.removed_chars} of {content.original_chars}")
+        return content
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "parser": self.parser,
+            "chars_in": self.chars_in,
+            "chars_out": self.chars_out,
+            "chars_removed": max(0, self.chars_in - self.chars_out),
+        }
+
+# Global instance
+content_extraction_service = ContentExtractionService()
@@ -0,0 +1,272 @@
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.hashing import sha256_bytes
+from app.core.urls import canonicalize_url
+import asyncio
+import gzip
+import json
+import logging
+import os
+import tempfile
+import time
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CrawlEntry:
+    url: str
+    blob: str
+    codec: str
+    size: int
+    fetched_at: float
+    accessed_at: float
+    mode: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+@dataclass
+class CachedPage:
+    entry: CrawlEntry
+    html: str
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.entry.fetched_at
+
+class CrawlCacheService:
+    """
+    Content-addressed, compressed on-disk cache of fetched HTML.
+    Blobs are named by the SHA-256 of the page so identical pages share storage;
+    a JSON index maps canonical URLs to blobs plus their HTTP validators.
+    Entries expire by TTL, and the least recently used go first once the
+    total size exceeds the limit. Index changes are kept in memory and written
+    out at most every CRAWL_CACHE_INDEX_FLUSH_SECONDS, and on stop().
+    """
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, directory: Optional[str] = None, ttl_seconds: Optional[int] = None, max_bytes: Optional[int] = None, fresh_seconds: Optional[int] = None, flush_seconds: Optional[float] = None):
+        self.directory = Path(directory or settings.CRAWL_CACHE_DIR)
+        self.ttl_seconds = ttl_seconds or settings.CRAWL_CACHE_TTL_SECONDS
+        self.max_bytes = max_bytes or settings.CRAWL_CACHE_MAX_BYTES
+        # Within this window entries are served without any network round trip
+        self.fresh_seconds = fresh_seconds if fresh_seconds is not None else settings.CRAWL_CACHE_FRESH_SECONDS
+        self.flush_seconds = flush_seconds if flush_seconds is not None else settings.CRAWL_CACHE_INDEX_FLUSH_SECONDS
+        self.codec = "zstd" if zstandard else "gzip"
+        self._entries: Optional[Dict[str, CrawlEntry]] = None
+        self._lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()  # Keeps index writes in order
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def _load(self) -> Dict[str, CrawlEntry]:
+        if self._entries is None:
+            self._entries = await asyncio.to_thread(self._read_index)
+        return self._entries
+
+    def _read_index(self) -> Dict[str, CrawlEntry]:
+        index_path = self.directory / self.INDEX_FILE
+        if not index_path.exists():
+            return {}
+        try:
+            raw = json.loads(index_path.read_text())
+            return {url: CrawlEntry(**entry) for url, entry in raw.items()}
+        except Exception as e:
+            logger.warning(f"Discarding unreadable crawl cache index: {e}")
+            return {}
+
+    def _write_atomic(self, path: Path, data: bytes):
+        """Write via a uniquely named temp file, so concurrent writers (other processes included) never interleave."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _write_index(self, raw: Dict[str, Dict[str, Any]]):
+        self._write_atomic(self.directory / self.INDEX_FILE, json.dumps(raw).encode("utf-8"))
+
+    def _blob_path(self, blob: str, codec: str) -> Path:
+        return self.directory / "blobs" / blob[:2] / f"{blob}.html.{'zst' if codec == 'zstd' else 'gz'}"
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor().compress(data)
+        return gzip.compress(data)
+
+    @staticmethod
+    def _decompress(data: bytes, codec: str) -> bytes:
+        if codec == "zstd":
+            if not zstandard:
+                raise ValueError("zstandard is not installed")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def _read_blob(self, entry: CrawlEntry) -> str:
+        return self._decompress(self._blob_path(entry.blob, entry.codec).read_bytes(), entry.codec).decode("utf-8")
+
+    def _write_blob(self, blob: str, data: bytes) -> int:
+        path = self._blob_path(blob, self.codec)
+        if not path.exists():
+            self._write_atomic(path, self._compress(data))
+        return path.stat().st_size
+
+    async def get(self, url: str) -> Optional[CachedPage]:
+        """Return the cached page for a URL, or None if missing, expired or unreadable."""
+        url = canonicalize_url(url)
+        async with self._lock:
+            entries = await self._load()
+            entry = entries.get(url)
+        if entry is None or time.time() - entry.fetched_at > self.ttl_seconds:
+            self.misses += 1
+            return None
+        # Decompressing is the slow part, and reads of different pages don't need to wait for each other
+        try:
+            html = await asyncio.to_thread(self._read_blob, entry)
+        except Exception as e:
+            async with self._lock:
+                # Unless a put replaced it (and dropped the old blob) meanwhile
+                if self._entries.get(url) is entry:
+                    logger.warning(f"Dropping unreadable crawl cache entry for {url}: {e}")
+                    await self._remove(url)
+                    self._schedule_flush()
+            self.misses += 1
+            return None
+        entry.accessed_at = time.time()
+        self.hits += 1
+        return CachedPage(entry=entry, html=html)
+
+    async def put(self, url: str, html: str, mode: str, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        """Store a fetched page with its validators, then enforce TTL and size limits."""
+        url = canonicalize_url(url)
+        data = html.encode("utf-8")
+        blob = sha256_bytes(data)
+        async with self._lock:
+            entries = await self._load()
+            try:
+                size = await asyncio.to_thread(self._write_blob, blob, data)
+            except OSError as e:
+                logger.warning(f"Could not write crawl cache blob for {url}: {e}")
+                return
+            previous = entries.get(url)
+            now = time.time()
+            entries[url] = CrawlEntry(
+                url=url, blob=blob, codec=self.codec, size=size,
+                fetched_at=now, accessed_at=now, mode=mode,
+                etag=etag, last_modified=last_modified,
+            )
+            if previous and previous.blob != blob:
+                await self._delete_blob_if_unused(previous)
+            await self._evict()
+            self._schedule_flush()
+
+    async def touch(self, url: str):
+        """Mark an entry as revalidated (e.g. after a 304), restarting its TTL."""
+        url = canonicalize_url(url)
+        async with self._lock:
+            entries = await self._load()
+            entry = entries.get(url)
+            if entry:
+                entry.fetched_at = entry.accessed_at = time.time()
+                self._schedule_flush()
+
+    def _schedule_flush(self):
+        self._dirty = True
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_seconds)
+        await self.flush()
+
+    async def flush(self):
+        """Write the index to disk if it changed since the last write."""
+        async with self._flush_lock:
+            if not self._dirty or self._entries is None:
+                return
+            # Snapshot on the event loop, where the entries are changed, then write off it
+            raw = {url: asdict(entry) for url, entry in self._entries.items()}
+            self._dirty = False
+            try:
+                await asyncio.to_thread(self._write_index, raw)
+            except OSError as e:
+                self._dirty = True
+                logger.warning(f"Could not write crawl cache index: {e}")
+
+    async def stop(self):
+        """Write out pending index changes"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+        self._flush_task = None
+        await self.flush()
+
+    async def _remove(self, url: str):
+        entry = self._entries.pop(url, None)
+        if entry:
+            await self._delete_blob_if_unused(entry)
+
+    async def _delete_blob_if_unused(self, entry: CrawlEntry):
+        if any(other.blob == entry.blob for other in self._entries.values()):
+            return
+        try:
+            await asyncio.to_thread(self._blob_path(entry.blob, entry.codec).unlink, True)
+        except OSError as e:
+            logger.debug(f"Could not delete crawl cache blob {entry.blob}: {e}")
+
+    def _total_bytes(self) -> int:
+        return sum({entry.blob: entry.size for entry in self._entries.values()}.values())
+
+    async def _evict(self):
+        cutoff = time.time() - self.ttl_seconds
+        for url in [url for url, entry in self._entries.items() if entry.fetched_at < cutoff]:
+            await self._remove(url)
+            self.evictions += 1
+        by_access = sorted(self._entries.values(), key=lambda entry: entry.accessed_at)
+        while by_access and self._total_bytes() > self.max_bytes:
+            await self._remove(by_access.pop(0).url)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries or {}),
+            "bytes": self._total_bytes() if self._entries else 0,
+            "max_bytes": self.max_bytes,
+            "codec": self.codec,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+# Global instance
+crawl_cache_service = CrawlCacheService()
@@ -1,9 +1,12 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from beanie import init_beanie
 from app.core.config import settings
 from app.models.job_description_models import JobDescription
 from app.models.resume_model import Resume
 from app.models.cover_letter_model import CoverLetter
+from app.models.llm_cache_model import LLMCacheEntry
+from app.models.job_model import Job
+from app.models.lease_model import Lease
 from typing import Optional
 import logging
 
@@ -19,10 +22,16 @@ class DBService:
             logger.info("Initializing Database Service...")
             self._client = AsyncIOMotorClient(settings.MONGODB_URL)
             # Add all Beanie document models here
-            document_models = [JobDescription, Resume, CoverLetter]
+            document_models = [JobDescription, Resume, CoverLetter, LLMCacheEntry, Job, Lease]
             await init_beanie(database=self._client.get_default_database(), document_models=document_models)
             logger.info("Database Service initialized successfully.")
 
+    @property
+    def database(self) -> AsyncIOMotorDatabase:
+        if not self._client:
+            raise RuntimeError("Database Service is not started")
+        return self._client.get_default_database()
+
     async def stop(self):
         """Close MongoDB connection"""
         if self._client:
@@ -0,0 +1,216 @@
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from chromadb.api.types import EmbeddingFunction
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+from app.core.config import settings
+from app.core.hashing import sha256_bytes
+import logging
+import numpy as np
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingService:
+    """
+    Caching, batching front for the embedding model. Vectors are keyed by a hash of
+    the model name and text, held in an in-memory LRU and persisted to disk as raw
+    float32 files (blobs/xx/<hash>.f32), so repeated chunks and queries are embedded
+    once per model. The disk cache is pruned least recently used first (file mtime
+    carries the order across restarts). Misses are embedded in batches of `batch_size`.
+    Blocking: call it from a worker thread when on the event loop.
+    """
+
+    def __init__(
+        self,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        max_entries: Optional[int] = None,
+        cache_dir: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        enabled: Optional[bool] = None,
+        max_disk_bytes: Optional[int] = None,
+    ):
+        self._embedding_function = embedding_function
+        self.max_entries = max_entries or settings.EMBEDDING_CACHE_MAX_ENTRIES
+        self.cache_dir = cache_dir or settings.EMBEDDING_CACHE_DIR
+        self.max_disk_bytes = max_disk_bytes or settings.EMBEDDING_CACHE_MAX_DISK_BYTES
+        self.batch_size = max(1, batch_size or settings.EMBEDDING_BATCH_SIZE)
+        self.enabled = settings.EMBEDDING_CACHE_ENABLED if enabled is None else enabled
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        # Key -> file size of the vectors on disk, least recently used first; scanned on first use
+        self._disk: Optional["OrderedDict[str, int]"] = None
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_evictions = 0
+        self.batches = 0
+        self.embed_seconds = 0.0
+        self.last_batch_seconds = 0.0
+
+    @property
+    def embedding_function(self) -> EmbeddingFunction:
+        # Loading the model is slow, only do it once something actually needs embedding
+        if self._embedding_function is None:
+            self._embedding_function = DefaultEmbeddingFunction()
+        return self._embedding_function
+
+    @property
+    def model_name(self) -> str:
+        function = self.embedding_function
+        name = getattr(function, "name", None)
+        return name() if callable(name) else type(function).__name__
+
+    def _key(self, text: str) -> str:
+        return sha256_bytes(f"{self.model_name}\0{text}".encode("utf-8"))
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, "blobs", key[:2], f"{key}.f32")
+
+    def _remember(self, key: str, vector: np.ndarray):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _disk_index(self) -> "OrderedDict[str, int]":
+        """Caller holds the lock."""
+        if self._disk is None:
+            found = []
+            for directory, _, names in os.walk(os.path.join(self.cache_dir, "blobs")):
+                for name in names:
+                    if not name.endswith(".f32"):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(directory, name))
+                    except OSError:
+                        continue
+                    found.append((stat.st_mtime, name[:-len(".f32")], stat.st_size))
+            found.sort()
+            self._disk = OrderedDict((key, size) for _, key, size in found)
+            self._disk_bytes = sum(self._disk.values())
+        return self._disk
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                # Still in use, so not the one to drop from disk either
+                if self._disk is not None and key in self._disk:
+                    self._disk.move_to_end(key)
+                return vector
+        path = self._path(key)
+        if os.path.exists(path):
+            try:
+                vector = np.fromfile(path, dtype=np.float32)
+                os.utime(path)
+            except OSError as e:
+                logger.warning(f"Unreadable cached embedding {path}: {e}")
+                return None
+            with self._lock:
+                disk = self._disk_index()
+                if key in disk:
+                    disk.move_to_end(key)
+            self.disk_hits += 1
+            self._remember(key, vector)
+            return vector
+        return None
+
+    def _persist(self, key: str, vector: np.ndarray):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent readers never see a partial vector
+            handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(handle, "wb") as temp:
+                vector.tofile(temp)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to persist embedding {key[:12]}: {e}")
+            return
+        with self._lock:
+            disk = self._disk_index()
+            self._disk_bytes += vector.nbytes - disk.pop(key, 0)
+            disk[key] = vector.nbytes
+            evicted = []
+            while self._disk_bytes > self.max_disk_bytes and len(disk) > 1:
+                old_key, size = disk.popitem(last=False)
+                self._disk_bytes -= size
+                evicted.append(old_key)
+            self.disk_evictions += len(evicted)
+        for old_key in evicted:
+            try:
+                os.unlink(self._path(old_key))
+            except FileNotFoundError:
+                pass  # Already pruned by another process sharing the directory
+            except OSError as e:
+                logger.warning(f"Failed to prune cached embedding {old_key[:12]}: {e}")
+
+    def _embed_batch(self, texts: List[str]) -> List[np.ndarray]:
+        started = time.perf_counter()
+        vectors = [np.asarray(vector, dtype=np.float32) for vector in self.embedding_function(texts)]
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.batches += 1
+            self.embed_seconds += elapsed
+            self.last_batch_seconds = elapsed
+        logger.debug(f"Embedded batch of {len(texts)} in {elapsed:.3f}s")
+        return vectors
+
+    def embed(self, texts: List[str]) -> List[np.ndarray]:
+        """Embed texts, serving repeats from the caches; one float32 vector per input, in order."""
+        if not texts:
+            return []
+        if not self.enabled:
+            return [vector for start in range(0, len(texts), self.batch_size) for vector in self._embed_batch(texts[start:start + self.batch_size])]
+
+        keys = [self._key(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}  # key -> text, deduplicated in request order
+        for key, text in zip(keys, texts):
+            if key in found or key in missing:
+                continue
+            vector = self._lookup(key)
+            if vector is None:
+                missing[key] = text
+            else:
+                found[key] = vector
+
+        pending = list(missing.items())
+        with self._lock:
+            self.misses += len(pending)
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            for (key, _), vector in zip(batch, self._embed_batch([text for _, text in batch])):
+                found[key] = vector
+                self._remember(key, vector)
+                self._persist(key, vector)
+
+        return [found[key] for key in keys]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk_bytes": self._disk_bytes,
+            "disk_evictions": self.disk_evictions,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "embed_seconds": round(self.embed_seconds, 3),
+            "avg_batch_seconds": round(self.embed_seconds / self.batches, 4) if self.batches else 0.0,
+            "last_batch_seconds": round(self.last_batch_seconds, 4),
+        }
+
+# Global instance
+embedding_service = EmbeddingService()
@@ -0,0 +1,74 @@
+from dataclasses import dataclass, replace
+from typing import Dict, FrozenSet, Optional
+from urllib.parse import urlparse
+from app.core.config import settings
+
+# Resource types a job posting never needs to render its text
+DEFAULT_BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+
+# Analytics/ad hosts; subdomains match too
+TRACKER_DOMAINS = frozenset({
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "segment.io",
+    "segment.com",
+    "fullstory.com",
+    "mixpanel.com",
+    "amplitude.com",
+    "heap.io",
+    "heapanalytics.com",
+    "newrelic.com",
+    "nr-data.net",
+    "optimizely.com",
+    "clarity.ms",
+    "bat.bing.com",
+    "px.ads.linkedin.com",
+    "snap.licdn.com",
+    "adsrvr.org",
+    "quantserve.com",
+    "scorecardresearch.com",
+    "onetrust.com",
+    "cookielaw.org",
+})
+
+@dataclass(frozen=True)
+class FetchProfile:
+    """How to load a page: what to wait for, what to block and how long to allow."""
+    wait_until: str = "domcontentloaded"
+    # Comma-separated CSS selectors; the first match means the posting has rendered
+    wait_for_selector: Optional[str] = "main, article, [role='main'], h1"
+    selector_timeout_ms: int = 5000
+    blocked_resource_types: FrozenSet[str] = DEFAULT_BLOCKED_RESOURCE_TYPES
+    block_trackers: bool = True
+    deadline_seconds: float = settings.BROWSER_FETCH_DEADLINE_SECONDS
+
+DEFAULT_PROFILE = FetchProfile()
+
+# Per-ATS hints: selectors that only appear once the job description is in the DOM
+DOMAIN_SELECTOR_HINTS: Dict[str, str] = {
+    "greenhouse.io": "#content, .job__description, #app_body",
+    "lever.co": ".posting-page, .section-wrapper.page-full-width",
+    "myworkdayjobs.com": "[data-automation-id='jobPostingDescription']",
+    "workday.com": "[data-automation-id='jobPostingDescription']",
+}
+
+def host_matches(host: str, domains) -> bool:
+    """True if host is one of the domains or a subdomain of one."""
+    host = host.lower()
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in domains for i in range(len(parts)))
+
+def profile_for_url(url: str) -> FetchProfile:
+    """Pick the fetch profile for a URL, applying any per-domain selector hint."""
+    host = (urlparse(url).hostname or "").lower()
+    parts = host.split(".")
+    for i in range(len(parts)):
+        selector = DOMAIN_SELECTOR_HINTS.get(".".join(parts[i:]))
+        if selector:
+            return replace(DEFAULT_PROFILE, wait_for_selector=selector, selector_timeout_ms=10000)
+    return DEFAULT_PROFILE
@@ -0,0 +1,240 @@
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import urlsplit
+from app.core.config import settings
+from app.core.urls import canonicalize_url
+from app.models.job_description_data import JobDescriptionData
+from app.models.job_description_models import JobDescription
+from app.services.job_description_service import JobDescriptionService
+from app.services.llm_scheduler import PRIORITY_BATCH
+from app.services.rag_service import rag_service
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+EXISTING = "existing"
+FAILED = "failed"
+
+_DONE = None  # Queue sentinel
+
+class HostLimiter:
+    """
+    Per-host politeness: at most `per_host` fetches in flight to a host and
+    fetch starts to the same host spaced at least `delay` seconds apart.
+    """
+
+    def __init__(self, per_host: int, delay: float):
+        self.delay = delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(per_host))
+        self._next_start: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        host = urlsplit(url).hostname or ""
+        async with self._semaphores[host]:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, 0.0))
+            # Reserve the start time before sleeping so concurrent callers queue up behind it
+            self._next_start[host] = start + self.delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+@dataclass
+class BatchPosting:
+    url: str        # Canonical URL, the storage key
+    fetch_url: str  # As submitted; fetched as-is since some sites need what canonicalization drops
+    started: float
+    existing: Optional[JobDescription] = None
+    title: Optional[str] = None
+    description: Optional[str] = None
+    structured_data: Optional[JobDescriptionData] = None
+
+class JobDescriptionBatchService:
+    """
+    Ingests many job posting URLs as a pipeline: canonicalize and dedupe against
+    what is stored, fetch concurrently under per-host politeness limits (crawl
+    cache, static fetch or the shared browser pool), extract structured data
+    with bounded LLM parallelism at batch priority, and write with bulk upserts.
+    """
+
+    def __init__(
+        self,
+        job_description_service: JobDescriptionService,
+        fetch_concurrency: Optional[int] = None,
+        per_host_concurrency: Optional[int] = None,
+        per_host_delay: Optional[float] = None,
+        llm_concurrency: Optional[int] = None,
+        upsert_size: Optional[int] = None,
+        upsert_max_wait: Optional[float] = None,
+    ):
+        self.job_description_service = job_description_service
+        self.repository = job_description_service.repository
+        self.fetch_concurrency = fetch_concurrency or settings.JD_BATCH_FETCH_CONCURRENCY
+        self.per_host_concurrency = per_host_concurrency or settings.JD_BATCH_PER_HOST_CONCURRENCY
+        self.per_host_delay = per_host_delay if per_host_delay is not None else settings.JD_BATCH_PER_HOST_DELAY_SECONDS
+        self.llm_concurrency = llm_concurrency or settings.BATCH_LLM_CONCURRENCY
+        self.upsert_size = upsert_size or settings.BATCH_INSERT_SIZE
+        self.upsert_max_wait = upsert_max_wait or settings.BATCH_INSERT_MAX_WAIT_SECONDS
+
+    async def process(self, urls: List[str], force_refresh: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield one result per distinct canonical URL as soon as it is done, then a summary.
+        """
+        started = time.perf_counter()
+        counts = {CREATED: 0, UPDATED: 0, EXISTING: 0, FAILED: 0}
+
+        # Canonical URL -> the raw URLs submitted for it
+        submitted: Dict[str, List[str]] = {}
+        for raw_url in urls[:settings.JD_BATCH_MAX_URLS]:
+            try:
+                url = canonicalize_url(raw_url)
+            except ValueError as e:
+                counts[FAILED] += 1
+                yield {"url": raw_url, "status": FAILED, "error": str(e)}
+                continue
+            submitted.setdefault(url, []).append(raw_url)
+        for raw_url in urls[settings.JD_BATCH_MAX_URLS:]:
+            counts[FAILED] += 1
+            yield {"url": raw_url, "status": FAILED, "error": f"Batch is limited to {settings.JD_BATCH_MAX_URLS} URLs"}
+
+        # One query for everything already stored, under its canonical or its submitted URL
+        stored = await self.repository.get_job_descriptions_by_urls(list({*submitted, *(raw for raws in submitted.values() for raw in raws)}))
+        by_url = {doc.url: doc for doc in stored}
+
+        postings: List[BatchPosting] = []
+        for url, raw_urls in submitted.items():
+            existing = by_url.get(url) or next((by_url[raw] for raw in raw_urls if raw in by_url), None)
+            posting = BatchPosting(url=url, fetch_url=raw_urls[0], started=time.perf_counter(), existing=existing)
+            if existing and not force_refresh and self.job_description_service.is_fresh(existing):
+                counts[EXISTING] += 1
+                yield self._result(posting, EXISTING, str(existing.id))
+            else:
+                postings.append(posting)
+
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def run_pipeline():
+            try:
+                await self._run_pipeline(postings, results)
+            finally:
+                results.put_nowait(_DONE)
+
+        pipeline = asyncio.create_task(run_pipeline())
+        try:
+            while (result := await results.get()) is not _DONE:
+                counts[result["status"]] += 1
+                yield result
+            await pipeline
+        finally:
+            if not pipeline.done():
+                pipeline.cancel()
+
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        logger.info(f"Job description batch: {total} URL(s) in {elapsed:.3f}s {counts}")
+        yield {"done": True, "total": total, **counts, "seconds": round(elapsed, 3)}
+
+    def _result(self, posting: BatchPosting, status: str, job_description_id: Optional[str] = None, error: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "url": posting.url,
+            "status": status,
+            "job_description_id": job_description_id,
+            "error": error,
+            "seconds": round(time.perf_counter() - posting.started, 3),
+        }
+
+    async def _run_pipeline(self, postings: List[BatchPosting], results: asyncio.Queue):
+        hosts = HostLimiter(self.per_host_concurrency, self.per_host_delay)
+        fetch_slots = asyncio.Semaphore(self.fetch_concurrency)
+        text_queue: asyncio.Queue = asyncio.Queue(maxsize=self.llm_concurrency * 2)
+        upsert_queue: asyncio.Queue = asyncio.Queue(maxsize=self.upsert_size * 2)
+
+        async def fetch(posting: BatchPosting):
+            # Host slot first, so postings waiting on a busy board don't hold global fetch slots
+            try:
+                async with hosts.slot(posting.fetch_url), fetch_slots:
+                    content = await self.job_description_service.fetch_content(posting.fetch_url)
+            except Exception as e:
+                logger.error(f"Batch fetch failed for {posting.url}: {e}")
+                results.put_nowait(self._result(posting, FAILED, error=f"Fetch failed: {e}"))
+                return
+            posting.title, posting.description = content.title, content.text
+            await text_queue.put(posting)
+
+        async def fetch_all():
+            await asyncio.gather(*[fetch(posting) for posting in postings])
+            for _ in range(self.llm_concurrency):
+                await text_queue.put(_DONE)
+
+        async def llm_worker():
+            while (posting := await text_queue.get()) is not _DONE:
+                try:
+                    posting.structured_data = await self.job_description_service.extract_structured_data(posting.description, priority=PRIORITY_BATCH)
+                except Exception as e:
+                    # Model unavailable: report it rather than store a posting without structured data
+                    results.put_nowait(self._result(posting, FAILED, error=str(e)))
+                    continue
+                await upsert_queue.put(posting)
+
+        async def extract_all():
+            await asyncio.gather(*[llm_worker() for _ in range(self.llm_concurrency)])
+            await upsert_queue.put(_DONE)
+
+        await asyncio.gather(fetch_all(), extract_all(), self._upsert_worker(upsert_queue, results))
+
+    async def _upsert_worker(self, upsert_queue: asyncio.Queue, results: asyncio.Queue):
+        """Collect extracted postings into bulk upserts of up to upsert_size, flushing early after upsert_max_wait."""
+        finished = False
+        while not finished:
+            posting = await upsert_queue.get()
+            if posting is _DONE:
+                return
+            batch = [posting]
+            deadline = time.monotonic() + self.upsert_max_wait
+            while len(batch) < self.upsert_size:
+                try:
+                    posting = await asyncio.wait_for(upsert_queue.get(), timeout=max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                if posting is _DONE:
+                    finished = True
+                    break
+                batch.append(posting)
+            await self._upsert(batch, results)
+
+    async def _upsert(self, batch: List[BatchPosting], results: asyncio.Queue):
+        fetched_at = datetime.now(timezone.utc)
+        documents = [
+            JobDescription(
+                id=posting.existing.id if posting.existing else None,
+                url=posting.url,
+                title=posting.title,
+                description=posting.description,
+                # A failed re-extraction keeps the structured data from the last good one
+                structured_data=posting.structured_data or (posting.existing.structured_data if posting.existing else None),
+                fetched_at=fetched_at,
+            )
+            for posting in batch
+        ]
+        try:
+            failed = await self.repository.upsert_job_descriptions(documents)
+        except Exception as e:
+            logger.error(f"Bulk upsert of {len(batch)} job description(s) failed: {e}")
+            for posting in batch:
+                results.put_nowait(self._result(posting, FAILED, error=str(e)))
+            return
+        rag_service.index_in_background(job_descriptions=[document for index, document in enumerate(documents) if index not in failed])
+        for index, (posting, document) in enumerate(zip(batch, documents)):
+            if index in failed:
+                results.put_nowait(self._result(posting, FAILED, error=failed[index]))
+                continue
+            status = UPDATED if posting.existing else CREATED
+            results.put_nowait(self._result(posting, status, str(document.id) if document.id else None))
@@ -1,54 +1,133 @@
-from bs4 import BeautifulSoup
-from app.models.job_description_models import JobDescription, JobDescriptionRequest
+from typing import Optional
+from datetime import datetime, timezone, timedelta
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.core.urls import canonicalize_url
+from app.core.stages import stage
 from app.models.job_description_models import JobDescription, JobDescriptionRequest
 from app.services.browser_service import browser_service
+from app.services.page_fetch_service import page_fetch_service
+from app.services.content_extraction_service import content_extraction_service, ExtractedContent
 from app.services.llm_extraction_service import LLMExtractionService
+from app.services.llm_scheduler import LLMUnavailableError, PRIORITY_INTERACTIVE
+from app.models.job_description_data import JobDescriptionData
 from app.repositories.job_description_repository import JobDescriptionRepository
+from app.services.rag_service import rag_service
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
 
 class JobDescriptionService:
-    def __init__(self):
+    def __init__(self, llm_service: Optional[LLMExtractionService] = None):
         self.browser_service = browser_service
-        self.llm_service = LLMExtractionService()
+        self.page_fetcher = page_fetch_service
+        self.content_extractor = content_extraction_service
+        self.llm_service = llm_service or LLMExtractionService()
         self.repository = JobDescriptionRepository()
 
-    async def extract_job_description(self, job_description_request: JobDescriptionRequest) -> JobDescription:
-        """Extract job description using Playwright and BeautifulSoup"""
-        html = await self.browser_service.fetch_html(job_description_request.url)
-        soup = BeautifulSoup(html, "html.parser")
-    
-        title = soup.title.string if soup.title else None
-    
-        # Try to find a reasonable description (some heuristics)
-        # This is a basic implementation, can be improved with better selectors
-        description = ""
-        main_content = soup.find('main') or soup.find('article') or soup.body
-        if main_content:
-            description = main_content.get_text(separator="\n", strip=True)
+    def is_fresh(self, job_desc: JobDescription) -> bool:
+        ttl = settings.JD_FRESHNESS_TTL_SECONDS
+        if ttl is None:
+            return True
+        if job_desc.fetched_at is None:
+            return False
+        fetched_at = job_desc.fetched_at.replace(tzinfo=job_desc.fetched_at.tzinfo or timezone.utc)
+        return datetime.now(timezone.utc) - fetched_at < timedelta(seconds=ttl)
 
-        # Extract structured data
+    async def _find_existing(self, url: str, raw_url: str) -> Optional[JobDescription]:
+        existing = await self.repository.get_job_description_by_url(url)
+        if not existing and raw_url != url:
+            # Stored before URLs were canonicalized
+            existing = await self.repository.get_job_description_by_url(raw_url)
+        return existing
+
+    async def fetch_content(self, url: str) -> ExtractedContent:
+        """
+        Fetch the page and isolate the posting (JSON-LD, text density, then <main>/<article>/<body>).
+        """
+        with stage("fetch"):
+            html = await self.page_fetcher.fetch_html(url)
+
+        # Content extraction is CPU-bound, keep it off the event loop
+        with stage("content_extraction"):
+            return await asyncio.to_thread(self.content_extractor.extract, html)
+
+    async def extract_structured_data(self, description: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[JobDescriptionData]:
+        """
+        Structured extraction of the posting text. An unusable LLM answer yields None,
+        but a throttled or unavailable model raises so nothing half-done gets stored.
+        """
         try:
-            structured_data = await self.llm_service.extract_job_description_data(description)
+            with stage("llm_extraction"):
+                return await self.llm_service.extract_job_description_data(description, priority=priority)
+        except LLMUnavailableError:
+            raise
         except Exception as e:
             print(f"LLM Extraction failed for JD: {e}")
-            structured_data = None
+            return None
+
+    async def extract_job_description(self, job_description_request: JobDescriptionRequest) -> JobDescription:
+        """
+        Extract job description using a static fetch (or Playwright when needed) and the content extractor.
+        A stored, fresh copy for the same canonical URL is returned without fetching.
+        The canonical URL is only the storage key; the page is fetched from the URL as
+        submitted, since some sites need the parts canonicalization drops.
+        """
+        url = canonicalize_url(job_description_request.url)
+        existing = await self._find_existing(url, job_description_request.url)
+        if existing and not job_description_request.force_refresh and self.is_fresh(existing):
+            logger.info(f"Job description for {url} already stored, skipping fetch")
+            return existing
+
+        content = await self.fetch_content(job_description_request.url)
+        title = content.title
+        description = content.text
+
+        # Extract structured data
+        structured_data = await self.extract_structured_data(description)
+
+        fetched_at = datetime.now(timezone.utc)
+
+        if existing:
+            # Refresh the stored document in place
+            updates = {
+                JobDescription.url: url,
+                JobDescription.title: title,
+                JobDescription.description: description,
+                JobDescription.fetched_at: fetched_at,
+            }
+            if structured_data is not None:
+                # A failed extraction shouldn't wipe out the last good one
+                updates[JobDescription.structured_data] = structured_data
+            try:
+                with stage("save"):
+                    updated = await self.repository.update_job_description(str(existing.id), updates)
+            except DuplicateKeyError:
+                # `existing` was stored under its raw URL and a concurrent submission has since stored the canonical one
+                logger.info(f"Job description for {url} was stored concurrently, returning that copy")
+                return await self.repository.get_job_description_by_url(url) or existing
+            if updated:
+                rag_service.index_in_background(job_descriptions=[updated])
+            return updated or existing
 
         job_desc = JobDescription(
-            url=job_description_request.url,
+            url=url,
             title=title,
             description=description,
-            structured_data=structured_data
+            structured_data=structured_data,
+            fetched_at=fetched_at
         )
 
         # Store in MongoDB via Repository
         try:
-            await self.repository.create_job_description(job_desc)
-        except Exception as e:
-            # If it already exists, we might want to update it or just return the existing one
-            # For now, let's just log and continue, or fetch existing
-            existing = await self.repository.get_job_description_by_url(job_description_request.url)
+            with stage("save"):
+                await self.repository.create_job_description(job_desc)
+            rag_service.index_in_background(job_descriptions=[job_desc])
+        except DuplicateKeyError:
+            # A concurrent submission of the same URL won the insert
+            existing = await self.repository.get_job_description_by_url(url)
             if existing:
-                # Update existing with new data if applicable? 
-                # For now just return existing
                 job_desc = existing
-        
-        return job_desc
\ No newline at end of file
+
+        return job_desc
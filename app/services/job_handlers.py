@@ -0,0 +1,46 @@
+from typing import Dict, Optional
+from app.core.dependencies import get_resume_service, get_job_description_service
+from app.core.uploads import spool_file
+from app.models.job_model import Job
+from app.models.job_description_models import JobDescriptionRequest
+from app.repositories.upload_repository import UploadRepository
+from app.services.job_queue_service import JobHandler, RESUME_UPLOAD, JOB_DESCRIPTION, job_queue_service
+from app.services.llm_scheduler import LLMUnavailableError
+import os
+
+async def run_resume_upload(job: Job) -> Optional[str]:
+    upload_id = job.payload.get("upload_id")
+    if not upload_id:
+        # Queued before uploads moved to GridFS
+        resume = await get_resume_service().extract_and_save_resume(job.input_data)
+        return str(resume.id)
+
+    uploads = UploadRepository()
+    with spool_file() as handle:
+        path = handle.name
+    try:
+        await uploads.download_to_file(upload_id, path)
+        resume = await get_resume_service().extract_and_save_resume(path, content_hash=job.payload.get("content_hash"))
+    except LLMUnavailableError:
+        # Deferred jobs run again and need the upload; keep it unless this was the last attempt
+        if job.attempts >= job_queue_service.max_attempts:
+            await uploads.delete_file(upload_id)
+        raise
+    except Exception:
+        await uploads.delete_file(upload_id)
+        raise
+    finally:
+        os.unlink(path)
+    await uploads.delete_file(upload_id)
+    return str(resume.id)
+
+async def run_job_description(job: Job) -> Optional[str]:
+    request = JobDescriptionRequest.model_validate(job.payload)
+    job_description = await get_job_description_service().extract_job_description(request)
+    return str(job_description.id) if job_description.id else None
+
+# Job kind -> handler, registered with the job queue at startup
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    RESUME_UPLOAD: run_resume_upload,
+    JOB_DESCRIPTION: run_job_description,
+}
@@ -0,0 +1,241 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+from app.core.config import settings
+from app.core.stages import recording_stages
+from app.models.job_model import Job, JobStatus, TERMINAL_STATUSES
+from app.repositories.job_repository import JobRepository
+from app.services.llm_scheduler import LLMUnavailableError
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+RESUME_UPLOAD = "resume_upload"
+JOB_DESCRIPTION = "job_description"
+
+# A handler runs one job and returns the ID of the document it produced
+JobHandler = Callable[[Job], Awaitable[Optional[str]]]
+
+class JobQueueService:
+    """
+    Mongo-backed background job queue. Requests persist a job and return at once;
+    a fixed pool of worker tasks claims jobs atomically, runs the handler for
+    their kind and records status, per-stage timings, result or error. Jobs left
+    queued (or running under an expired lease) by a restart are picked up again.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_attempts: Optional[int] = None, poll_interval: Optional[float] = None):
+        self.workers = workers or settings.JOB_WORKERS
+        self.max_attempts = max_attempts or settings.JOB_MAX_ATTEMPTS
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL_SECONDS
+        self.lease_seconds = settings.JOB_LEASE_SECONDS
+        self.repository = JobRepository()
+        self.handlers: Dict[str, JobHandler] = {}
+        self._queue: "asyncio.Queue[str]" = asyncio.Queue()
+        self._pending: Set[str] = set()   # Queued locally, not yet claimed
+        self._running: Set[str] = set()   # Claimed by this process
+        self._tasks: list = []
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._watchers: Dict[str, int] = {}  # Waiters per job, so events are dropped once nobody waits
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.recovered = 0
+
+    def register(self, kind: str, handler: JobHandler):
+        self.handlers[kind] = handler
+
+    async def start(self, handlers: Optional[Dict[str, JobHandler]] = None):
+        """Recover interrupted jobs and start the workers and the poller"""
+        if self._tasks:
+            return
+        for kind, handler in (handlers or {}).items():
+            self.register(kind, handler)
+        logger.info(f"Starting job queue with {self.workers} worker(s)...")
+        self._tasks = [asyncio.create_task(self._worker(index)) for index in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._poll_forever()))
+
+    async def stop(self):
+        """Stop the workers; jobs they were running go back to the queue for the next start"""
+        if not self._tasks:
+            return
+        logger.info("Stopping job queue...")
+        # Cancelled workers drop their job from _running on the way out, so take the list first
+        running = list(self._running)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            requeued = await self.repository.requeue_jobs(running)
+            if requeued:
+                logger.info(f"Requeued {requeued} interrupted job(s)")
+        except Exception as e:
+            logger.error(f"Failed to requeue running jobs: {e}")
+        self._running.clear()
+        self._pending.clear()
+        self._queue = asyncio.Queue()
+
+    async def submit(self, kind: str, payload: Optional[Dict[str, Any]] = None, input_data: Optional[bytes] = None) -> Job:
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for job kind {kind!r}")
+        job = await self.repository.create_job(Job(kind=kind, payload=payload or {}, input_data=input_data))
+        self.submitted += 1
+        self._enqueue(str(job.id))
+        return job
+
+    def _enqueue(self, job_id: str):
+        if job_id not in self._pending and job_id not in self._running:
+            self._pending.add(job_id)
+            self._queue.put_nowait(job_id)
+
+    def _notify(self, job_id: str):
+        event = self._changed.pop(job_id, None)
+        if event:
+            event.set()
+
+    def _watch(self, job_id: str) -> asyncio.Event:
+        self._watchers[job_id] = self._watchers.get(job_id, 0) + 1
+        return self._changed.setdefault(job_id, asyncio.Event())
+
+    def _unwatch(self, job_id: str):
+        # Jobs run by other processes are never notified here, so the last waiter cleans up
+        self._watchers[job_id] -= 1
+        if not self._watchers[job_id]:
+            del self._watchers[job_id]
+            self._changed.pop(job_id, None)
+
+    async def _poll_forever(self):
+        """Pick up jobs this process doesn't know about: leftovers from a restart or another process's queue."""
+        while True:
+            try:
+                recovered, abandoned = await self.repository.requeue_expired_jobs(self.max_attempts)
+                if recovered:
+                    self.recovered += recovered
+                    logger.warning(f"Requeued {recovered} job(s) with an expired lease")
+                if abandoned:
+                    self.failed += abandoned
+                    logger.error(f"Failed {abandoned} job(s) that expired their lease on every attempt")
+                for job_id in await self.repository.get_queued_job_ids(limit=self.workers * 4):
+                    self._enqueue(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Job queue poll failed: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            self._pending.discard(job_id)
+            try:
+                job = await self.repository.claim_job(job_id, self.lease_seconds)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to claim job {job_id}: {e}")
+                continue
+            if job is None:
+                # Claimed elsewhere or no longer queued
+                continue
+            self._running.add(job_id)
+            self._notify(job_id)
+            try:
+                await self._run(job)
+            except Exception as e:
+                # Recording the outcome failed (e.g. Mongo blipped); the lease expiry requeues the job
+                logger.error(f"Worker {index} failed to finish job {job_id}: {e}")
+            finally:
+                self._running.discard(job_id)
+                self._notify(job_id)
+
+    async def _run(self, job: Job):
+        job_id = str(job.id)
+        handler = self.handlers.get(job.kind)
+        started = time.perf_counter()
+        with recording_stages() as recorder:
+            try:
+                if handler is None:
+                    raise ValueError(f"No handler registered for job kind {job.kind!r}")
+                result_id = await handler(job)
+            except LLMUnavailableError as e:
+                if job.attempts < self.max_attempts:
+                    # Temporary: back in the queue, but not claimable until the model is expected to be available again
+                    self.retried += 1
+                    delay = max(e.retry_after, 1.0)
+                    logger.warning(f"Job {job_id} ({job.kind}) deferred {delay:.1f}s: {e}")
+                    await self.repository.update_job(job_id, {
+                        Job.status: JobStatus.QUEUED,
+                        Job.lease_until: None,
+                        Job.run_after: datetime.now(timezone.utc) + timedelta(seconds=delay),
+                        Job.error: str(e),
+                        Job.stages: recorder.stages,
+                    })
+                    return
+                await self._finish(job_id, JobStatus.FAILED, recorder.stages, error=str(e))
+                return
+            except Exception as e:
+                logger.error(f"Job {job_id} ({job.kind}) failed: {e}")
+                await self._finish(job_id, JobStatus.FAILED, recorder.stages, error=str(e))
+                return
+
+        logger.info(f"Job {job_id} ({job.kind}) finished in {time.perf_counter() - started:.3f}s")
+        await self._finish(job_id, JobStatus.SUCCEEDED, recorder.stages, result_id=result_id)
+
+    async def _finish(self, job_id: str, status: JobStatus, stages: list, result_id: Optional[str] = None, error: Optional[str] = None):
+        if status == JobStatus.SUCCEEDED:
+            self.succeeded += 1
+        else:
+            self.failed += 1
+        await self.repository.update_job(job_id, {
+            Job.status: status,
+            Job.result_id: result_id,
+            Job.error: error,
+            Job.stages: stages,
+            Job.finished_at: datetime.now(timezone.utc),
+            Job.lease_until: None,
+            Job.input_data: None,  # Uploaded bytes are only needed to run the job
+        })
+
+    async def get_job(self, job_id: str) -> Optional[Job]:
+        return await self.repository.get_job_by_id(job_id)
+
+    async def wait(self, job_id: str, timeout: float, since: Optional[JobStatus] = None) -> Optional[Job]:
+        """
+        Long-poll: return once the job's status differs from `since` (or it finishes
+        when `since` is None), or after `timeout` seconds with its current state.
+        Status changes made in this process wake waiters at once; changes made by
+        other processes are seen within the poll interval.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            job = await self.get_job(job_id)
+            if job is None or job.status in TERMINAL_STATUSES or (since is not None and job.status != since):
+                return job
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return job
+            event = self._watch(job_id)
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(remaining, self.poll_interval))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._unwatch(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers if self._tasks else 0,
+            "queued": self._queue.qsize(),
+            "running": len(self._running),
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retried": self.retried,
+            "recovered": self.recovered,
+        }
+
+# Global instance
+job_queue_service = JobQueueService()
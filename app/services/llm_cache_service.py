@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from datetime import datetime, timezone, timedelta
+from typing import Any, Dict, Optional, Tuple, Type
+from pydantic import BaseModel
+from app.core.config import settings
+from app.core.hashing import sha256_bytes, normalize_whitespace, schema_hash
+from app.models.llm_cache_model import LLMCacheEntry
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class LLMCacheService:
+    """
+    Two-tier cache for LLM extraction results.
+    Tier 1 is an in-process LRU bounded by entry count and payload bytes,
+    tier 2 is a Mongo collection with TTL expiry.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.max_entries = max_entries or settings.LLM_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.LLM_CACHE_MAX_BYTES
+        self.ttl_seconds = ttl_seconds or settings.LLM_CACHE_TTL_SECONDS
+        # key -> (payload, size in bytes, stored at monotonic time)
+        self._lru: "OrderedDict[str, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._schema_hashes: Dict[Type[BaseModel], str] = {}
+        self.memory_hits = 0
+        self.mongo_hits = 0
+        self.misses = 0
+
+    def make_key(self, model_name: str, schema: Type[BaseModel], text: str) -> str:
+        """Cache key from the model name, output schema and normalized input."""
+        input_hash = sha256_bytes(normalize_whitespace(text).encode("utf-8"))
+        return sha256_bytes(f"{model_name}:{self._schema_hash(schema)}:{input_hash}".encode("utf-8"))
+
+    def _schema_hash(self, schema: Type[BaseModel]) -> str:
+        if schema not in self._schema_hashes:
+            self._schema_hashes[schema] = schema_hash(schema)
+        return self._schema_hashes[schema]
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached payload, promoting Mongo hits into the LRU."""
+        entry = self._lru.get(key)
+        if entry is not None:
+            payload, _, stored_at = entry
+            if time.monotonic() - stored_at < self.ttl_seconds:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return payload
+            self._evict(key)
+
+        try:
+            document = await LLMCacheEntry.find_one(LLMCacheEntry.key == key)
+        except Exception as e:
+            # The cache must never break extraction, e.g. when the DB is not initialized
+            logger.warning(f"LLM cache lookup failed: {e}")
+            document = None
+
+        if document and document.created_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds):
+            self._remember(key, document.payload)
+            self.mongo_hits += 1
+            return document.payload
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, model_name: str, schema: Type[BaseModel], payload: Dict[str, Any]):
+        """Store a payload in both tiers."""
+        self._remember(key, payload)
+        try:
+            await LLMCacheEntry.find_one(LLMCacheEntry.key == key).upsert(
+                {"$set": {
+                    LLMCacheEntry.payload: payload,
+                    LLMCacheEntry.created_at: datetime.now(timezone.utc),
+                }},
+                on_insert=LLMCacheEntry(
+                    key=key,
+                    model_name=model_name,
+                    schema_hash=self._schema_hash(schema),
+                    payload=payload,
+                ),
+            )
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _remember(self, key: str, payload: Dict[str, Any]):
+        size = len(json.dumps(payload, default=str))
+        if size > self.max_bytes:
+            return
+        if key in self._lru:
+            self._evict(key)
+        self._lru[key] = (payload, size, time.monotonic())
+        self._bytes += size
+        while len(self._lru) > self.max_entries or self._bytes > self.max_bytes:
+            self._evict(next(iter(self._lru)))
+
+    def _evict(self, key: str):
+        _, size, _ = self._lru.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        """Drop the in-process tier."""
+        self._lru.clear()
+        self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.mongo_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "mongo_hits": self.mongo_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.mongo_hits) / lookups if lookups else 0.0,
+            "entries": len(self._lru),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
+
+# Global instance
+llm_cache_service = LLMCacheService()
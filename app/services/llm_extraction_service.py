@@ -1,17 +1,41 @@
-import json
+import asyncio
 import os
-from google.adk.agents.llm_agent import Agent
-from google.adk.sessions import InMemorySessionService
-from google.adk.runners import Runner
+from typing import Any, Dict, List, Type
+from pydantic import BaseModel
 from google.adk.models import Gemini
 from google.genai import types
-# from google.genai import types # Unused if we strip it from the f-string, but user might want it. leaving commented or removing.
 from app.models.resume_data import ResumeData
 from app.models.job_description_data import JobDescriptionData
+from app.services.agent_registry import AgentRegistry, Extractor
+from app.services.llm_cache_service import llm_cache_service
+from app.services.llm_scheduler import llm_scheduler, PRIORITY_INTERACTIVE
+from app.services.session_manager import session_manager
+from app.services.text_preprocessor import text_preprocessor
+from app.core.single_flight import SingleFlight
 import logging
 logger = logging.getLogger(__name__)
 import dotenv
-dotenv.load_dotenv()    
+dotenv.load_dotenv()
+
+def merge_extractions(payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Reduce step for chunked extraction: lists are concatenated without duplicates,
+    nested objects are merged recursively and scalars keep the first non-empty value.
+    """
+    merged: Dict[str, Any] = {}
+    for payload in payloads:
+        for key, value in payload.items():
+            current = merged.get(key)
+            if isinstance(value, list):
+                items = merged.setdefault(key, [])
+                items.extend(item for item in value if item not in items)
+            elif isinstance(value, dict):
+                merged[key] = merge_extractions([current or {}, value])
+            elif current in (None, "") and value not in (None, ""):
+                merged[key] = value
+            else:
+                merged.setdefault(key, value)
+    return merged
 
 class LLMExtractionService:
     def __init__(self):
@@ -20,110 +44,93 @@ class LLMExtractionService:
             # You might want to log a warning or handle this gracefully
             logger.error("GOOGLE_API_KEY is not set in environment variables.")
             raise ValueError("GOOGLE_API_KEY is not set in environment variables.")
-            
+
         # Initialize the Gemini model
         # Note: Adjust model_name as needed (e.g., "gemini-1.5-pro")
         self.model = Gemini(model="gemini-2.5-flash-lite")
-        self.agent = Agent(
-            name="resume_extractor",
-            model=self.model,
-            description="You are an expert resume parser. Extract the following information from the resume text accurately.",
-            instruction=f"Return only the JSON object in the following format: {json.dumps(ResumeData.model_json_schema())}",
-            output_schema=ResumeData,
-            output_key="resume_data"
-        )
-        self.app_name = "Resume Extractor"
-        self.session_id = "resume_extractor_session"
         self.user_id = "resume_extractor_user"
 
-        # Create a session service
-        self.session_service = InMemorySessionService()
-        # Session needs to be awaited so this happens in a latet step.
-        self.session = None
-        self.runner = Runner(agent=self.agent, app_name=self.app_name, session_service=self.session_service)
+        # Shared, bounded session store
+        # Every extraction gets its own ephemeral session so concurrent calls never share state.
+        self.session_manager = session_manager
+        self.session_service = session_manager.session_service
+        # Agents and runners are built once here, not per call
+        self.agents = AgentRegistry(self.model, self.session_service)
+        self.cache = llm_cache_service
+        self.preprocessor = text_preprocessor
+        # Concurrent identical extractions share one in-flight model call
+        self.single_flight = SingleFlight()
+        # Rate limits, adaptive concurrency, retry and circuit breaker for every model call
+        self.scheduler = llm_scheduler
 
-    async def _ensure_session(self):
-        """Ensure session exists and is created asynchronously"""
-        try:
-             self.session = await self.session_service.create_session(app_name=self.app_name, session_id=self.session_id, user_id=self.user_id)
-        except Exception as e:
-            # If it already exists?
-            try:
-                 self.session = await self.session_service.get_session(self.app_name, self.session_id, self.user_id)
-            except:
-                 # Re-raise original error if create failed and get failed
-                 raise e
+    async def _run_extraction(self, extractor: Extractor, text: str) -> Dict[str, Any]:
+        """
+        Run an agent against the text in a fresh, isolated session and return its output state.
+        The session is deleted once the output has been read.
+        """
+        app_name = extractor.spec.app_name
+        async with self.session_manager.ephemeral_session(app_name, self.user_id) as session:
+            content = types.Content(role="user", parts=[types.Part(text=text)])
+            async for event in extractor.runner.run_async(user_id=self.user_id, session_id=session.id, new_message=content):
+                if event.is_final_response():
+                    logger.debug(f"{app_name} response complete")
 
+            updated_session = await self.session_service.get_session(app_name=app_name, user_id=self.user_id, session_id=session.id)
+            return updated_session.state[extractor.spec.output_key]
 
-    async def extract_resume_data(self, text: str) -> ResumeData:
+    async def _extract(self, schema: Type[BaseModel], text: str, priority: int = PRIORITY_INTERACTIVE) -> BaseModel:
         """
-        Extracts structured ResumeData from raw resume text using Google ADK.
+        Compact the input to the token budget, then extract it in one call or,
+        for oversized map-reduce inputs, per chunk with the results merged.
         """
-        if not self.session:
-            await self._ensure_session()
+        prepared = self.preprocessor.prepare(text, label=schema.__name__)
+        if len(prepared.chunks) == 1:
+            return await self._extract_chunk(schema, prepared.chunks[0], priority)
+        results = await asyncio.gather(*[self._extract_chunk(schema, chunk, priority) for chunk in prepared.chunks])
+        return schema.model_validate(merge_extractions([result.model_dump() for result in results]))
 
-        try:
-            # Run the agent on the input text
-            # The agent should return an instance of ResumeData directly
-            content = types.Content(role="user", parts=[types.Part(text=text)])
-            async for event in self.runner.run_async(user_id=self.user_id, session_id=self.session_id, new_message=content):
-                if event.is_final_response():
-                    print("Response Complete")
-            
-            updated_session = await self.session_service.get_session(session_id=self.session_id, user_id=self.user_id, app_name=self.app_name)
+    async def _extract_chunk(self, schema: Type[BaseModel], text: str, priority: int = PRIORITY_INTERACTIVE) -> BaseModel:
+        """
+        Serve from cache, otherwise run the schema's agent once per distinct input
+        no matter how many callers are waiting on it, through the call scheduler.
+        """
+        extractor = self.agents.get(schema)
+        cache_key = self.cache.make_key(self.model.model, schema, text)
+
+        async def extract_uncached() -> BaseModel:
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return schema.model_validate(cached)
+            output = await self.scheduler.run(
+                lambda: self._run_extraction(extractor, text),
+                tokens=self.preprocessor.count_tokens(text),
+                priority=priority,
+                label=extractor.spec.name,
+            )
+            result = schema.model_validate(output)
+            await self.cache.set(cache_key, self.model.model, schema, result.model_dump())
+            return result
+
+        return await self.single_flight.do(cache_key, extract_uncached)
 
-            return updated_session.state["resume_data"]
+    async def extract_resume_data(self, text: str, priority: int = PRIORITY_INTERACTIVE) -> ResumeData:
+        """
+        Extracts structured ResumeData from raw resume text using Google ADK.
+        Identical inputs are served from the extraction cache.
+        """
+        try:
+            return await self._extract(ResumeData, text, priority)
         except Exception as e:
             print(f"Error extracting resume data: {e}")
             raise e
-            raise e
 
-    async def extract_job_description_data(self, text: str) -> JobDescriptionData:
+    async def extract_job_description_data(self, text: str, priority: int = PRIORITY_INTERACTIVE) -> JobDescriptionData:
         """
         Extracts structured JobDescriptionData from raw job description text.
+        Identical inputs are served from the extraction cache.
         """
-        if not self.session:
-            await self._ensure_session()
-
         try:
-            # Reconfigure agent for Job Description? 
-            # Ideally we'd have separate agents or dynamically configure.
-            # For this quick implementation, I will reuse the session/runner pattern 
-            # but ideally we should have a 'JobDescriptionExtractor' agent.
-            # Let's try to just run a prompt expecting the schema.
-            
-            # Note: The agent is initialized with ResumeData schema. 
-            # We need a new agent/runner for JD, or re-init.
-            # Let's create a temporary agent config for this call or a separate instance variable.
-            
-            jd_agent = Agent(
-                name="jd_extractor",
-                model=self.model,
-                description="You are an expert job description parser.",
-                instruction=f"Return only the JSON object in the following format: {json.dumps(JobDescriptionData.model_json_schema())}",
-                output_schema=JobDescriptionData,
-                output_key="jd_data"
-            )
-            
-            # Using a new runner for this specific task to avoid schema conflicts with resume agent
-            jd_runner = Runner(agent=jd_agent, app_name="JDExtractor", session_service=self.session_service)
-            
-            # We need a unique session for this or share? unique is safer.
-            jd_session_id = f"jd_extractor_{self.session_id}"
-            
-            # Ensure session for JD
-            try:
-                await self.session_service.create_session(app_name="JDExtractor", session_id=jd_session_id, user_id=self.user_id)
-            except:
-                pass # Assume exists
-                
-            content = types.Content(role="user", parts=[types.Part(text=text)])
-            async for event in jd_runner.run_async(user_id=self.user_id, session_id=jd_session_id, new_message=content):
-                pass
-                
-            updated_session = await self.session_service.get_session(session_id=jd_session_id, user_id=self.user_id, app_name="JDExtractor")
-            return updated_session.state["jd_data"]
-
+            return await self._extract(JobDescriptionData, text, priority)
         except Exception as e:
             print(f"Error extracting JD data: {e}")
             raise e
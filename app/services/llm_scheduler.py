@@ -0,0 +1,296 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+from app.core.config import settings
+import asyncio
+import heapq
+import itertools
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Lower runs first: interactive uploads go ahead of batch re-extraction
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+_RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# google-genai APIError.status for quota / rate-limit responses
+_THROTTLE_STATUSES = {"RESOURCE_EXHAUSTED"}
+
+class LLMUnavailableError(RuntimeError):
+    """
+    The model could not be reached: retries were exhausted or the circuit is open.
+    Callers should surface this as a temporary condition (503), not a server bug.
+    """
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def status_code_of(error: BaseException) -> Optional[int]:
+    """HTTP status carried by google-genai / httpx style errors, if any."""
+    for attribute in ("code", "status_code"):
+        value = getattr(error, attribute, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+def is_throttled(error: BaseException) -> bool:
+    if status_code_of(error) == 429:
+        return True
+    status = getattr(error, "status", None)
+    return isinstance(status, str) and status.upper() in _THROTTLE_STATUSES
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    return status_code_of(error) in _RETRYABLE_STATUS or is_throttled(error)
+
+class TokenBucket:
+    """Refills continuously at `per_minute` units per minute up to one minute's worth."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` can be taken; requests larger than the bucket wait for a full one."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.tokens >= amount else (amount - self.tokens) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and fails fast for
+    `reset_seconds`, then lets a single trial call through (half-open).
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.opened = 0
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN and self.retry_after() == 0.0:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+        return self.state == self.CLOSED
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(f"LLM circuit opened after {self.failures} consecutive failure(s)")
+                self.opened += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+class LLMScheduler:
+    """
+    Single gate for model calls in this worker: a priority queue in front of
+    request/token rate buckets and an AIMD concurrency limit (grows by one per
+    window of successes, halves on a 429), with jittered exponential retry and
+    a circuit breaker around every call.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        min_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_base_seconds: Optional[float] = None,
+        retry_max_seconds: Optional[float] = None,
+        failure_threshold: Optional[int] = None,
+        reset_seconds: Optional[float] = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute or settings.LLM_REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(tokens_per_minute or settings.LLM_TOKENS_PER_MINUTE)
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self.min_concurrency = min_concurrency or settings.LLM_MIN_CONCURRENCY
+        self.max_retries = max_retries if max_retries is not None else settings.LLM_MAX_RETRIES
+        self.retry_base_seconds = retry_base_seconds or settings.LLM_RETRY_BASE_SECONDS
+        self.retry_max_seconds = retry_max_seconds or settings.LLM_RETRY_MAX_SECONDS
+        self.breaker = CircuitBreaker(
+            failure_threshold or settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            reset_seconds or settings.LLM_CIRCUIT_RESET_SECONDS,
+        )
+        self.concurrency_limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, float, "asyncio.Future[None]"]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self.calls = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.throttled = 0
+        self.rejected = 0
+        self.queue_wait_seconds = 0.0
+
+    def _dispatch(self):
+        """Grant slots to waiters in priority order while concurrency and both buckets allow."""
+        while self._waiters and self.in_flight < int(self.concurrency_limit):
+            priority, sequence, tokens, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+            if delay > 0:
+                # Head of line waits for the bucket so lower priority work cannot starve it
+                if self._wakeup is None:
+                    self._wakeup = asyncio.get_running_loop().call_later(delay, self._on_wakeup)
+                return
+            heapq.heappop(self._waiters)
+            self.requests.take(1)
+            self.tokens.take(tokens)
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _on_wakeup(self):
+        self._wakeup = None
+        self._dispatch()
+
+    async def _acquire(self, priority: int, tokens: float):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), tokens, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot was granted just as we were cancelled, hand it back
+                self._release()
+            raise
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _on_success(self):
+        self.breaker.record_success()
+        # Additive increase: roughly one extra slot per window of successful calls
+        self.concurrency_limit = min(self.max_concurrency, self.concurrency_limit + 1.0 / self.concurrency_limit)
+
+    def _on_throttled(self):
+        self.throttled += 1
+        # Multiplicative decrease
+        self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit / 2)
+        logger.warning(f"LLM throttled, concurrency limit now {int(self.concurrency_limit)}")
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff."""
+        return random.uniform(0, min(self.retry_max_seconds, self.retry_base_seconds * (2 ** attempt)))
+
+    async def run(self, fn: Callable[[], Awaitable[T]], tokens: int = 0, priority: int = PRIORITY_INTERACTIVE, label: str = "LLM") -> T:
+        """
+        Run `fn` once a slot is free, retrying rate-limit and transient errors.
+        Raises LLMUnavailableError when the circuit is open or retries run out;
+        non-transient errors are raised unchanged.
+        """
+        self.calls += 1
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.rejected += 1
+                raise LLMUnavailableError(f"{label} call rejected, model circuit is open", self.breaker.retry_after())
+
+            queued = time.perf_counter()
+            try:
+                await self._acquire(priority, tokens)
+            except asyncio.CancelledError:
+                # Never reached the model, don't leave a half-open trial dangling
+                self.breaker.trial_in_flight = False
+                raise
+            self.queue_wait_seconds += time.perf_counter() - queued
+            try:
+                result = await fn()
+            except Exception as e:
+                error = e
+            except BaseException:
+                # Cancelled mid-call: no verdict on the model, let the next trial through
+                self.breaker.trial_in_flight = False
+                raise
+            else:
+                error = None
+            finally:
+                self._release()
+
+            if error is None:
+                self._on_success()
+                self.succeeded += 1
+                return result
+            if not is_retryable(error):
+                self.breaker.trial_in_flight = False
+                self.failed += 1
+                raise error
+            if is_throttled(error):
+                # The model answered; throttling is handled by backing off, not by the breaker
+                self.breaker.trial_in_flight = False
+                self._on_throttled()
+            else:
+                self.breaker.record_failure()
+            if attempt >= self.max_retries:
+                self.failed += 1
+                raise LLMUnavailableError(f"{label} call failed after {attempt + 1} attempt(s): {error}", self._backoff(attempt)) from error
+            delay = self._backoff(attempt)
+            attempt += 1
+            self.retries += 1
+            logger.warning(f"{label} call failed ({error}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+            "in_flight": self.in_flight,
+            "queued": sum(1 for _, _, _, future in self._waiters if not future.done()),
+            "concurrency_limit": int(self.concurrency_limit),
+            "queue_wait_seconds": round(self.queue_wait_seconds, 3),
+            "circuit": self.breaker.state,
+            "circuit_opened": self.breaker.opened,
+        }
+
+# Global instance
+llm_scheduler = LLMScheduler()
@@ -0,0 +1,172 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.repositories.job_description_repository import JobDescriptionRepository
+from app.services.rag_service import HTTP, RagService, rag_service
+import asyncio
+import logging
+import numpy as np
+import time
+
+logger = logging.getLogger(__name__)
+
+MEAN = "mean"  # Average over requirements of each requirement's best chunk: rewards covering all of them
+MAX = "max"    # Best single requirement match: rewards one strong hit
+AGGREGATES = (MEAN, MAX)
+
+# JD chunk types scored against resumes, and the fallback when a posting lists no requirements
+REQUIREMENT_TYPES = ("requirement", "tech_stack")
+FALLBACK_TYPES = ("responsibility", "summary")
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize the rows of a float32 matrix in place, so a dot product is the
+    cosine similarity; zero rows stay zero. Returns the same array.
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+class MatchIndex:
+    """
+    Every resume chunk embedding in one contiguous, row-normalized float32 matrix,
+    with the rows of each resume adjacent. Scoring a job description is a single
+    matrix multiply against all chunks, a segmented max per resume and requirement,
+    one aggregation over requirements and an argpartition for the top k.
+    """
+
+    def __init__(self, resume_ids: Sequence[str], embeddings: np.ndarray):
+        """resume_ids[i] owns row i of embeddings; rows need not be grouped."""
+        owners_by_id: Dict[str, int] = {}
+        owners = np.fromiter((owners_by_id.setdefault(resume_id, len(owners_by_id)) for resume_id in resume_ids), dtype=np.int64, count=len(resume_ids))
+        order = np.argsort(owners, kind="stable")
+        owners = owners[order]
+        # Fancy indexing copies, so normalizing in place leaves the caller's array alone
+        self.matrix = np.ascontiguousarray(normalize_rows(np.asarray(embeddings, dtype=np.float32)[order])) if len(order) else np.zeros((0, 0), dtype=np.float32)
+        # First row of each resume's segment
+        self.offsets = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]]) if len(owners) else np.zeros(0, dtype=np.int64)
+        ids = list(owners_by_id)
+        self.resume_ids = [ids[owner] for owner in owners[self.offsets]]
+
+    @property
+    def resume_count(self) -> int:
+        return len(self.resume_ids)
+
+    @property
+    def chunk_count(self) -> int:
+        return self.matrix.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    def top_k(self, queries: np.ndarray, k: int, aggregate: str = MEAN) -> List[Tuple[str, float, List[float]]]:
+        """
+        Best k resumes for the query (requirement) embeddings, best first, as
+        (resume_id, score, per-requirement best cosine similarity).
+        """
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"Unknown aggregate: {aggregate}")
+        if not self.resume_count or not len(queries) or k <= 0:
+            return []
+        queries = normalize_rows(np.array(queries, dtype=np.float32))
+        # (chunks x requirements) cosine similarities, then the best chunk per resume and requirement
+        per_requirement = np.maximum.reduceat(self.matrix @ queries.T, self.offsets, axis=0)
+        scores = per_requirement.mean(axis=1) if aggregate == MEAN else per_requirement.max(axis=1)
+
+        k = min(k, self.resume_count)
+        top = np.argpartition(-scores, k - 1)[:k] if k < self.resume_count else np.arange(self.resume_count)
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.resume_ids[index], float(scores[index]), [round(float(value), 4) for value in per_requirement[index]]) for index in top]
+
+class MatchingService:
+    """
+    Ranks the whole resume pool against a stored job description. The MatchIndex
+    is loaded from the vector store's resume embeddings (nothing is re-embedded)
+    and, at most every MATCHING_INDEX_REFRESH_SECONDS, rebuilt on demand if resumes
+    were written since. Against a shared Chroma server other workers write too, so
+    the stored resume chunk count is compared as well.
+    """
+
+    def __init__(self, rag: Optional[RagService] = None, refresh_seconds: Optional[float] = None):
+        self.rag = rag or rag_service
+        self.jd_repository = JobDescriptionRepository()
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else settings.MATCHING_INDEX_REFRESH_SECONDS
+        self._index: Optional[MatchIndex] = None
+        self._checked_at = 0.0
+        self._built_signature: Optional[Tuple[int, int]] = None
+        self._lock = asyncio.Lock()
+        self.builds = 0
+        self.last_build_seconds = 0.0
+        self.queries = 0
+        self.last_query_seconds = 0.0
+
+    def _is_due(self) -> bool:
+        return self._index is None or time.monotonic() - self._checked_at >= self.refresh_seconds
+
+    def _signature(self) -> Tuple[int, int]:
+        """This process's write version, plus the stored chunk count when other processes write to the same store. Blocking."""
+        return self.rag.version, self.rag.resume_store_size() if settings.CHROMA_MODE == HTTP else 0
+
+    def _load(self) -> MatchIndex:
+        return MatchIndex(*self.rag.resume_embeddings())
+
+    async def get_index(self) -> MatchIndex:
+        async with self._lock:
+            if self._is_due():
+                # Read before loading, so a write landing mid-load is picked up by the next check
+                signature = await self.rag.run(self._signature)
+                if self._index is None or signature != self._built_signature:
+                    started = time.perf_counter()
+                    self._index = await self.rag.run(self._load)
+                    self._built_signature = signature
+                    self.builds += 1
+                    self.last_build_seconds = time.perf_counter() - started
+                    logger.info(f"Built match index: {self._index.resume_count} resume(s), {self._index.chunk_count} chunk(s) in {self.last_build_seconds:.3f}s")
+                self._checked_at = time.monotonic()
+            return self._index
+
+    async def match_job_description(self, jd_id: str, top_k: int = 10, aggregate: str = MEAN) -> Dict[str, Any]:
+        """
+        Rank all stored resumes against a job description's requirements.
+        Raises ValueError if the job description is missing or has no structured data.
+        """
+        jd = await self.jd_repository.get_job_description_by_id(jd_id)
+        if not jd or not jd.structured_data:
+            raise ValueError(f"Job Description with ID {jd_id} not found or missing structured data")
+
+        documents, metadatas, _ = self.rag.job_description_chunks(jd.structured_data)
+        requirements = [document for document, metadata in zip(documents, metadatas) if metadata["type"] in REQUIREMENT_TYPES]
+        requirements = requirements or [document for document, metadata in zip(documents, metadatas) if metadata["type"] in FALLBACK_TYPES]
+        index = await self.get_index()
+
+        started = time.perf_counter()
+        queries = await self.rag.embed_async(requirements)
+        matches = await self.rag.run(index.top_k, np.array(queries, dtype=np.float32), top_k, aggregate) if queries else []
+        self.queries += 1
+        self.last_query_seconds = time.perf_counter() - started
+
+        return {
+            "job_description_id": jd_id,
+            "requirements": requirements,
+            "aggregate": aggregate,
+            "resumes_scored": index.resume_count,
+            "matches": [
+                {"resume_id": resume_id, "score": round(score, 4), "requirement_scores": requirement_scores}
+                for resume_id, score, requirement_scores in matches
+            ],
+            "seconds": round(self.last_query_seconds, 4),
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "resumes": self._index.resume_count if self._index else 0,
+            "chunks": self._index.chunk_count if self._index else 0,
+            "matrix_bytes": self._index.nbytes if self._index else 0,
+            "builds": self.builds,
+            "last_build_seconds": round(self.last_build_seconds, 3),
+            "queries": self.queries,
+            "last_query_seconds": round(self.last_query_seconds, 4),
+        }
+
+# Global instance
+matching_service = MatchingService()
@@ -0,0 +1,191 @@
+from bs4 import BeautifulSoup
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+from app.core.config import settings
+from app.services.browser_service import BrowserService, browser_service
+from app.services.crawl_cache_service import CrawlCacheService, crawl_cache_service
+import asyncio
+import httpx
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+STATIC = "static"
+BROWSER = "browser"
+
+# Phrases shell pages show when the real content needs client-side rendering
+JS_REQUIRED_MARKERS = (
+    "enable javascript",
+    "javascript is required",
+    "javascript is disabled",
+    "requires javascript",
+)
+
+@dataclass
+class DomainDecision:
+    mode: str
+    decided_at: float
+
+class PageFetchService:
+    """
+    Tiered page fetcher: try a plain HTTP GET first and only fall back to the
+    headless browser when the returned HTML doesn't carry the content.
+    The outcome is remembered per domain so JS-only sites skip the probe.
+    """
+
+    def __init__(self, browser: Optional[BrowserService] = None, crawl_cache: Optional[CrawlCacheService] = None, min_text_chars: Optional[int] = None, decision_ttl_seconds: Optional[int] = None, max_bytes: Optional[int] = None):
+        self.browser_service = browser or browser_service
+        self.crawl_cache = crawl_cache or (crawl_cache_service if settings.CRAWL_CACHE_ENABLED else None)
+        self.min_text_chars = min_text_chars or settings.STATIC_FETCH_MIN_TEXT_CHARS
+        self.decision_ttl_seconds = decision_ttl_seconds or settings.STATIC_FETCH_DECISION_TTL_SECONDS
+        self.max_bytes = max_bytes or settings.STATIC_FETCH_MAX_BYTES
+        self._client: Optional[httpx.AsyncClient] = None
+        self._decisions: Dict[str, DomainDecision] = {}
+        self.static_fetches = 0
+        self.static_rejected = 0
+        self.static_oversized = 0
+        self.browser_fetches = 0
+        self.revalidated = 0
+
+    async def start(self):
+        """Create the pooled HTTP client"""
+        if not self._client:
+            logger.info("Starting static page fetch client...")
+            self._client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=settings.STATIC_FETCH_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=settings.STATIC_FETCH_MAX_CONNECTIONS),
+                headers={"User-Agent": settings.STATIC_FETCH_USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+            )
+
+    async def stop(self):
+        """Close the pooled HTTP client and write out the crawl cache index"""
+        if self._client:
+            logger.info("Closing static page fetch client...")
+            await self._client.aclose()
+            self._client = None
+        if self.crawl_cache:
+            await self.crawl_cache.stop()
+
+    def _mode_for(self, host: str) -> Optional[str]:
+        decision = self._decisions.get(host)
+        if decision and time.monotonic() - decision.decided_at < self.decision_ttl_seconds:
+            return decision.mode
+        return None
+
+    def _remember(self, host: str, mode: str):
+        self._decisions[host] = DomainDecision(mode=mode, decided_at=time.monotonic())
+
+    async def fetch_html(self, url: str) -> str:
+        """
+        Fetch HTML for a URL, rendering in the browser only when needed.
+        Pages in the crawl cache are served directly while fresh, and otherwise
+        revalidated with a conditional GET before anything is re-fetched.
+        """
+        host = (urlparse(url).hostname or "").lower()
+
+        probe = None
+        cached = await self.crawl_cache.get(url) if self.crawl_cache else None
+        if cached:
+            if cached.age < self.crawl_cache.fresh_seconds:
+                return cached.html
+            # A 304 only vouches for the static HTML; a rendered page may differ even when that didn't change
+            conditional_headers = cached.entry.conditional_headers() if cached.entry.mode == STATIC else {}
+            if conditional_headers:
+                probe = await self._get(url, conditional_headers)
+                if probe is not None and probe.status_code == 304:
+                    self.revalidated += 1
+                    await self.crawl_cache.touch(url)
+                    return cached.html
+
+        if self._mode_for(host) != BROWSER:
+            if probe is None:
+                probe = await self._get(url)
+            if self._is_html(probe):
+                if await self._has_enough_content_async(probe.text):
+                    self.static_fetches += 1
+                    self._remember(host, STATIC)
+                    await self._store(url, probe.text, STATIC, probe)
+                    return probe.text
+                # Only a page that came back fine but empty says the whole domain renders client-side;
+                # errors, oversized bodies and non-HTML responses are about this URL alone
+                logger.info(f"Static HTML for {url} looks client-rendered, falling back to browser")
+                self._remember(host, BROWSER)
+            self.static_rejected += 1
+
+        self.browser_fetches += 1
+        html = await self.browser_service.fetch_html(url)
+        await self._store(url, html, BROWSER, None)
+        return html
+
+    async def _store(self, url: str, html: str, mode: str, response: Optional[httpx.Response]):
+        if not self.crawl_cache:
+            return
+        headers = response.headers if response is not None else {}
+        await self.crawl_cache.put(url, html, mode, etag=headers.get("etag"), last_modified=headers.get("last-modified"))
+
+    async def _get(self, url: str, headers: Optional[Dict[str, str]] = None) -> Optional[httpx.Response]:
+        """Plain GET with the body capped at max_bytes; None on transport errors or an oversized body."""
+        if not self._client:
+            await self.start()
+        try:
+            async with self._client.stream("GET", url, headers=headers) as response:
+                declared = response.headers.get("content-length", "")
+                if declared.isdigit() and int(declared) > self.max_bytes:
+                    return self._oversized(url)
+                body = bytearray()
+                async for chunk in response.aiter_bytes():
+                    body += chunk
+                    if len(body) > self.max_bytes:
+                        return self._oversized(url)
+        except httpx.HTTPError as e:
+            logger.info(f"Static fetch failed for {url}: {e}")
+            return None
+        # The body is already decoded, so drop the headers describing the wire encoding
+        headers = [(name, value) for name, value in response.headers.multi_items() if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")]
+        return httpx.Response(response.status_code, headers=headers, content=bytes(body), request=response.request)
+
+    def _oversized(self, url: str) -> None:
+        self.static_oversized += 1
+        logger.info(f"Static response for {url} is over {self.max_bytes} bytes, abandoning it")
+        return None
+
+    def _is_html(self, response: Optional[httpx.Response]) -> bool:
+        return response is not None and response.status_code == 200 and "html" in response.headers.get("content-type", "")
+
+    async def _has_enough_content_async(self, html: str) -> bool:
+        # Parsing up to max_bytes of HTML takes long enough to stall other requests, keep it off the event loop
+        return await asyncio.to_thread(self.has_enough_content, html)
+
+    def has_enough_content(self, html: str) -> bool:
+        """Heuristic: enough visible text in the main content and no JS-required shell."""
+        soup = BeautifulSoup(html, "html.parser")
+        for tag in soup(["script", "style", "noscript", "template"]):
+            tag.decompose()
+        main_content = soup.find('main') or soup.find('article') or soup.body
+        if not main_content:
+            return False
+        text = main_content.get_text(separator=" ", strip=True)
+        if len(text) < self.min_text_chars:
+            return False
+        # A JS-required notice next to a modest amount of text is usually just nav chrome around an empty shell
+        if len(text) < 2 * self.min_text_chars:
+            lowered = text.lower()
+            return not any(marker in lowered for marker in JS_REQUIRED_MARKERS)
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "static_fetches": self.static_fetches,
+            "static_rejected": self.static_rejected,
+            "static_oversized": self.static_oversized,
+            "browser_fetches": self.browser_fetches,
+            "revalidated": self.revalidated,
+            "static_domains": sum(1 for d in self._decisions.values() if d.mode == STATIC),
+            "browser_domains": sum(1 for d in self._decisions.values() if d.mode == BROWSER),
+        }
+
+# Global instance
+page_fetch_service = PageFetchService()
@@ -1,7 +1,102 @@
 from pypdf import PdfReader
 from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+from app.core.config import settings
+import asyncio
+import logging
+import mmap
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+
+# Raw bytes, or the path of a spooled upload that workers map instead of copying
+PdfSource = Union[bytes, str]
+
+class PdfTooLargeError(ValueError):
+    """The PDF exceeds the configured byte or page limit."""
+
+@dataclass
+class PageTiming:
+    page_number: int
+    seconds: float
+    characters: int
+
+
+@dataclass
+class PdfExtractionResult:
+    text: str
+    page_count: int
+    pages: List[PageTiming] = field(default_factory=list)
+    elapsed: float = 0.0
+    stopped_early: bool = False  # Trailing pages skipped once enough text was collected
+
+
+def _open_pdf(source: PdfSource) -> PdfReader:
+    """
+    Open bytes in memory, or a file through a read-only memory map so workers share
+    the OS page cache instead of each holding (and unpickling) a copy of the document.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return PdfReader(BytesIO(source))
+    with open(source, "rb") as handle:
+        # The mapping stays valid after the file handle is closed
+        mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    return PdfReader(mapped)
+
+
+def _count_pages(source: PdfSource) -> int:
+    """Return the number of pages in the PDF. Runs inside a worker process."""
+    return len(_open_pdf(source).pages)
+
+
+def _extract_page_range(source: PdfSource, start: int, end: int) -> List[Tuple[int, str, float]]:
+    """
+    Extract text for pages [start, end). Runs inside a worker process.
+    Returns (page_index, text, seconds) for every page in the range.
+    """
+    reader = _open_pdf(source)
+    results = []
+    for index in range(start, end):
+        started = time.perf_counter()
+        extracted_text = reader.pages[index].extract_text() or ""
+        results.append((index, extracted_text, time.perf_counter() - started))
+    return results
+
 
 class PdfService:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        pages_per_chunk: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        stop_after_chars: Optional[int] = None,
+    ):
+        self.max_workers = max_workers or settings.PDF_EXTRACTION_WORKERS
+        self.pages_per_chunk = max(1, pages_per_chunk or settings.PDF_PAGES_PER_CHUNK)
+        self.max_bytes = max_bytes or settings.PDF_MAX_BYTES
+        self.max_pages = max_pages or settings.PDF_MAX_PAGES
+        self.stop_after_chars = stop_after_chars or settings.PDF_STOP_AFTER_CHARS
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            logger.info("Starting PDF extraction process pool...")
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def stop(self):
+        """Shut down the worker pool"""
+        if self._executor:
+            logger.info("Shutting down PDF extraction process pool...")
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
     @staticmethod
     def extract_text_from_pdf(file_content: bytes) -> str:
         """
@@ -19,3 +114,83 @@ class PdfService:
             # Handle specific PDF exceptions or log the error
             print(f"Error extracting text from PDF: {e}")
             raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+
+    def check_size(self, size: int):
+        if size > self.max_bytes:
+            raise PdfTooLargeError(f"PDF is {size} bytes, the limit is {self.max_bytes}")
+
+    async def extract_pages_from_pdf(self, source: PdfSource, stop_after_chars: Optional[int] = None) -> PdfExtractionResult:
+        """
+        Extracts text on the process pool without blocking the event loop.
+        `source` is the PDF bytes or a file path; files are memory-mapped by the workers.
+        Byte and page limits are checked before any text is extracted.
+        Large documents are split into page ranges that run in parallel; the
+        text is joined back in page order. Per-page timings are included.
+        With `stop_after_chars`, ranges are extracted a wave at a time in page
+        order and the remaining pages are skipped once that much text is collected.
+        """
+        self.check_size(len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source))
+        stop_after_chars = stop_after_chars or self.stop_after_chars
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        started = time.perf_counter()
+        try:
+            page_count = await loop.run_in_executor(executor, _count_pages, source)
+            if page_count > self.max_pages:
+                raise PdfTooLargeError(f"PDF has {page_count} pages, the limit is {self.max_pages}")
+            ranges = [
+                (start, min(start + self.pages_per_chunk, page_count))
+                for start in range(0, page_count, self.pages_per_chunk)
+            ]
+            # Everything at once, or a worker-sized wave at a time when we may stop early
+            wave = len(ranges) if not stop_after_chars else (self.max_workers or os.cpu_count() or 1)
+            chunks, collected, stopped_early = [], 0, False
+            for offset in range(0, len(ranges), max(wave, 1)):
+                if stop_after_chars and collected >= stop_after_chars:
+                    stopped_early = True
+                    break
+                done = await asyncio.gather(*[
+                    loop.run_in_executor(executor, _extract_page_range, source, start, end)
+                    for start, end in ranges[offset:offset + wave]
+                ])
+                chunks.extend(done)
+                collected += sum(len(page_text) for chunk in done for _, page_text, _ in chunk)
+        except PdfTooLargeError:
+            raise
+        except BrokenProcessPool as e:
+            # A crashed worker poisons the whole pool, start fresh next time
+            logger.error(f"PDF extraction pool is broken: {e}")
+            self._executor = None
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+        except Exception as e:
+            print(f"Error extracting text from PDF: {e}")
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}")
+
+        pages = sorted((page for chunk in chunks for page in chunk), key=lambda page: page[0])
+        # Pages are separated by a form feed so later stages can spot running headers/footers
+        text = "\n\f".join(page_text for _, page_text, _ in pages if page_text).strip()
+        result = PdfExtractionResult(
+            text=text,
+            page_count=page_count,
+            pages=[PageTiming(page_number=index + 1, seconds=seconds, characters=len(page_text)) for index, page_text, seconds in pages],
+            elapsed=time.perf_counter() - started,
+            stopped_early=stopped_early,
+        )
+        logger.info(
+            f"Extracted {len(pages)}/{page_count} PDF pages in {len(chunks)} chunk(s) in {result.elapsed:.3f}s "
+            f"(slowest page {max((p.seconds for p in result.pages), default=0.0):.3f}s)"
+            + (", stopped early" if stopped_early else "")
+        )
+        for page in result.pages:
+            logger.debug(f"PDF page {page.page_number}: {page.characters} chars in {page.seconds:.3f}s")
+        return result
+
+    async def extract_text_from_pdf_async(self, source: PdfSource) -> str:
+        """
+        Async counterpart of extract_text_from_pdf backed by the process pool.
+        """
+        result = await self.extract_pages_from_pdf(source)
+        return result.text
+
+# Global instance
+pdf_service = PdfService()
@@ -1,125 +1,588 @@
 import chromadb
-import uuid
-from typing import List, Tuple, Dict
+from chromadb.api import ClientAPI
+from chromadb.config import Settings as ChromaSettings
+from chromadb.errors import NotFoundError
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, List, Optional, Sequence, Set, Tuple, Dict
+from app.core.config import settings
+from app.core.hashing import sha256_bytes
 from app.repositories.resume_repository import ResumeRepository
 from app.repositories.job_description_repository import JobDescriptionRepository
-from app.models.resume_data import ResumeData
+from app.repositories.lease_repository import LeaseRepository
+from app.services.embedding_service import EmbeddingService, embedding_service
+from app.models.resume_model import Resume
+from app.models.job_description_models import JobDescription
 from app.models.job_description_data import JobDescriptionData
+import asyncio
+import json
+import logging
+import numpy as np
+import os
+import socket
+import threading
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process guard on the persistent directory
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+EPHEMERAL = "ephemeral"
+PERSISTENT = "persistent"
+HTTP = "http"
+
+# One collection for all chunks of a kind (filtered by metadata), or one per document (legacy)
+SHARED = "shared"
+PER_DOCUMENT = "per_document"
+
+RESUME_PREFIX = "resume_"
+JOB_DESCRIPTION_PREFIX = "job_description_"
+
+# Page size when scanning a shared collection's metadata
+SCAN_PAGE_SIZE = 5000
+
+SYNC_LEASE = "vector_store_sync"
+
+def chunk_id(document: str, metadata: Dict[str, Any]) -> str:
+    """
+    Deterministic chunk ID: the section (metadata type) plus a hash of the text and
+    metadata, so an unchanged chunk keeps its ID and its embedding across re-indexes.
+    """
+    content = json.dumps({"document": document, "metadata": metadata}, sort_keys=True)
+    return f"{metadata.get('type', 'chunk')}:{sha256_bytes(content.encode('utf-8'))[:16]}"
+
+@dataclass(frozen=True)
+class VectorKind:
+    prefix: str      # Per-document collection name prefix
+    collection: str  # Shared collection name
+    id_key: str      # Metadata key holding the source document's ID
+
+RESUMES = VectorKind(RESUME_PREFIX, settings.CHROMA_RESUME_COLLECTION, "resume_id")
+JOB_DESCRIPTIONS = VectorKind(JOB_DESCRIPTION_PREFIX, settings.CHROMA_JOB_DESCRIPTION_COLLECTION, "jd_id")
 
 class RagService:
-    def __init__(self):
-        # Ephemeral client for now as requested
+    def __init__(self, client: Optional[ClientAPI] = None, embedder: Optional[EmbeddingService] = None):
         # NOTE: Could potentially move to weaviate or pinecone for production. ChromaDB is fairly easy and straightforward to implement.
-        self.client = chromadb.Client()
+        # The client is created on first use from CHROMA_MODE
+        self._client = client
+        self._client_lock = threading.Lock()
+        # Vectors are computed (and cached) here and handed to Chroma precomputed
+        self.embedder = embedder or embedding_service
+        self.layout = settings.CHROMA_LAYOUT
+        if self.layout not in (SHARED, PER_DOCUMENT):
+            raise ValueError(f"Unknown CHROMA_LAYOUT: {self.layout}")
         self.resume_repository = ResumeRepository()
         self.jd_repository = JobDescriptionRepository()
+        self.lease_repository = LeaseRepository()
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._directory_lock = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self._index_tasks: Set[asyncio.Task] = set()
+        self.indexed_on_save = 0
+        self.last_sync: Dict[str, Any] = {}
+        self.chunks_embedded = 0
+        self.chunks_deleted = 0
+        self.chunks_unchanged = 0
+        # Bumped on every change to stored chunks, so derived indexes know when to rebuild
+        self.version = 0
+        # Executor threads update the counters and version together
+        self._counter_lock = threading.Lock()
+        # Chroma calls and embedding inference block, so the async API runs them here
+        self.max_workers = settings.RAG_MAX_WORKERS
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.in_flight = 0
 
-    def query_resume(self, resume_id: str, queries: List[str], top_k: int = 4) -> List[Dict]:
+    @property
+    def client(self) -> ClientAPI:
+        if self._client is None:
+            # Worker threads may race to open the store
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rag")
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """Run blocking vector store work on the bounded executor, off the event loop."""
+        # in_flight is only touched on the event loop thread
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+        finally:
+            self.in_flight -= 1
+
+    def _create_client(self) -> ClientAPI:
         """
-        Query a specific resume collection for relevant information.
-        resume_id: Identifies the specific Collection to search (e.g. resume_123).
-                   The query runs against ALL documents (chunks) in that collection.
+        ephemeral: in-memory, lost on restart (tests, local experiments)
+        persistent: on-disk at CHROMA_PERSIST_DIR, survives restarts of a single worker
+        http: a Chroma server, shared by every worker and process
+        """
+        mode = settings.CHROMA_MODE
+        chroma_settings = ChromaSettings(anonymized_telemetry=False)
+        logger.info(f"Opening {mode} Chroma vector store...")
+        if mode == EPHEMERAL:
+            return chromadb.EphemeralClient(settings=chroma_settings)
+        if mode == PERSISTENT:
+            os.makedirs(settings.CHROMA_PERSIST_DIR, exist_ok=True)
+            self._lock_directory(settings.CHROMA_PERSIST_DIR)
+            return chromadb.PersistentClient(path=settings.CHROMA_PERSIST_DIR, settings=chroma_settings)
+        if mode == HTTP:
+            return chromadb.HttpClient(host=settings.CHROMA_HOST, port=settings.CHROMA_PORT, ssl=settings.CHROMA_SSL, settings=chroma_settings)
+        raise ValueError(f"Unknown CHROMA_MODE: {mode}")
+
+    def _lock_directory(self, path: str):
         """
-        collection_name = f"resume_{resume_id}"
+        Chroma's local store is not safe across processes: hold an exclusive lock on
+        the directory for this process's lifetime so a second one fails loudly.
+        """
+        if fcntl is None or self._directory_lock is not None:
+            return
+        handle = open(os.path.join(path, ".process.lock"), "w")
         try:
-            collection = self.client.get_collection(name=collection_name)
-        except ValueError:
-            # Collection might not exist if resume wasn't processed or ID is wrong
-            return []
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            raise RuntimeError(
+                f"Chroma store {path} is already open in another process. "
+                f"CHROMA_MODE=persistent supports a single worker; use CHROMA_MODE=http to share vectors between workers."
+            )
+        self._directory_lock = handle
+
+    async def start(self):
+        """Open the store (failing fast if another process owns it) and reconcile it with Mongo in the background"""
+        if settings.CHROMA_MODE == PERSISTENT:
+            await asyncio.to_thread(lambda: self.client)
+        if settings.CHROMA_SYNC_ON_STARTUP and not self._sync_task:
+            self._sync_task = asyncio.create_task(self._sync_in_background())
+
+    async def stop(self):
+        """Cancel an unfinished startup sync and indexing, and shut down the executor"""
+        # Anything not indexed yet is picked up by the next startup sync
+        for task in list(self._index_tasks):
+            task.cancel()
+        await asyncio.gather(*self._index_tasks, return_exceptions=True)
+        if self._sync_task:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+        if self._executor:
+            # Waits for in-flight embedding; do that off the event loop
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def _sync_in_background(self):
+        # Several workers start together against a shared server; one sync is enough
+        try:
+            if not await self.lease_repository.acquire(SYNC_LEASE, self.instance_id, settings.CHROMA_SYNC_LEASE_SECONDS):
+                logger.info("Vector store sync is running in another process, skipping")
+                return
+        except Exception as e:
+            logger.error(f"Failed to take the vector store sync lease: {e}")
+            return
+        renewer = asyncio.create_task(self._renew_sync_lease())
+        try:
+            await self.sync_index()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Vector store sync failed: {e}")
+        finally:
+            renewer.cancel()
+            try:
+                await self.lease_repository.release(SYNC_LEASE, self.instance_id)
+            except Exception as e:
+                logger.warning(f"Failed to release the vector store sync lease: {e}")
+
+    async def _renew_sync_lease(self):
+        # Keep the short lease alive for as long as the sync takes
+        while True:
+            await asyncio.sleep(settings.CHROMA_SYNC_LEASE_SECONDS / 3)
+            try:
+                if not await self.lease_repository.renew(SYNC_LEASE, self.instance_id, settings.CHROMA_SYNC_LEASE_SECONDS):
+                    logger.warning("Lost the vector store sync lease, another process may start syncing too")
+                    return
+            except Exception as e:
+                logger.warning(f"Failed to renew the vector store sync lease: {e}")
+
+    def _collection_names(self) -> List[str]:
+        # Older clients return names, newer ones Collection objects
+        return [getattr(collection, "name", collection) for collection in self.client.list_collections()]
 
+    def _per_document_names(self, kind: VectorKind) -> List[str]:
+        """Per-document collections of a kind; a shared collection may share the prefix (e.g. "resume_chunks")."""
+        shared = {RESUMES.collection, JOB_DESCRIPTIONS.collection}
+        return [name for name in self._collection_names() if name.startswith(kind.prefix) and name not in shared]
+
+    def _get_collection(self, name: str):
+        try:
+            return self.client.get_collection(name=name)
+        except (ValueError, NotFoundError):
+            return None
+
+    def _collection_for(self, kind: VectorKind, document_id: str):
+        """Collection holding a document's chunks, or None if nothing was stored for it."""
+        if self.layout == SHARED:
+            return self._get_collection(kind.collection)
+        return self._get_collection(f"{kind.prefix}{document_id}")
+
+    def _write(self, kind: VectorKind, document_id: str, documents: List[str], metadatas: List[Dict], ids: List[str]) -> str:
+        """
+        Incrementally re-index a document: chunk IDs are deterministic, so only chunks
+        whose ID is new get embedded and only those that disappeared get deleted.
+        Shared layout: chunks are tagged with the document ID in the kind's collection.
+        Per-document layout: a dedicated collection. Returns the collection name.
+        """
+        if self.layout == SHARED:
+            collection = self.client.get_or_create_collection(name=kind.collection)
+            metadatas = [{**metadata, kind.id_key: document_id} for metadata in metadatas]
+            stored = collection.get(where={kind.id_key: document_id}, include=[])["ids"]
+        else:
+            collection = self.client.get_or_create_collection(name=f"{kind.prefix}{document_id}")
+            stored = collection.get(include=[])["ids"]
+
+        # Chunk IDs must be unique per collection; repeated identical chunks get a counter
+        seen: Dict[str, int] = {}
+        unique_ids = []
+        for chunk in ids:
+            seen[chunk] = seen.get(chunk, 0) + 1
+            unique_ids.append(f"{document_id}:{chunk}" + (f"#{seen[chunk]}" if seen[chunk] > 1 else ""))
+
+        stored_ids = set(stored)
+        new = [index for index, chunk in enumerate(unique_ids) if chunk not in stored_ids]
+        removed = sorted(stored_ids - set(unique_ids))
+        if removed:
+            collection.delete(ids=removed)
+        if new:
+            collection.upsert(
+                ids=[unique_ids[index] for index in new],
+                documents=[documents[index] for index in new],
+                metadatas=[metadatas[index] for index in new],
+                embeddings=self.embedder.embed([documents[index] for index in new]),
+            )
+
+        with self._counter_lock:
+            if new or removed:
+                self.version += 1
+            self.chunks_embedded += len(new)
+            self.chunks_deleted += len(removed)
+            self.chunks_unchanged += len(unique_ids) - len(new)
+        logger.debug(f"Re-indexed {kind.prefix}{document_id}: {len(new)} new, {len(removed)} removed, {len(unique_ids) - len(new)} unchanged")
+        return collection.name
+
+    def _query(self, kind: VectorKind, document_id: str, queries: List[str], top_k: int) -> List[Dict]:
+        collection = self._collection_for(kind, document_id)
+        if collection is None:
+            # Nothing stored yet, or the ID is wrong
+            return []
+        where = {kind.id_key: document_id} if self.layout == SHARED else None
         results = collection.query(
-            query_texts=queries, 
-            n_results=top_k, 
+            query_embeddings=self.embedder.embed(queries),
+            n_results=top_k,
+            where=where,
             include=['documents', 'metadatas', 'distances']
         )
-        
-        resume_parts = []
+
+        parts = []
         # results['documents'] is a list of lists (one list per query in 'queries')
         for doc, meta, score in zip(results.get('documents', []), results.get('metadatas', []), results.get('distances', [])):
-            resume_parts.append({"document": doc, "metadata": meta, "score": score})
-            
-        return resume_parts
+            parts.append({"document": doc, "metadata": meta, "score": score})
+        return parts
 
-    def query_job_description(self, jd_id: str, queries: List[str], top_k: int = 10) -> List[Dict]:
+    def _indexed_ids(self, kind: VectorKind) -> Set[str]:
+        """IDs of the documents that have chunks in the store."""
+        if self.layout != SHARED:
+            return {name[len(kind.prefix):] for name in self._per_document_names(kind)}
+        collection = self._get_collection(kind.collection)
+        if collection is None:
+            return set()
+        indexed, offset = set(), 0
+        while True:
+            page = collection.get(include=["metadatas"], limit=SCAN_PAGE_SIZE, offset=offset)
+            indexed.update(metadata[kind.id_key] for metadata in page["metadatas"] if metadata and kind.id_key in metadata)
+            if len(page["ids"]) < SCAN_PAGE_SIZE:
+                return indexed
+            offset += SCAN_PAGE_SIZE
+
+    def _remove(self, kind: VectorKind, document_ids: Set[str]):
+        if not document_ids:
+            return
+        if self.layout != SHARED:
+            for document_id in document_ids:
+                self._delete_collection(f"{kind.prefix}{document_id}")
+        else:
+            collection = self._get_collection(kind.collection)
+            if collection is not None:
+                collection.delete(where={kind.id_key: {"$in": sorted(document_ids)}})
+        # After the change, so an index rebuilt in between never records the new version with old data
+        with self._counter_lock:
+            self.version += 1
+
+    def migrate_to_shared_layout(self) -> int:
+        """
+        Move chunks from per-document collections (resume_{id}, job_description_{id})
+        into the shared collections, reusing the stored embeddings so nothing is
+        re-embedded, then drop the old collections. Returns how many were migrated.
+        """
+        migrated = 0
+        for kind in (RESUMES, JOB_DESCRIPTIONS):
+            legacy = self._per_document_names(kind)
+            if not legacy:
+                continue
+            shared = self.client.get_or_create_collection(name=kind.collection)
+            for name in legacy:
+                document_id = name[len(kind.prefix):]
+                old = self.client.get_collection(name=name)
+                chunks = old.get(include=["documents", "metadatas", "embeddings"])
+                if chunks["ids"]:
+                    shared.delete(where={kind.id_key: document_id})
+                    shared.add(
+                        ids=[f"{document_id}:{chunk_id}" for chunk_id in chunks["ids"]],
+                        documents=chunks["documents"],
+                        metadatas=[{**(metadata or {}), kind.id_key: document_id} for metadata in chunks["metadatas"]],
+                        embeddings=chunks["embeddings"],
+                    )
+                self._delete_collection(name)
+                migrated += 1
+            logger.info(f"Migrated {len(legacy)} per-document collection(s) into {kind.collection}")
+        return migrated
+
+    async def sync_index(self) -> Dict[str, Any]:
         """
-        Query a specific job description collection for relevant information.
+        Index-consistency check: embed only the Mongo documents that have no
+        chunks in the store and drop chunks whose document is gone. In the
+        shared layout, per-document collections are migrated first.
+        Returns what was done.
         """
-        collection_name = f"job_description_{jd_id}"
+        started = time.perf_counter()
+        migrated = await self.run(self.migrate_to_shared_layout) if self.layout == SHARED else 0
+        resume_ids = await self.resume_repository.get_all_resume_ids()
+        jd_ids = await self.jd_repository.get_structured_job_description_ids()
+
+        documents = already_indexed = embedded = failed = orphans_removed = 0
+        for kind, ids, store in ((RESUMES, resume_ids, self.store_resume), (JOB_DESCRIPTIONS, jd_ids, self.store_job_description)):
+            indexed = await self.run(self._indexed_ids, kind)
+            documents += len(ids)
+            for document_id in ids:
+                if document_id in indexed:
+                    already_indexed += 1
+                    continue
+                try:
+                    await store(document_id)
+                    embedded += 1
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Failed to embed {kind.prefix}{document_id}: {e}")
+            orphans = indexed - set(ids)
+            await self.run(self._remove, kind, orphans)
+            orphans_removed += len(orphans)
+
+        self.last_sync = {
+            "documents": documents,
+            "already_indexed": already_indexed,
+            "embedded": embedded,
+            "failed": failed,
+            "orphans_removed": orphans_removed,
+            "migrated_collections": migrated,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        logger.info(f"Vector store sync: {self.last_sync}")
+        return self.last_sync
+
+    def _delete_collection(self, name: str):
         try:
-            collection = self.client.get_collection(name=collection_name)
-        except ValueError:
+            self.client.delete_collection(name=name)
+        except (ValueError, NotFoundError):
+            pass # Collection didn't exist
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": settings.CHROMA_MODE,
+            "layout": self.layout,
+            "syncing": bool(self._sync_task and not self._sync_task.done()),
+            "last_sync": self.last_sync,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_deleted": self.chunks_deleted,
+            "chunks_unchanged": self.chunks_unchanged,
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "indexing": len(self._index_tasks),
+            "indexed_on_save": self.indexed_on_save,
+        }
+
+    def query_resume(self, resume_id: str, queries: List[str], top_k: int = 4) -> List[Dict]:
+        """
+        Query one resume's chunks for relevant information.
+        resume_id: The resume to search; in the shared layout a metadata filter,
+                   otherwise the resume's own collection (e.g. resume_123).
+        Blocking; async code should use query_resume_async or query_many.
+        """
+        return self._query(RESUMES, resume_id, queries, top_k)
+
+    def query_job_description(self, jd_id: str, queries: List[str], top_k: int = 10) -> List[Dict]:
+        """
+        Query one job description's chunks for relevant information.
+        Blocking; async code should use query_job_description_async or query_many.
+        """
+        return self._query(JOB_DESCRIPTIONS, jd_id, queries, top_k)
+
+    def search_resumes(self, queries: List[str], top_k: int = 10, where: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        """
+        Search chunks across every stored resume (shared layout only).
+        Each hit's metadata carries its resume_id.
+        """
+        if self.layout != SHARED:
+            raise ValueError("Cross-resume search needs CHROMA_LAYOUT=shared")
+        collection = self._get_collection(RESUMES.collection)
+        if collection is None:
             return []
+        results = collection.query(query_embeddings=self.embedder.embed(queries), n_results=top_k, where=where, include=['documents', 'metadatas', 'distances'])
+        return [
+            {"document": doc, "metadata": meta, "score": score}
+            for doc, meta, score in zip(results.get('documents', []), results.get('metadatas', []), results.get('distances', []))
+        ]
 
-        results = collection.query(
-            query_texts=queries, 
-            n_results=top_k, 
-            include=['documents', 'metadatas', 'distances']
+    def resume_store_size(self) -> int:
+        """
+        Stored resume chunks (resume collections in the per-document layout). Cheap, and
+        changes whenever any process adds or removes resumes. Blocking.
+        """
+        if self.layout == SHARED:
+            collection = self._get_collection(RESUMES.collection)
+            return collection.count() if collection is not None else 0
+        return len(self._per_document_names(RESUMES))
+
+    def resume_embeddings(self) -> Tuple[List[str], np.ndarray]:
+        """
+        Every stored resume chunk's embedding as a float32 matrix, with the owning
+        resume ID per row. Reads the stored vectors; nothing is re-embedded. Blocking.
+        """
+        resume_ids: List[str] = []
+        pages: List[np.ndarray] = []
+
+        def add(page: Dict[str, Any], resume_id: Optional[str] = None):
+            if page["ids"]:
+                pages.append(np.asarray(page["embeddings"], dtype=np.float32))
+                resume_ids.extend(resume_id or metadata[RESUMES.id_key] for metadata in page["metadatas"])
+
+        if self.layout == SHARED:
+            collection = self._get_collection(RESUMES.collection)
+            offset = 0
+            while collection is not None:
+                page = collection.get(include=["embeddings", "metadatas"], limit=SCAN_PAGE_SIZE, offset=offset)
+                add(page)
+                if len(page["ids"]) < SCAN_PAGE_SIZE:
+                    break
+                offset += SCAN_PAGE_SIZE
+        else:
+            for name in self._per_document_names(RESUMES):
+                add(self.client.get_collection(name=name).get(include=["embeddings", "metadatas"]), name[len(RESUMES.prefix):])
+        return resume_ids, (np.concatenate(pages) if pages else np.zeros((0, 0), dtype=np.float32))
+
+    def job_description_chunks(self, structured_data: JobDescriptionData) -> Tuple[List[str], List[Dict], List[str]]:
+        """The documents, metadatas and ids a job description is stored as."""
+        return self._process_jd_for_chroma(structured_data.model_dump())
+
+    async def embed_async(self, texts: List[str]) -> List[np.ndarray]:
+        return await self.run(self.embedder.embed, texts)
+
+    async def query_resume_async(self, resume_id: str, queries: List[str], top_k: int = 4) -> List[Dict]:
+        return await self.run(self.query_resume, resume_id, queries, top_k)
+
+    async def query_job_description_async(self, jd_id: str, queries: List[str], top_k: int = 10) -> List[Dict]:
+        return await self.run(self.query_job_description, jd_id, queries, top_k)
+
+    async def search_resumes_async(self, queries: List[str], top_k: int = 10, where: Optional[Dict[str, Any]] = None) -> List[Dict]:
+        return await self.run(self.search_resumes, queries, top_k, where)
+
+    async def query_many(
+        self,
+        resume_queries: Optional[Dict[str, List[str]]] = None,
+        jd_queries: Optional[Dict[str, List[str]]] = None,
+        resume_top_k: int = 4,
+        jd_top_k: int = 10,
+    ) -> Dict[str, Dict[str, List[Dict]]]:
+        """
+        Retrieve for many resumes and job descriptions in one parallel round.
+        resume_queries / jd_queries map a document ID to its query texts.
+        Every distinct query text is embedded once, in batches, before the
+        per-document queries fan out across the executor.
+        Returns {"resumes": {resume_id: parts}, "job_descriptions": {jd_id: parts}}.
+        """
+        resume_queries = resume_queries or {}
+        jd_queries = jd_queries or {}
+        texts = list(dict.fromkeys(text for queries in (*resume_queries.values(), *jd_queries.values()) for text in queries))
+        # Warm the embedding cache so the fanned-out queries don't each run the model
+        await self.embed_async(texts)
+
+        resume_ids, jd_ids = list(resume_queries), list(jd_queries)
+        results = await asyncio.gather(
+            *[self.query_resume_async(resume_id, resume_queries[resume_id], resume_top_k) for resume_id in resume_ids],
+            *[self.query_job_description_async(jd_id, jd_queries[jd_id], jd_top_k) for jd_id in jd_ids],
         )
-        
-        jd_parts = []
-        for doc, meta, score in zip(results.get('documents', []), results.get('metadatas', []), results.get('distances', [])):
-            jd_parts.append({"document": doc, "metadata": meta, "score": score})
-            
-        return jd_parts
-    
+        return {
+            "resumes": dict(zip(resume_ids, results[:len(resume_ids)])),
+            "job_descriptions": dict(zip(jd_ids, results[len(resume_ids):])),
+        }
+
+    def index_in_background(self, resumes: Sequence[Resume] = (), job_descriptions: Sequence[JobDescription] = ()):
+        """
+        Embed freshly saved documents without holding up the request that saved them,
+        so they are searchable and matchable right away. Failures are logged; the
+        next startup sync embeds whatever is still missing.
+        """
+        resumes = [resume for resume in resumes if resume.id]
+        job_descriptions = [jd for jd in job_descriptions if jd.id and jd.structured_data]
+        if not resumes and not job_descriptions:
+            return
+        task = asyncio.create_task(self._index(resumes, job_descriptions))
+        self._index_tasks.add(task)
+        task.add_done_callback(self._index_tasks.discard)
+
+    async def _index(self, resumes: List[Resume], job_descriptions: List[JobDescription]):
+        pending = [(RESUMES, str(resume.id), self._process_resume_for_chroma, resume.content) for resume in resumes]
+        pending += [(JOB_DESCRIPTIONS, str(jd.id), self._process_jd_for_chroma, jd.structured_data) for jd in job_descriptions]
+        for kind, document_id, process, data in pending:
+            try:
+                await self.run(self._write, kind, document_id, *process(data.model_dump()))
+                self.indexed_on_save += 1
+            except Exception as e:
+                logger.error(f"Failed to index {kind.prefix}{document_id}: {e}")
+
     async def store_resume(self, resume_id: str) -> str:
         """
-        Fetches a resume, processes it, and stores it in a dedicated ChromaDB collection.
+        Fetches a resume, processes it, and stores its chunks in ChromaDB.
         Returns the collection name.
         """
         resume = await self.resume_repository.get_resume_by_id(resume_id)
         if not resume:
             raise ValueError(f"Resume with ID {resume_id} not found")
-            
-        collection_name = f"resume_{resume_id}"
-        
-        # Cleanup existing collection if it exists (for idempotency in this ephemeral/test context)
-        try:
-            self.client.delete_collection(name=collection_name)
-        except ValueError:
-            pass # Collection didn't exist
-            
-        collection = self.client.create_collection(name=collection_name)
-        
+
         documents, metadatas, ids = self._process_resume_for_chroma(resume.content.model_dump())
-        
-        if documents:
-            collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
-            
-        return collection_name
+        return await self.run(self._write, RESUMES, resume_id, documents, metadatas, ids)
 
     async def store_job_description(self, jd_id: str) -> str:
         """
-        Fetches a job description, processes its structured data, and stores it in a dedicated ChromaDB collection.
+        Fetches a job description, processes its structured data, and stores its chunks in ChromaDB.
         Returns the collection name.
         """
         jd = await self.jd_repository.get_job_description_by_id(jd_id)
         if not jd or not jd.structured_data:
             raise ValueError(f"Job Description with ID {jd_id} not found or missing structured data")
 
-        collection_name = f"job_description_{jd_id}"
-        
-        try:
-            self.client.delete_collection(name=collection_name)
-        except ValueError:
-            pass 
-            
-        collection = self.client.create_collection(name=collection_name)
-        
         documents, metadatas, ids = self._process_jd_for_chroma(jd.structured_data.model_dump())
-        
-        if documents:
-            collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids
-            )
-            
-        return collection_name
+        return await self.run(self._write, JOB_DESCRIPTIONS, jd_id, documents, metadatas, ids)
 
     def _process_jd_for_chroma(self, jd_json: dict) -> Tuple[List[str], List[Dict], List[str]]:
         """
@@ -127,7 +590,6 @@ class RagService:
         """
         documents: List[str] = []
         metadatas: List[Dict] = []
-        ids: List[str] = []
 
         # Process Responsibilities
         for responsibility in jd_json.get("responsibilities", []):
@@ -138,7 +600,6 @@ class RagService:
                 "role": jd_json.get("role") or "Unknown Role",
                 "company": jd_json.get("company") or "Unknown Company"
             })
-            ids.append(str(uuid.uuid4()))
 
         # Process Requirements
         for requirement in jd_json.get("requirements", []):
@@ -148,13 +609,11 @@ class RagService:
                 "type": "requirement",
                 "role": jd_json.get("role") or "Unknown Role",
             })
-            ids.append(str(uuid.uuid4()))
 
         # Process Summary
         if jd_json.get("summary"):
             documents.append(jd_json["summary"])
             metadatas.append({"type": "summary"})
-            ids.append("jd_summary_01")
 
         # Process Tech Stack
         tech_stack = jd_json.get("tech_stack", [])
@@ -162,15 +621,14 @@ class RagService:
             tech_summary = "Tech stack includes: " + ", ".join(tech_stack)
             documents.append(tech_summary)
             metadatas.append({"type": "tech_stack"})
-            ids.append("jd_tech_stack_01")
             
         # Process Benefits
         for benefit in jd_json.get("benefits", []):
             if not benefit: continue
             documents.append(benefit)
             metadatas.append({"type": "benefit"})
-            ids.append(str(uuid.uuid4()))
 
+        ids = [chunk_id(document, metadata) for document, metadata in zip(documents, metadatas)]
         return documents, metadatas, ids
         
     def _process_resume_for_chroma(self, resume_json: dict) -> Tuple[List[str], List[Dict], List[str]]:
@@ -179,7 +637,6 @@ class RagService:
         """
         documents: List[str] = []
         metadatas: List[Dict] = []
-        ids: List[str] = []
 
         # Process Experience
         for job in resume_json.get("experience", []):
@@ -201,7 +658,6 @@ class RagService:
                     "startDate": job.get("date") or "Unknown", # 'date' in ResumeData
                     # ResumeData doesn't strictly have endDate separate, it uses 'date' string
                 })
-                ids.append(str(uuid.uuid4()))
 
         # Process Projects
         for project in resume_json.get("projects", []):
@@ -219,7 +675,6 @@ class RagService:
                 "type": "project",
                 "name": name or "Unknown Project",
             })
-            ids.append(str(uuid.uuid4()))
 
         # Process Skills
         skill_list = resume_json.get("skills", [])
@@ -227,13 +682,11 @@ class RagService:
             skill_summary = "Key technical skills include: " + ", ".join(skill_list)
             documents.append(skill_summary)
             metadatas.append({"type": "skills_summary"})
-            ids.append("skills_summary_01")
 
         # Process Summary
         if resume_json.get("summary"):
             documents.append(resume_json["summary"])
             metadatas.append({"type": "summary"})
-            ids.append("main_summary_01")
 
         # Process Education
         for education in resume_json.get("education", []):
@@ -252,6 +705,9 @@ class RagService:
                 "degree": degree,
                 "date": date
             })
-            ids.append(str(uuid.uuid4()))
 
-        return documents, metadatas, ids
\ No newline at end of file
+        ids = [chunk_id(document, metadata) for document, metadata in zip(documents, metadatas)]
+        return documents, metadatas, ids
+
+# Global instance
+rag_service = RagService()
@@ -0,0 +1,311 @@
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from app.core.config import settings
+from app.core.hashing import normalize_text, sha256_file, sha256_text
+from app.core.uploads import PDF_MAGIC, spool_file
+from app.models.resume_data import ResumeData
+from app.models.resume_model import Resume
+from app.services.llm_scheduler import PRIORITY_BATCH
+from app.services.rag_service import rag_service
+from app.services.resume_service import ResumeService
+import asyncio
+import logging
+import os
+import time
+import zipfile
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+DUPLICATE = "duplicate"
+FAILED = "failed"
+
+_DONE = None  # Queue sentinel
+
+@dataclass
+class BatchItem:
+    filename: str
+    path: str  # Spooled PDF on disk
+    content_hash: str
+    started: float
+    raw_text: Optional[str] = None
+    text_hash: Optional[str] = None
+    resume_data: Optional[ResumeData] = None
+
+def _starts_with(path: str, magic: bytes) -> bool:
+    with open(path, "rb") as handle:
+        return handle.read(len(magic)) == magic
+
+class ExpandedTooLargeError(ValueError):
+    """Inflating the batch's archives would write more than the expanded-bytes budget."""
+
+def _extract_member(archive: zipfile.ZipFile, member: zipfile.ZipInfo, max_file_bytes: int, budget: int) -> str:
+    """
+    Inflate one archive member to a spool file, stopping at max_file_bytes (or the
+    batch's remaining expanded-bytes budget) whatever its header claims.
+    """
+    limit = min(max_file_bytes, budget)
+    with spool_file() as destination, archive.open(member) as source:
+        try:
+            # Read one byte past the limit so a lying header is caught without inflating the rest
+            while chunk := source.read(min(settings.UPLOAD_SPOOL_CHUNK_BYTES, limit + 1 - destination.tell())):
+                destination.write(chunk)
+                if destination.tell() > max_file_bytes:
+                    raise ValueError(f"File exceeds {max_file_bytes} bytes")
+                if destination.tell() > budget:
+                    raise ExpandedTooLargeError("Batch archives expand to too many bytes")
+        except BaseException:
+            destination.close()
+            os.unlink(destination.name)
+            raise
+    return destination.name
+
+def expand_uploads(files: Iterable[Tuple[str, str]], max_files: int, max_file_bytes: int, max_expanded_bytes: int) -> Tuple[List[Tuple[str, str]], List[Dict[str, Any]], List[str]]:
+    """
+    Flatten spooled uploads (filename, path) into (filename, pdf path), inflating zip
+    archive members into spool files one at a time. At most max_expanded_bytes are
+    inflated in total; once that is exceeded every remaining member is rejected.
+    Returns the PDFs, a result line for every file that was rejected, and the spool
+    files created here, which the caller must delete. Runs off the event loop.
+    """
+    pdfs: List[Tuple[str, str]] = []
+    rejected: List[Dict[str, Any]] = []
+    created: List[str] = []
+    expanded = 0
+    exhausted = False
+
+    def reject(filename: str, error: str):
+        rejected.append({"filename": filename, "status": FAILED, "error": error})
+
+    for filename, path in files:
+        if zipfile.is_zipfile(path):
+            try:
+                with zipfile.ZipFile(path) as archive:
+                    for member in archive.infolist():
+                        name = member.filename
+                        if member.is_dir() or not name.lower().endswith(".pdf") or name.startswith("__MACOSX/"):
+                            continue
+                        # Check the declared size and the file limit before inflating anything
+                        if member.file_size > max_file_bytes:
+                            reject(f"{filename}/{name}", f"File exceeds {max_file_bytes} bytes")
+                        elif len(pdfs) >= max_files:
+                            reject(f"{filename}/{name}", f"Batch is limited to {max_files} files")
+                        elif exhausted or member.file_size > max_expanded_bytes - expanded:
+                            exhausted = True
+                            reject(f"{filename}/{name}", f"Batch archives expand to more than {max_expanded_bytes} bytes")
+                        else:
+                            try:
+                                member_path = _extract_member(archive, member, max_file_bytes, max_expanded_bytes - expanded)
+                            except ExpandedTooLargeError:
+                                # The header lied; don't spend the rest of the batch inflating more of it
+                                exhausted = True
+                                reject(f"{filename}/{name}", f"Batch archives expand to more than {max_expanded_bytes} bytes")
+                                continue
+                            except ValueError as e:
+                                reject(f"{filename}/{name}", str(e))
+                                continue
+                            expanded += os.path.getsize(member_path)
+                            created.append(member_path)
+                            pdfs.append((f"{filename}/{name}", member_path))
+            except (zipfile.BadZipFile, OSError) as e:
+                reject(filename, f"Unreadable zip archive: {e}")
+        elif _starts_with(path, PDF_MAGIC):
+            if len(pdfs) >= max_files:
+                reject(filename, f"Batch is limited to {max_files} files")
+            elif os.path.getsize(path) > max_file_bytes:
+                reject(filename, f"File exceeds {max_file_bytes} bytes")
+            else:
+                pdfs.append((filename, path))
+        else:
+            reject(filename, "Only PDF files and zip archives of PDFs are supported")
+    return pdfs, rejected, created
+
+def _remove_all(paths: List[str]):
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+class ResumeBatchService:
+    """
+    Runs many resume uploads as a pipeline of overlapping stages connected by
+    bounded queues: dedupe + PDF text extraction (process pool), structured
+    extraction (bounded LLM concurrency, batch priority) and bulk inserts.
+    Every stage works on a different file at the same time, so a batch takes
+    about as long as its slowest stage rather than the sum of them.
+    """
+
+    def __init__(
+        self,
+        resume_service: ResumeService,
+        pdf_concurrency: Optional[int] = None,
+        llm_concurrency: Optional[int] = None,
+        insert_size: Optional[int] = None,
+        insert_max_wait: Optional[float] = None,
+    ):
+        self.resume_service = resume_service
+        self.pdf_service = resume_service.pdf_service
+        self.repository = resume_service.resume_repository
+        self.pdf_concurrency = pdf_concurrency or settings.BATCH_PDF_CONCURRENCY or self.pdf_service.max_workers or os.cpu_count() or 1
+        self.llm_concurrency = llm_concurrency or settings.BATCH_LLM_CONCURRENCY
+        self.insert_size = insert_size or settings.BATCH_INSERT_SIZE
+        self.insert_max_wait = insert_max_wait or settings.BATCH_INSERT_MAX_WAIT_SECONDS
+
+    async def process(self, files: List[Tuple[str, str]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Process spooled (filename, path) uploads, yielding one result per PDF as soon as
+        it is done, in completion order, then a summary. The uploads stay the caller's
+        to delete; files inflated from archives are deleted here.
+        """
+        started = time.perf_counter()
+        pdfs, rejected, created = await asyncio.to_thread(expand_uploads, files, settings.BATCH_MAX_FILES, settings.BATCH_MAX_FILE_BYTES, settings.BATCH_MAX_EXPANDED_BYTES)
+        try:
+            async for result in self._process(pdfs, rejected, started):
+                yield result
+        finally:
+            await asyncio.to_thread(_remove_all, created)
+
+    async def _process(self, pdfs: List[Tuple[str, str]], rejected: List[Dict[str, Any]], started: float) -> AsyncIterator[Dict[str, Any]]:
+        counts = {CREATED: 0, DUPLICATE: 0, FAILED: 0}
+        for result in rejected:
+            counts[FAILED] += 1
+            yield result
+
+        # Identical files in one batch go through the pipeline once
+        hashes = await asyncio.to_thread(lambda: [sha256_file(path) for _, path in pdfs])
+        leaders: Dict[str, BatchItem] = {}
+        followers: Dict[str, List[str]] = {}
+        for (filename, path), content_hash in zip(pdfs, hashes):
+            if content_hash in leaders:
+                followers.setdefault(content_hash, []).append(filename)
+            else:
+                leaders[content_hash] = BatchItem(filename, path, content_hash, time.perf_counter())
+
+        results: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+        def emit(item: BatchItem, status: str, resume_id: Optional[str] = None, error: Optional[str] = None):
+            seconds = round(time.perf_counter() - item.started, 3)
+            results.put_nowait({"filename": item.filename, "status": status, "resume_id": resume_id, "error": error, "seconds": seconds})
+            # Copies in the same batch share the first copy's outcome
+            for filename in followers.get(item.content_hash, []):
+                results.put_nowait({
+                    "filename": filename, "status": DUPLICATE if status != FAILED else FAILED,
+                    "resume_id": resume_id, "error": error, "seconds": seconds,
+                })
+
+        async def run_pipeline():
+            try:
+                await self._run_pipeline(list(leaders.values()), emit)
+            finally:
+                # Every result is emitted before this, so the reader stops right after the last one
+                results.put_nowait(_DONE)
+
+        pipeline = asyncio.create_task(run_pipeline())
+        try:
+            while (result := await results.get()) is not _DONE:
+                counts[result["status"]] += 1
+                yield result
+            # Surface an unexpected pipeline error instead of a short stream
+            await pipeline
+        finally:
+            # Client went away mid-stream: stop feeding the pipeline
+            if not pipeline.done():
+                pipeline.cancel()
+
+        elapsed = time.perf_counter() - started
+        logger.info(f"Resume batch: {len(pdfs) + len(rejected)} file(s) in {elapsed:.3f}s {counts}")
+        yield {"done": True, "total": len(pdfs) + len(rejected), **counts, "seconds": round(elapsed, 3)}
+
+    async def _run_pipeline(self, items: List[BatchItem], emit):
+        # Bounded so PDF parsing can't run arbitrarily far ahead of the LLM stage
+        text_queue: asyncio.Queue = asyncio.Queue(maxsize=self.llm_concurrency * 2)
+        insert_queue: asyncio.Queue = asyncio.Queue(maxsize=self.insert_size * 2)
+        pending = iter(items)
+
+        async def pdf_worker():
+            for item in pending:
+                await self._parse(item, text_queue, insert_queue, emit)
+
+        async def llm_worker():
+            while (item := await text_queue.get()) is not _DONE:
+                try:
+                    item.resume_data = await self.resume_service.extract_structured_data(item.raw_text, priority=PRIORITY_BATCH)
+                except Exception as e:
+                    logger.error(f"Batch extraction failed for {item.filename}: {e}")
+                    emit(item, FAILED, error=f"LLM Extraction failed: {e}")
+                    continue
+                await insert_queue.put(item)
+
+        async def run_stage(workers: int, worker, downstream: asyncio.Queue, downstream_workers: int):
+            await asyncio.gather(*[worker() for _ in range(workers)])
+            for _ in range(downstream_workers):
+                await downstream.put(_DONE)
+
+        await asyncio.gather(
+            run_stage(min(self.pdf_concurrency, max(len(items), 1)), pdf_worker, text_queue, self.llm_concurrency),
+            run_stage(self.llm_concurrency, llm_worker, insert_queue, 1),
+            self._insert_worker(insert_queue, emit),
+        )
+
+    async def _parse(self, item: BatchItem, text_queue: asyncio.Queue, insert_queue: asyncio.Queue, emit):
+        """Dedupe stage plus PDF text extraction; hands the item to the LLM or straight to insert."""
+        try:
+            existing = await self.repository.get_resume_by_content_hash(item.content_hash)
+            if existing:
+                emit(item, DUPLICATE, resume_id=str(existing.id))
+                return
+            item.raw_text = await self.pdf_service.extract_text_from_pdf_async(item.path)
+            # No text (scanned PDF) means nothing to dedupe on; only the byte hash applies
+            item.text_hash = sha256_text(item.raw_text) if normalize_text(item.raw_text) else None
+            same_text = await self.repository.get_resume_by_text_hash(item.text_hash) if item.text_hash else None
+        except Exception as e:
+            logger.error(f"Batch parsing failed for {item.filename}: {e}")
+            emit(item, FAILED, error=str(e))
+            return
+        if same_text:
+            item.resume_data = same_text.content
+            await insert_queue.put(item)
+        else:
+            await text_queue.put(item)
+
+    async def _insert_worker(self, insert_queue: asyncio.Queue, emit):
+        """Collect parsed resumes into batches of up to insert_size, flushing early after insert_max_wait."""
+        finished = False
+        while not finished:
+            item = await insert_queue.get()
+            if item is _DONE:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.insert_max_wait
+            while len(batch) < self.insert_size:
+                try:
+                    item = await asyncio.wait_for(insert_queue.get(), timeout=max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    break
+                if item is _DONE:
+                    finished = True
+                    break
+                batch.append(item)
+            await self._insert(batch, emit)
+
+    async def _insert(self, batch: List[BatchItem], emit):
+        resumes = [
+            Resume(content=item.resume_data, original_text=item.raw_text, content_hash=item.content_hash, text_hash=item.text_hash)
+            for item in batch
+        ]
+        try:
+            duplicates = set(await self.repository.create_resumes(resumes))
+        except Exception as e:
+            logger.error(f"Batch insert of {len(batch)} resume(s) failed: {e}")
+            for item in batch:
+                emit(item, FAILED, error=str(e))
+            return
+        rag_service.index_in_background(resumes=[resume for index, resume in enumerate(resumes) if index not in duplicates])
+        for index, (item, resume) in enumerate(zip(batch, resumes)):
+            if index not in duplicates:
+                emit(item, CREATED, resume_id=str(resume.id))
+                continue
+            # A concurrent upload of the same file won the insert
+            existing = await self.repository.get_resume_by_content_hash(item.content_hash)
+            emit(item, DUPLICATE, resume_id=str(existing.id) if existing else None)
@@ -0,0 +1,248 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.models.resume_data import ResumeData
+from app.services.text_preprocessor import text_preprocessor, PAGE_BREAK
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+PREAMBLE = "preamble"
+
+# Canonical section name -> headings that introduce it
+SECTION_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "summary": ("summary", "professional summary", "profile", "about me", "objective", "career objective"),
+    "experience": ("experience", "work experience", "professional experience", "employment", "employment history", "work history", "career history"),
+    "education": ("education", "academic background", "education and training", "academics"),
+    "skills": ("skills", "technical skills", "core skills", "key skills", "skills & tools", "skills and tools", "technologies", "core competencies", "competencies"),
+    "projects": ("projects", "personal projects", "selected projects", "side projects"),
+    "certifications": ("certifications", "certificates", "licenses & certifications", "licenses and certifications"),
+    "other": ("awards", "honors", "publications", "languages", "interests", "hobbies", "volunteering", "volunteer experience", "references"),
+}
+_HEADING_LOOKUP = {alias: name for name, aliases in SECTION_ALIASES.items() for alias in aliases}
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_RE = re.compile(r"(?<![\w/])\+?\d[\d\s().-]{7,}\d(?![\w/])")
+URL_RE = re.compile(r"(?:https?://|www\.)[^\s,;|]+|\b(?:linkedin\.com|github\.com|gitlab\.com)/[^\s,;|]+", re.IGNORECASE)
+YEAR_RANGE_RE = re.compile(
+    r"((?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+)?(19|20)\d{2}"
+    r"(\s*(?:-|–|—|to)\s*(((?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+)?(19|20)\d{2}|present|current|now))?",
+    re.IGNORECASE,
+)
+INSTITUTION_RE = re.compile(r"\b(university|college|institute|school|academy|polytechnic|universit[éäa]t?)\b", re.IGNORECASE)
+DEGREE_RE = re.compile(
+    r"\b(bachelor|master|doctor|ph\.?\s?d|mba|associate|diploma|certificate|"
+    r"b\.?\s?s\.?c?|m\.?\s?s\.?c?|b\.?\s?a\.?|m\.?\s?a\.?|b\.?\s?eng|m\.?\s?eng|b\.?\s?tech|m\.?\s?tech)\b",
+    re.IGNORECASE,
+)
+SKILL_SPLIT_RE = re.compile(r"\s*(?:,|;|\||•|·|▪|●)\s*")
+SKILL_LABEL_RE = re.compile(r"^[A-Za-z &/]{2,30}:\s*")
+BULLET_RE = re.compile(r"^[-*•·▪●]\s*")
+# Labels that may sit next to contact details in the preamble
+CONTACT_LABEL_RE = re.compile(r"\b(e-?mail|phone|tel|mobile|cell|linkedin|github|gitlab|website|web|portfolio|[epmtw])\b\s*:?", re.IGNORECASE)
+# Lines at the top of a resume that are not a person's name: document titles and job-title vocabulary
+DOCUMENT_TITLES = {"resume", "résumé", "cv", "curriculum vitae", "curriculum vitæ"}
+NON_NAME_WORDS = {
+    "resume", "résumé", "cv", "curriculum", "vitae", "profile", "portfolio",
+    "senior", "junior", "lead", "principal", "staff", "chief", "head", "intern",
+    "software", "engineer", "engineering", "developer", "development", "manager", "management",
+    "designer", "analyst", "scientist", "consultant", "architect", "director", "specialist",
+    "administrator", "officer", "coordinator", "assistant", "associate", "full-stack", "fullstack",
+    "frontend", "front-end", "backend", "back-end", "data", "product", "project", "devops",
+}
+
+@dataclass
+class HeuristicResult:
+    """Fields filled by rules, how much to trust each, and the sections still needing the LLM."""
+    fields: Dict[str, Any] = field(default_factory=dict)
+    confidence: Dict[str, float] = field(default_factory=dict)
+    sections: Dict[str, str] = field(default_factory=dict)
+    handled_sections: List[str] = field(default_factory=list)
+    # The preamble holds nothing but the name and contact details the rules extracted
+    contact_only_preamble: bool = False
+
+    def confident(self, name: str, threshold: float) -> bool:
+        return self.confidence.get(name, 0.0) >= threshold
+
+    def llm_input(self) -> str:
+        """Preamble (name/contact, for context) plus every section the rules did not cover."""
+        parts = [body for name, body in self.sections.items() if name not in self.handled_sections and body.strip()]
+        return "\n\n".join(parts)
+
+    def remaining_sections(self) -> List[str]:
+        """
+        Sections the rules did not cover. The preamble counts unless it is contact-only:
+        when no heading is recognised, the whole resume sits in it.
+        """
+        return [
+            name for name, body in self.sections.items()
+            if name not in self.handled_sections and body.strip() and not (name == PREAMBLE and self.contact_only_preamble)
+        ]
+
+class ResumeHeuristicParser:
+    """
+    Rule-based segmenter and field extractor for resume text.
+    Fills contact info, skills and education deterministically and reports a
+    confidence per field so callers can shrink or skip the LLM call.
+    """
+
+    def __init__(self, min_confidence: Optional[float] = None):
+        self.min_confidence = min_confidence if min_confidence is not None else settings.RESUME_HEURISTIC_MIN_CONFIDENCE
+
+    def segment(self, text: str) -> Dict[str, str]:
+        """Split resume text into canonical sections; text before the first heading is the preamble."""
+        sections: Dict[str, List[str]] = {PREAMBLE: []}
+        current = PREAMBLE
+        for line in text.split("\n"):
+            heading = line.strip().rstrip(":").strip().lower()
+            name = _HEADING_LOOKUP.get(heading) if len(heading) <= 40 else None
+            if name:
+                current = name
+                sections.setdefault(current, [])
+            sections[current].append(line)
+        return {name: "\n".join(lines).strip() for name, lines in sections.items()}
+
+    def _parse_contact(self, preamble: str, result: HeuristicResult):
+        emails = list(dict.fromkeys(EMAIL_RE.findall(preamble)))
+        phones = [phone.strip() for phone in PHONE_RE.findall(preamble) if len(re.sub(r"\D", "", phone)) >= 10]
+        urls = [url.rstrip(".") for url in URL_RE.findall(preamble) if "@" not in url]
+
+        contact = {
+            "email": emails[0] if emails else None,
+            "phone": phones[0] if phones else None,
+            "website": urls[0] if urls else None,
+            "location": None,
+        }
+        result.fields["contact"] = contact
+        # Location is free text; leave it to the LLM, but the other three are unambiguous when unique
+        found = [value for key, value in contact.items() if key != "location" and value]
+        ambiguous = len(emails) > 1 or len(phones) > 1
+        result.confidence["contact"] = 0.0 if not found else (0.6 if ambiguous else 0.9)
+
+        lines = preamble.split("\n")
+        name_line = None
+        for index, line in enumerate(lines):
+            candidate = line.strip()
+            if not candidate or candidate.lower().strip(" :") in DOCUMENT_TITLES:
+                continue
+            if self._looks_like_name(candidate):
+                name_line = index
+                result.fields["full_name"] = candidate.title() if candidate.isupper() else candidate
+                result.confidence["full_name"] = 0.9
+            break
+
+        # Anything besides the name, contact details and their labels is prose only the LLM can place
+        leftover = [
+            CONTACT_LABEL_RE.sub("", URL_RE.sub("", PHONE_RE.sub("", EMAIL_RE.sub("", line))))
+            for index, line in enumerate(lines)
+            if index != name_line and line.strip().lower().strip(" :") not in DOCUMENT_TITLES
+        ]
+        result.contact_only_preamble = not any(ch.isalnum() for line in leftover for ch in line)
+
+    @staticmethod
+    def _looks_like_name(candidate: str) -> bool:
+        words = candidate.split()
+        return (
+            2 <= len(words) <= 4
+            and not any(ch.isdigit() for ch in candidate)
+            and "@" not in candidate
+            and all(word[:1].isupper() for word in words)
+            and candidate.lower().rstrip(":") not in _HEADING_LOOKUP
+            and not any(word.lower().strip(",.") in NON_NAME_WORDS for word in words)
+        )
+
+    def _parse_skills(self, body: str, result: HeuristicResult):
+        skills: List[str] = []
+        for line in body.split("\n")[1:]:  # first line is the heading
+            line = SKILL_LABEL_RE.sub("", BULLET_RE.sub("", line.strip()))
+            for item in SKILL_SPLIT_RE.split(line):
+                item = item.strip(" .-")
+                if item and len(item) <= 40 and item.lower() not in (skill.lower() for skill in skills):
+                    skills.append(item)
+        result.fields["skills"] = skills
+        result.confidence["skills"] = 0.9 if len(skills) >= 3 else 0.4
+
+    def _parse_education(self, body: str, result: HeuristicResult):
+        entries: List[Dict[str, Optional[str]]] = []
+        unmatched = 0
+        for line in body.split("\n")[1:]:
+            line = BULLET_RE.sub("", line.strip())
+            if not line:
+                continue
+            date_match = YEAR_RANGE_RE.search(line)
+            date = date_match.group(0).strip() if date_match else None
+            residual = YEAR_RANGE_RE.sub("", line).strip(" ,|-–—()")
+            if INSTITUTION_RE.search(line):
+                # An institution line after a degree-only line completes that entry
+                if entries and not entries[-1]["institution"]:
+                    entries[-1]["institution"] = residual
+                    entries[-1]["date"] = entries[-1]["date"] or date
+                else:
+                    entries.append({"institution": residual, "degree": None, "date": date})
+            elif DEGREE_RE.search(line):
+                if entries and not entries[-1]["degree"]:
+                    entries[-1]["degree"] = residual
+                    entries[-1]["date"] = entries[-1]["date"] or date
+                else:
+                    entries.append({"institution": None, "degree": residual, "date": date})
+            elif date and entries and not entries[-1]["date"]:
+                entries[-1]["date"] = date
+            else:
+                unmatched += 1
+
+        complete = [entry for entry in entries if entry["institution"]]
+        result.fields["education"] = complete
+        if not complete:
+            result.confidence["education"] = 0.0
+        elif len(complete) == len(entries) and unmatched == 0:
+            result.confidence["education"] = 0.9
+        else:
+            result.confidence["education"] = 0.5
+
+    def parse(self, text: str) -> HeuristicResult:
+        text = text_preprocessor.normalize(text).replace(PAGE_BREAK, "\n")
+        result = HeuristicResult(sections=self.segment(text))
+
+        self._parse_contact(result.sections.get(PREAMBLE, ""), result)
+        if "skills" in result.sections:
+            self._parse_skills(result.sections["skills"], result)
+            if result.confident("skills", self.min_confidence):
+                result.handled_sections.append("skills")
+        if "education" in result.sections:
+            self._parse_education(result.sections["education"], result)
+            if result.confident("education", self.min_confidence):
+                result.handled_sections.append("education")
+
+        logger.info(
+            f"Resume heuristics: confidence {result.confidence}, "
+            f"handled {result.handled_sections}, LLM still needed for {result.remaining_sections()}"
+        )
+        return result
+
+    def can_skip_llm(self, result: HeuristicResult) -> bool:
+        """True when every section was handled by rules and the name was found."""
+        return not result.remaining_sections() and result.confident("full_name", self.min_confidence)
+
+    def apply(self, result: HeuristicResult, resume_data: Optional[ResumeData] = None) -> ResumeData:
+        """
+        Overlay confident heuristic fields on the LLM output (or build the
+        resume from heuristics alone when there is no LLM output). The name
+        only fills a gap: the LLM reads the whole preamble and knows better.
+        """
+        merged = resume_data.model_dump() if resume_data else {"full_name": result.fields.get("full_name", "")}
+        if not merged.get("full_name") and result.confident("full_name", self.min_confidence):
+            merged["full_name"] = result.fields["full_name"]
+        for name in ("skills", "education"):
+            if name in result.fields and result.confident(name, self.min_confidence):
+                merged[name] = result.fields[name]
+        if result.confident("contact", self.min_confidence):
+            contact = merged.get("contact") or {}
+            for key, value in result.fields["contact"].items():
+                if value:
+                    contact[key] = value
+            merged["contact"] = contact
+        return ResumeData.model_validate(merged)
+
+# Global instance
+resume_heuristic_parser = ResumeHeuristicParser()
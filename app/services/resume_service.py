@@ -1,41 +1,107 @@
-from app.services.pdf_service import PdfService
+from app.services.pdf_service import pdf_service, PdfSource
 from app.services.llm_extraction_service import LLMExtractionService
 from app.models.resume_model import Resume
+from app.models.resume_data import ResumeData
+from app.services.resume_heuristics import resume_heuristic_parser
+from app.services.rag_service import rag_service
+from app.services.llm_scheduler import LLMUnavailableError, PRIORITY_INTERACTIVE
+from app.core.config import settings
+from app.core.hashing import normalize_text, sha256_bytes, sha256_file, sha256_text
+from app.core.stages import stage
 from fastapi import UploadFile
+from typing import Optional
+from pymongo.errors import DuplicateKeyError
+import logging
 
 from app.repositories.resume_repository import ResumeRepository
 
+logger = logging.getLogger(__name__)
+
 class ResumeService:
-    def __init__(self):
-        self.pdf_service = PdfService()
-        self.llm_service = LLMExtractionService()
+    def __init__(self, llm_service: Optional[LLMExtractionService] = None):
+        self.pdf_service = pdf_service
+        self.llm_service = llm_service or LLMExtractionService()
         self.resume_repository = ResumeRepository()
+        self.heuristic_parser = resume_heuristic_parser
 
-    
-
-    async def extract_and_save_resume(self, file_content: bytes) -> Resume:
+    async def extract_structured_data(self, raw_text: str, priority: int = PRIORITY_INTERACTIVE) -> ResumeData:
         """
-        Orchestrates the resume extraction process:
-        1. Extract text from PDF
-        2. Extract structured data using LLM
-        3. Save to database
+        Fill contact info, skills and education with the rule-based parser, send
+        only the remaining sections to the LLM and skip it when nothing is left.
         """
-        # 1. Extract text
-        raw_text = self.pdf_service.extract_text_from_pdf(file_content)
-        
-        # 2. Extract structured data
+        if not settings.RESUME_HEURISTICS_ENABLED:
+            llm_input, heuristics = raw_text, None
+        else:
+            heuristics = self.heuristic_parser.parse(raw_text)
+            if self.heuristic_parser.can_skip_llm(heuristics):
+                logger.info("Resume fully covered by heuristics, skipping LLM")
+                return self.heuristic_parser.apply(heuristics)
+            llm_input = heuristics.llm_input()
+
         # Note: In a real scenario, you might want to handle potential LLM failures
         try:
-            resume_data = await self.llm_service.extract_resume_data(raw_text)
+            resume_data = await self.llm_service.extract_resume_data(llm_input, priority=priority)
+        except LLMUnavailableError:
+            # Quota exhausted or model down: temporary, let the route answer 503
+            raise
         except Exception as e:
             # Fallback or re-raise. For now, we allow it to fail but this could be improved
             raise ValueError(f"LLM Extraction failed: {str(e)}")
-        
-        # 3. Save to database
+        return self.heuristic_parser.apply(heuristics, resume_data) if heuristics else resume_data
+
+    async def extract_and_save_resume(self, file_content: PdfSource, content_hash: Optional[str] = None) -> Resume:
+        """
+        Orchestrates the resume extraction process for PDF bytes or a spooled upload's path
+        (pass the hash computed while spooling to avoid reading the file again):
+        1. Return the stored resume if these exact bytes were uploaded before
+        2. Extract text from PDF
+        3. Reuse a previous extraction of the same normalized text, if any
+        4. Extract structured data with rules, using the LLM only for what they can't cover
+        5. Save to database
+        """
+        # 1. Byte-level dedupe
+        if content_hash is None:
+            content_hash = sha256_bytes(file_content) if isinstance(file_content, (bytes, bytearray)) else sha256_file(file_content)
+        with stage("dedupe"):
+            existing = await self.resume_repository.get_resume_by_content_hash(content_hash)
+        if existing:
+            logger.info(f"Resume upload matched existing file hash {content_hash[:12]}, skipping extraction")
+            return existing
+
+        # 2. Extract text (off the event loop, on the PDF process pool)
+        with stage("pdf_text"):
+            raw_text = await self.pdf_service.extract_text_from_pdf_async(file_content)
+        # Scanned or image-only PDFs have no text, and must not all match the first one stored
+        text_hash = sha256_text(raw_text) if normalize_text(raw_text) else None
+
+        # 3. Text-level dedupe: a re-exported PDF yields different bytes but the same text
+        same_text = None
+        if text_hash:
+            with stage("text_dedupe"):
+                same_text = await self.resume_repository.get_resume_by_text_hash(text_hash)
+        if same_text:
+            logger.info(f"Resume upload matched existing text hash {text_hash[:12]}, cloning extraction")
+            resume_data = same_text.content
+        else:
+            # 4. Extract structured data
+            with stage("structured_extraction"):
+                resume_data = await self.extract_structured_data(raw_text)
+
+        # 5. Save to database
         resume = Resume(
             content=resume_data,
-            original_text=raw_text
+            original_text=raw_text,
+            content_hash=content_hash,
+            text_hash=text_hash
         )
-        return await self.resume_repository.create_resume(resume)
-        
-        return resume
\ No newline at end of file
+        try:
+            with stage("save"):
+                resume = await self.resume_repository.create_resume(resume)
+            rag_service.index_in_background(resumes=[resume])
+            return resume
+        except DuplicateKeyError:
+            # A concurrent upload of the same file won the insert
+            existing = await self.resume_repository.get_resume_by_content_hash(content_hash)
+            if existing:
+                return existing
+            raise
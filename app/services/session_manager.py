@@ -0,0 +1,135 @@
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService, Session
+from app.core.config import settings
+import asyncio
+import logging
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class BoundedInMemorySessionService(InMemorySessionService):
+    """
+    InMemorySessionService that keeps at most `max_events` events per session.
+    """
+
+    def __init__(self, max_events: int):
+        super().__init__()
+        self.max_events = max_events
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session, event)
+        self._trim(session)
+        stored = self.sessions.get(session.app_name, {}).get(session.user_id, {}).get(session.id)
+        if stored is not None and stored is not session:
+            self._trim(stored)
+        return event
+
+    def _trim(self, session: Session):
+        overflow = len(session.events) - self.max_events
+        if overflow > 0:
+            del session.events[:overflow]
+
+
+class SessionManager:
+    """
+    Owns the ADK session store for the worker: hands out ephemeral sessions,
+    caps their event history and periodically evicts anything left behind.
+    """
+
+    def __init__(self, max_events: Optional[int] = None, ttl_seconds: Optional[int] = None, sweep_interval: Optional[int] = None):
+        self.session_service = BoundedInMemorySessionService(max_events or settings.ADK_SESSION_MAX_EVENTS)
+        self.ttl_seconds = ttl_seconds or settings.ADK_SESSION_TTL_SECONDS
+        self.sweep_interval = sweep_interval or settings.ADK_SESSION_SWEEP_INTERVAL_SECONDS
+        self._sweeper: Optional[asyncio.Task] = None
+        self.created = 0
+        self.deleted = 0
+        self.evicted = 0
+
+    async def start(self):
+        """Start the periodic eviction sweep"""
+        if not self._sweeper:
+            logger.info("Starting ADK session sweeper...")
+            self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def stop(self):
+        """Stop the sweep and drop every stored session"""
+        if self._sweeper:
+            logger.info("Stopping ADK session sweeper...")
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+        self.session_service.sessions.clear()
+
+    @asynccontextmanager
+    async def ephemeral_session(self, app_name: str, user_id: str) -> AsyncIterator[Session]:
+        """
+        Create a uniquely named session that is deleted as soon as the caller is done with it.
+        """
+        session = await self.session_service.create_session(
+            app_name=app_name, user_id=user_id, session_id=f"{app_name}_{uuid.uuid4().hex}"
+        )
+        self.created += 1
+        try:
+            yield session
+        finally:
+            await self._delete(app_name, user_id, session.id)
+            self.deleted += 1
+
+    async def _delete(self, app_name: str, user_id: str, session_id: str):
+        await self.session_service.delete_session(app_name=app_name, user_id=user_id, session_id=session_id)
+        # Don't let empty per-app/per-user dicts accumulate either
+        users = self.session_service.sessions.get(app_name, {})
+        if user_id in users and not users[user_id]:
+            del users[user_id]
+        if app_name in self.session_service.sessions and not users:
+            del self.session_service.sessions[app_name]
+
+    async def sweep(self) -> int:
+        """Delete sessions that have not been updated within the TTL. Returns how many were removed."""
+        cutoff = time.time() - self.ttl_seconds
+        stale = [
+            (app_name, user_id, session_id)
+            for app_name, users in self.session_service.sessions.items()
+            for user_id, sessions in users.items()
+            for session_id, session in sessions.items()
+            if session.last_update_time < cutoff
+        ]
+        for app_name, user_id, session_id in stale:
+            await self._delete(app_name, user_id, session_id)
+        if stale:
+            logger.info(f"Evicted {len(stale)} stale ADK session(s)")
+        self.evicted += len(stale)
+        return len(stale)
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"ADK session sweep failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        sessions = [
+            session
+            for users in self.session_service.sessions.values()
+            for user_sessions in users.values()
+            for session in user_sessions.values()
+        ]
+        return {
+            "live_sessions": len(sessions),
+            "retained_events": sum(len(session.events) for session in sessions),
+            "retained_bytes": sum(len(session.model_dump_json()) for session in sessions),
+            "created": self.created,
+            "deleted": self.deleted,
+            "evicted": self.evicted,
+        }
+
+# Global instance
+session_manager = SessionManager()
@@ -0,0 +1,235 @@
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+import logging
+import math
+import re
+
+logger = logging.getLogger(__name__)
+
+TRUNCATE = "truncate"
+MAP_REDUCE = "map_reduce"
+
+_HYPHENATED_BREAK_RE = re.compile(r"(\w)-\n(\w)")
+_INLINE_WHITESPACE_RE = re.compile(r"[ \t\f\v\u00a0\u2000-\u200b\u202f\u205f\u3000]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_DIGITS_RE = re.compile(r"\d+")
+_PAGE_NUMBER_RE = re.compile(r"^(page\s*)?#(\s*(of|/)\s*#)?$", re.IGNORECASE)
+PAGE_BREAK = "\f"
+# How many lines at the top and bottom of a page can be a running header/footer
+EDGE_LINES = 2
+
+# Section titles seen in resumes and job descriptions
+SECTION_HEADINGS = {
+    "summary", "profile", "objective", "about", "about us", "about the role", "about you",
+    "experience", "work experience", "professional experience", "employment history",
+    "education", "skills", "technical skills", "projects", "certifications", "awards",
+    "publications", "languages", "interests", "volunteering",
+    "responsibilities", "what you'll do", "requirements", "qualifications",
+    "preferred qualifications", "nice to have", "benefits", "perks", "what we offer", "tech stack",
+}
+
+@dataclass
+class PreparedInput:
+    """Normalized LLM input, split into chunks when it has to be extracted piecewise."""
+    chunks: List[str]
+    original_tokens: int
+    tokens: int
+    truncated: bool = False
+    removed_lines: int = 0
+    sections: List[str] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(self.chunks)
+
+class TextPreprocessor:
+    """
+    Shared compaction stage in front of every LLM extraction: normalizes
+    whitespace and hyphenation, drops repeated page headers/footers, counts
+    tokens and enforces a token budget by section-aware truncation or by
+    splitting into chunks for map-reduce extraction.
+    """
+
+    def __init__(self, max_input_tokens: Optional[int] = None, strategy: Optional[str] = None, chars_per_token: Optional[float] = None):
+        self.max_input_tokens = max_input_tokens or settings.LLM_MAX_INPUT_TOKENS
+        self.strategy = strategy or settings.LLM_OVERSIZE_STRATEGY
+        self.chars_per_token = chars_per_token or settings.LLM_CHARS_PER_TOKEN
+        if self.strategy not in (TRUNCATE, MAP_REDUCE):
+            raise ValueError(f"Unknown oversize strategy: {self.strategy}")
+        self.calls = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.truncated = 0
+        self.chunked = 0
+
+    def count_tokens(self, text: str) -> int:
+        """Cheap token estimate; good enough for budgeting without a tokenizer round trip."""
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def normalize(self, text: str) -> str:
+        """Rejoin hyphenated line breaks and collapse whitespace, keeping page breaks."""
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        text = _HYPHENATED_BREAK_RE.sub(r"\1\2", text)
+        pages = []
+        for page in text.split(PAGE_BREAK):
+            lines = [_INLINE_WHITESPACE_RE.sub(" ", line).strip() for line in page.split("\n")]
+            pages.append(_BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip())
+        return PAGE_BREAK.join(pages)
+
+    def dedupe_repeated_lines(self, text: str) -> Tuple[str, int]:
+        """
+        Drop running page headers/footers and page-number lines at page edges.
+        Pages are separated by form feeds (as PdfService emits them); a line at the
+        top (or bottom) of a page whose digit-insensitive form recurs at the top (or
+        bottom) of another page is kept once. Returns the text and how many lines were removed.
+        """
+        pages = [page.split("\n") for page in text.split(PAGE_BREAK)]
+        signature = lambda line: _DIGITS_RE.sub("#", line.strip().lower())
+
+        def edges(lines: List[str]) -> Tuple[List[int], List[int]]:
+            content = [index for index, line in enumerate(lines) if line.strip()]
+            return content[:EDGE_LINES], content[-EDGE_LINES:]
+
+        # Headers repeat at the top of pages and footers at the bottom, so count each edge separately
+        top_counts, bottom_counts = Counter(), Counter()
+        if len(pages) > 1:
+            for lines in pages:
+                top, bottom = edges(lines)
+                top_counts.update({signature(lines[index]) for index in top})
+                bottom_counts.update({signature(lines[index]) for index in bottom})
+
+        seen = set()
+        kept: List[str] = []
+        removed = 0
+        for lines in pages:
+            top, bottom = edges(lines)
+            for index, line in enumerate(lines):
+                line_signature = signature(line)
+                at_edge = index in top or index in bottom
+                # Only at a page edge: in the body a bare "2019" or "2019/2020" is a date
+                if at_edge and line_signature and _PAGE_NUMBER_RE.match(line_signature):
+                    removed += 1
+                    continue
+                repeated = at_edge and ((index in top and top_counts[line_signature] > 1) or (index in bottom and bottom_counts[line_signature] > 1))
+                if repeated:
+                    if line_signature in seen:
+                        removed += 1
+                        continue
+                    seen.add(line_signature)
+                kept.append(line)
+        return "\n".join(kept), removed
+
+    def is_heading(self, line: str) -> bool:
+        stripped = line.strip().rstrip(":").strip()
+        if not stripped or len(stripped) > 40:
+            return False
+        if stripped.lower() in SECTION_HEADINGS:
+            return True
+        letters = [ch for ch in stripped if ch.isalpha()]
+        return len(letters) >= 4 and all(ch.isupper() for ch in letters)
+
+    def split_sections(self, text: str) -> List[str]:
+        sections: List[List[str]] = [[]]
+        for line in text.split("\n"):
+            if self.is_heading(line) and sections[-1]:
+                sections.append([])
+            sections[-1].append(line)
+        return ["\n".join(section).strip() for section in sections if "\n".join(section).strip()]
+
+    def truncate(self, sections: List[str], budget: int) -> List[str]:
+        """
+        Shrink every section by the same ratio, cutting at line boundaries, so each
+        section keeps its heading and opening lines instead of losing the tail ones entirely.
+        """
+        total = sum(self.count_tokens(section) for section in sections)
+        ratio = budget / total if total else 1.0
+        kept_sections = []
+        for section in sections:
+            allowance = max(1, int(self.count_tokens(section) * ratio))
+            kept_lines, used = [], 0
+            for line in section.split("\n"):
+                cost = self.count_tokens(line + "\n")
+                if kept_lines and used + cost > allowance:
+                    break
+                kept_lines.append(line[: int(allowance * self.chars_per_token)] if not kept_lines else line)
+                used += cost
+            kept_sections.append("\n".join(kept_lines))
+        return kept_sections
+
+    def chunk(self, sections: List[str], budget: int) -> List[str]:
+        """Pack sections into chunks of at most `budget` tokens, splitting oversized sections by line."""
+        chunks: List[str] = []
+        current: List[str] = []
+        used = 0
+        for section in sections:
+            pieces = [section] if self.count_tokens(section) <= budget else self._split_lines(section, budget)
+            for piece in pieces:
+                cost = self.count_tokens(piece) + 1
+                if current and used + cost > budget:
+                    chunks.append("\n\n".join(current))
+                    current, used = [], 0
+                current.append(piece)
+                used += cost
+        if current:
+            chunks.append("\n\n".join(current))
+        return chunks
+
+    def _split_lines(self, section: str, budget: int) -> List[str]:
+        pieces, current, used = [], [], 0
+        max_chars = int(budget * self.chars_per_token)
+        for line in section.split("\n"):
+            for start in range(0, max(len(line), 1), max_chars):
+                part = line[start:start + max_chars]
+                cost = self.count_tokens(part + "\n")
+                if current and used + cost > budget:
+                    pieces.append("\n".join(current))
+                    current, used = [], 0
+                current.append(part)
+                used += cost
+        if current:
+            pieces.append("\n".join(current))
+        return pieces
+
+    def prepare(self, text: str, label: str = "LLM") -> PreparedInput:
+        original_tokens = self.count_tokens(text)
+        normalized, removed_lines = self.dedupe_repeated_lines(self.normalize(text))
+        normalized = _BLANK_LINES_RE.sub("\n\n", normalized).strip()
+        sections = self.split_sections(normalized)
+        tokens = self.count_tokens(normalized)
+
+        if tokens <= self.max_input_tokens:
+            prepared = PreparedInput(chunks=[normalized], original_tokens=original_tokens, tokens=tokens, removed_lines=removed_lines, sections=sections)
+        elif self.strategy == MAP_REDUCE:
+            chunks = self.chunk(sections, self.max_input_tokens)
+            prepared = PreparedInput(chunks=chunks, original_tokens=original_tokens, tokens=tokens, removed_lines=removed_lines, sections=sections)
+        else:
+            kept = "\n\n".join(self.truncate(sections, self.max_input_tokens))
+            prepared = PreparedInput(chunks=[kept], original_tokens=original_tokens, tokens=self.count_tokens(kept), truncated=True, removed_lines=removed_lines, sections=sections)
+
+        self.calls += 1
+        self.tokens_in += original_tokens
+        self.tokens_out += prepared.tokens
+        self.truncated += int(prepared.truncated)
+        self.chunked += int(len(prepared.chunks) > 1)
+        logger.info(
+            f"{label} input: {original_tokens} -> {prepared.tokens} tokens (budget {self.max_input_tokens}), "
+            f"{len(prepared.chunks)} chunk(s), {removed_lines} repeated line(s) removed"
+            + (", truncated" if prepared.truncated else "")
+        )
+        return prepared
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "truncated": self.truncated,
+            "chunked": self.chunked,
+            "max_input_tokens": self.max_input_tokens,
+            "strategy": self.strategy,
+        }
+
+# Global instance
+text_preprocessor = TextPreprocessor()
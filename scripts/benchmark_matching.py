@@ -0,0 +1,63 @@
+"""
+Latency benchmark for the resume matching engine (MatchIndex).
+
+Builds an index of random unit vectors shaped like the real one (chunks per
+resume, embedding dimension) and times ranking the whole pool against job
+descriptions with a realistic number of requirements.
+
+    poetry run python scripts/benchmark_matching.py --resumes 10000 100000
+"""
+from pathlib import Path
+import argparse
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.matching_service import MatchIndex, MAX, MEAN  # noqa: E402
+
+def build_index(resumes: int, chunks_per_resume: int, dimension: int, rng: np.random.Generator) -> MatchIndex:
+    chunks = resumes * chunks_per_resume
+    embeddings = rng.standard_normal((chunks, dimension), dtype=np.float32)
+    resume_ids = [f"resume-{index}" for index in np.repeat(np.arange(resumes), chunks_per_resume)]
+    return MatchIndex(resume_ids, embeddings)
+
+def bench(index: MatchIndex, requirements: int, top_k: int, aggregate: str, runs: int, rng: np.random.Generator) -> dict:
+    dimension = index.matrix.shape[1]
+    index.top_k(rng.standard_normal((requirements, dimension), dtype=np.float32), top_k, aggregate)  # Warm up
+    timings = []
+    for _ in range(runs):
+        queries = rng.standard_normal((requirements, dimension), dtype=np.float32)
+        started = time.perf_counter()
+        index.top_k(queries, top_k, aggregate)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings = np.array(timings)
+    return {"p50": np.percentile(timings, 50), "p95": np.percentile(timings, 95), "max": timings.max()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resumes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--chunks-per-resume", type=int, default=8)
+    parser.add_argument("--dimension", type=int, default=384, help="all-MiniLM-L6-v2, Chroma's default model")
+    parser.add_argument("--requirements", type=int, default=12)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{args.chunks_per_resume} chunks/resume, {args.dimension} dims, {args.requirements} requirements, top {args.top_k}, {args.runs} runs")
+    for resumes in args.resumes:
+        started = time.perf_counter()
+        index = build_index(resumes, args.chunks_per_resume, args.dimension, rng)
+        build_seconds = time.perf_counter() - started
+        print(f"\n{resumes:,} resumes: {index.chunk_count:,} chunks, {index.nbytes / 2**20:,.0f} MiB matrix, built in {build_seconds:.2f}s")
+        for aggregate in (MEAN, MAX):
+            result = bench(index, args.requirements, args.top_k, aggregate, args.runs, rng)
+            print(f"  {aggregate:<4}  p50 {result['p50']:8.2f} ms  p95 {result['p95']:8.2f} ms  max {result['max']:8.2f} ms")
+        del index
+
+if __name__ == "__main__":
+    main()
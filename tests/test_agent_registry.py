@@ -0,0 +1,48 @@
+import pytest
+from google.adk.models import Gemini
+from google.adk.sessions import InMemorySessionService
+from pydantic import BaseModel
+
+from app.core import dependencies
+from app.models.job_description_data import JobDescriptionData
+from app.models.resume_data import ResumeData
+from app.services.agent_registry import AgentRegistry, ExtractorSpec
+
+class CoverLetterDraft(BaseModel):
+    body: str
+
+@pytest.fixture
+def registry():
+    return AgentRegistry(Gemini(model="gemini-2.5-flash-lite"), InMemorySessionService())
+
+def test_default_extractors_are_built_once(registry):
+    resume = registry.get(ResumeData)
+    assert resume.agent.output_schema is ResumeData
+    assert resume.runner.agent is resume.agent
+    assert registry.get(ResumeData) is resume
+    assert registry.get(JobDescriptionData).spec.output_key == "jd_data"
+
+def test_registering_a_schema_twice_keeps_the_first(registry):
+    spec = ExtractorSpec(name="cover_letter", app_name="Cover Letters", schema=CoverLetterDraft, output_key="draft", description="Draft a letter.")
+    first = registry.register(spec)
+    assert registry.register(ExtractorSpec(**{**spec.__dict__, "name": "other"})) is first
+    assert registry.get(CoverLetterDraft).spec.name == "cover_letter"
+
+def test_unknown_schema_is_rejected(registry):
+    with pytest.raises(ValueError, match="CoverLetterDraft"):
+        registry.get(CoverLetterDraft)
+
+def test_services_are_shared_singletons(monkeypatch):
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    providers = [dependencies.get_llm_extraction_service, dependencies.get_resume_service, dependencies.get_job_description_service]
+    for provider in providers:
+        provider.cache_clear()
+    try:
+        llm = dependencies.get_llm_extraction_service()
+        assert dependencies.get_llm_extraction_service() is llm
+        # Every service built on the model shares its agents instead of building its own
+        assert dependencies.get_resume_service().llm_service is llm
+        assert dependencies.get_job_description_service().llm_service is llm
+    finally:
+        for provider in providers:
+            provider.cache_clear()
@@ -0,0 +1,101 @@
+import asyncio
+
+from app.services.browser_service import BrowserService
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url, **kwargs):
+        pass
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        for page in self.pages:
+            page.closed = True
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        context = FakeContext(self)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+class FakeChromium:
+    def __init__(self):
+        self.launched = []
+
+    async def launch(self, **kwargs):
+        await asyncio.sleep(0.01)
+        browser = FakeBrowser()
+        self.launched.append(browser)
+        return browser
+
+class FakePlaywright:
+    def __init__(self):
+        self.chromium = FakeChromium()
+
+def make_service(**options) -> BrowserService:
+    service = BrowserService(**{"pool_size": 4, "max_context_uses": 10, "warm_size": 0, **options})
+    service._playwright = FakePlaywright()
+    return service
+
+async def use(service):
+    async with service.page() as page:
+        await asyncio.sleep(0)
+        return page
+
+def test_pages_are_reused_from_the_pool():
+    service = make_service()
+
+    async def main():
+        service._browser = await service._playwright.chromium.launch()
+        first = await use(service)
+        second = await use(service)
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first is second
+    assert service.stats()["contexts_created"] == 1
+
+def test_disconnected_browser_is_relaunched_once():
+    service = make_service()
+
+    async def main():
+        crashed = await service._playwright.chromium.launch()
+        service._browser = crashed
+        idle = await use(service)
+        crashed.connected = False
+
+        pages = await asyncio.gather(*(use(service) for _ in range(4)))
+        return crashed, idle, pages
+
+    crashed, idle, pages = asyncio.run(main())
+    launched = service._playwright.chromium.launched
+    assert len(launched) == 2 and service._browser is launched[1]
+    assert service.relaunches == 1
+    # The idle context from the crashed browser was thrown away, new ones come from the relaunched one
+    assert idle not in pages
+    assert len(crashed.contexts) == 1 and launched[1].contexts
+    assert crashed.contexts[0].pages[0].closed
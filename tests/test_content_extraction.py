@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+from app.services.content_extraction_service import ContentExtractionService, JsonLdJobPostingStage, StageResult, TextDensityStage
+
+DESCRIPTION = "<p>We are hiring a backend engineer to build, run, and scale our payments platform.</p>" * 4
+PROSE = "You will design services, review code, mentor engineers, and own reliability for the platform we run."
+
+def page(body: str, head: str = "") -> str:
+    return f"<html><head><title> Backend Engineer </title>{head}</head><body>{body}</body></html>"
+
+def json_ld(data) -> str:
+    return f'<script type="application/ld+json">{json.dumps(data)}</script>'
+
+def posting(**fields):
+    return {"@type": "JobPosting", "title": "Backend Engineer", "description": DESCRIPTION, **fields}
+
+@pytest.fixture
+def service():
+    return ContentExtractionService()
+
+def test_json_ld_posting_is_preferred(service):
+    html = page("<main><p>Rendered copy of the posting</p></main>", json_ld(posting(
+        hiringOrganization={"@type": "Organization", "name": "Acme"},
+        employmentType=["FULL_TIME", "CONTRACTOR"],
+        jobLocation={"address": {"addressLocality": "Berlin", "addressCountry": {"name": "DE"}}},
+        qualifications="<ul><li>Python</li></ul>",
+    )))
+    content = service.extract(html)
+    assert content.method == "json_ld"
+    assert content.title == "Backend Engineer"
+    lines = content.text.split("\n")
+    assert lines[:4] == ["Backend Engineer", "Company: Acme", "Employment type: FULL_TIME, CONTRACTOR", "Location: Berlin, DE"]
+    assert "<p>" not in content.text
+    assert content.text.endswith("Qualifications:\nPython")
+    assert content.structured["hiringOrganization"]["name"] == "Acme"
+
+def test_json_ld_inside_a_graph_is_found(service):
+    graph = {"@context": "https://schema.org", "@graph": [{"@type": "WebPage"}, posting(**{"@type": ["JobPosting", "Thing"]})]}
+    assert service.extract(page("", json_ld(graph))).method == "json_ld"
+
+@pytest.mark.parametrize("head", [
+    json_ld(posting(description="<p>Too short</p>")),
+    '<script type="application/ld+json">{not json</script>',
+    json_ld({"@type": "Organization", "name": "Acme"}),
+])
+def test_unusable_json_ld_defers_to_the_next_stage(head):
+    service = ContentExtractionService(stages=[JsonLdJobPostingStage()])
+    assert service.extract(page("", head)).method == "none"
+
+def test_density_keeps_the_posting_and_drops_page_chrome(service):
+    html = page(
+        '<div class="cookie-banner"><p>We use cookies to improve your experience, see our policy here.</p></div>'
+        "<nav><ul><li><a href='/'>Home</a></li><li><a href='/jobs'>Jobs</a></li></ul></nav>"
+        '<div class="job-header"><div id="posting">' + f"<p>{PROSE}</p>" * 4 + "</div></div>"
+        '<div class="related-jobs"><ul>' + "<li><a href='/j'>Frontend engineer, payments, remote, Berlin</a></li>" * 6 + "</ul></div>"
+        "<footer><p>Copyright Acme, all rights reserved, 2026, imprint, privacy.</p></footer>"
+    )
+    content = service.extract(html)
+    assert content.method == "density"
+    assert content.text == "\n".join([PROSE] * 4)
+    assert content.removed_chars > 0
+    assert service.stats()["chars_removed"] == content.removed_chars
+
+def test_density_does_not_mutate_the_soup_for_later_stages():
+    seen = []
+
+    class Recorder:
+        name = "recorder"
+
+        def extract(self, soup):
+            seen.append(soup.find("nav") is not None)
+            return StageResult(text="recorded")
+
+    service = ContentExtractionService(stages=[TextDensityStage(min_chars=10_000), Recorder()])
+    content = service.extract(page(f"<nav><a href='/'>Home</a></nav><div><p>{PROSE}</p></div>"))
+    assert content.method == "recorder"
+    assert seen == [True]
+
+def test_short_pages_fall_back_to_main(service):
+    content = service.extract(page("<header>Acme</header><main><p>Apply by email.</p></main>"))
+    assert content.method == "fallback"
+    assert content.text == "Apply by email."
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import os
+import threading
+
+import pytest
+
+from app.services.crawl_cache_service import CrawlCacheService
+
+PAGE = "<html><body>" + "posting text " * 200 + "</body></html>"
+
+@pytest.fixture
+def directory(tmp_path):
+    return tmp_path / "crawl"
+
+def make_cache(directory, **options) -> CrawlCacheService:
+    options = {"ttl_seconds": 3600, "max_bytes": 10_000_000, "fresh_seconds": 0, "flush_seconds": 60, **options}
+    return CrawlCacheService(directory=str(directory), **options)
+
+def stored_files(directory):
+    return sorted(os.path.relpath(os.path.join(root, name), directory) for root, _, names in os.walk(directory) for name in names)
+
+def test_round_trip_with_validators(directory):
+    cache = make_cache(directory)
+
+    async def main():
+        await cache.put("https://www.example.com/jobs/1/?utm_source=feed", PAGE, "static", etag='"v1"')
+        return await cache.get("https://example.com/jobs/1")
+
+    page = asyncio.run(main())
+    assert page.html == PAGE
+    assert page.entry.conditional_headers() == {"If-None-Match": '"v1"'}
+    assert cache.stats()["hits"] == 1
+
+def test_index_is_written_in_batches_and_on_stop(directory):
+    cache = make_cache(directory)
+
+    async def main():
+        for index in range(5):
+            await cache.put(f"https://example.com/jobs/{index}", PAGE + str(index), "static")
+        await cache.touch("https://example.com/jobs/0")
+        # Nothing but blobs on disk until the flush interval passes
+        assert not (directory / "index.json").exists()
+        await cache.stop()
+
+    asyncio.run(main())
+    assert len(json.loads((directory / "index.json").read_text())) == 5
+    # Temp files are always renamed into place
+    assert not [name for name in stored_files(directory) if name.endswith(".tmp")]
+
+    reopened = make_cache(directory)
+    assert asyncio.run(reopened.get("https://example.com/jobs/3")).html == PAGE + "3"
+
+def test_index_is_flushed_after_the_interval(directory):
+    cache = make_cache(directory, flush_seconds=0.01)
+
+    async def main():
+        await cache.put("https://example.com/jobs/1", PAGE, "static")
+        await asyncio.sleep(0.1)
+        assert (directory / "index.json").exists()
+
+    asyncio.run(main())
+
+def test_identical_pages_share_a_blob(directory):
+    cache = make_cache(directory)
+
+    async def main():
+        await cache.put("https://example.com/jobs/1", PAGE, "static")
+        await cache.put("https://example.com/jobs/2", PAGE, "static")
+        await cache.stop()
+
+    asyncio.run(main())
+    assert len([name for name in stored_files(directory) if name.startswith("blobs")]) == 1
+
+def test_unreadable_blob_is_dropped(directory):
+    cache = make_cache(directory)
+
+    async def main():
+        await cache.put("https://example.com/jobs/1", PAGE, "static")
+        for name in stored_files(directory):
+            (directory / name).write_bytes(b"not compressed")
+        assert await cache.get("https://example.com/jobs/1") is None
+        assert await cache.get("https://example.com/jobs/1") is None
+
+    asyncio.run(main())
+    assert cache.stats()["entries"] == 0 and cache.stats()["misses"] == 2
+
+def test_least_recently_used_pages_are_evicted(directory):
+    cache = make_cache(directory)
+
+    async def main():
+        await cache.put("https://example.com/jobs/1", PAGE + "1", "static")
+        await cache.put("https://example.com/jobs/2", PAGE + "2", "static")
+        await cache.get("https://example.com/jobs/1")
+        cache.max_bytes = cache.stats()["bytes"]
+        await cache.put("https://example.com/jobs/3", PAGE + "3", "static")
+        return [await cache.get(f"https://example.com/jobs/{index}") is not None for index in (1, 2, 3)]
+
+    assert asyncio.run(main()) == [True, False, True]
+    assert cache.evictions == 1
+
+def test_reads_do_not_wait_for_each_other(directory, monkeypatch):
+    cache = make_cache(directory)
+    asyncio.run(cache.put("https://example.com/jobs/1", PAGE, "static"))
+    read_blob = cache._read_blob
+    second_read = threading.Event()
+    overlapped = []
+
+    def slow_read(entry):
+        if overlapped:
+            second_read.set()
+        else:
+            overlapped.append(False)
+            # Only passes early if the other read starts while this one is still decompressing
+            overlapped[0] = second_read.wait(timeout=1)
+        return read_blob(entry)
+    monkeypatch.setattr(cache, "_read_blob", slow_read)
+
+    async def main():
+        return await asyncio.gather(cache.get("https://example.com/jobs/1"), cache.get("https://example.com/jobs/1"))
+
+    assert all(page.html == PAGE for page in asyncio.run(main()))
+    assert overlapped == [True]
@@ -0,0 +1,93 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from app.services.embedding_service import EmbeddingService
+
+DIMENSIONS = 4
+VECTOR_BYTES = DIMENSIONS * 4
+
+class CountingEmbedder:
+    """Deterministic stand-in for the model that records every batch it is given."""
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, input):
+        self.batches.append(list(input))
+        return [np.full(DIMENSIONS, len(text), dtype=np.float32) for text in input]
+
+    def name(self):
+        return "counting"
+
+@pytest.fixture
+def embedder():
+    return CountingEmbedder()
+
+def make_service(embedder, tmp_path, **options) -> EmbeddingService:
+    options = {"max_entries": 100, "batch_size": 2, "enabled": True, "max_disk_bytes": 10 * VECTOR_BYTES, **options}
+    return EmbeddingService(embedding_function=embedder, cache_dir=str(tmp_path / "embeddings"), **options)
+
+def blob_files(tmp_path):
+    return [name for _, _, names in os.walk(tmp_path / "embeddings") for name in names if name.endswith(".f32")]
+
+def test_misses_are_batched_and_deduplicated(embedder, tmp_path):
+    service = make_service(embedder, tmp_path)
+    vectors = service.embed(["a", "bb", "a", "ccc", "dddd"])
+    assert [vector[0] for vector in vectors] == [1, 2, 1, 3, 4]
+    assert embedder.batches == [["a", "bb"], ["ccc", "dddd"]]
+    assert service.stats()["misses"] == 4
+
+def test_repeats_come_from_memory_then_disk(embedder, tmp_path):
+    service = make_service(embedder, tmp_path)
+    service.embed(["a", "bb"])
+    service.embed(["a", "bb"])
+    assert service.stats()["memory_hits"] == 2
+
+    restarted = make_service(embedder, tmp_path)
+    assert [vector[0] for vector in restarted.embed(["bb", "a"])] == [2, 1]
+    assert restarted.stats()["disk_hits"] == 2
+    assert len(embedder.batches) == 1
+
+def test_cache_is_per_model(embedder, tmp_path):
+    make_service(embedder, tmp_path).embed(["a"])
+    other = CountingEmbedder()
+    other.name = lambda: "other-model"
+    make_service(other, tmp_path).embed(["a"])
+    assert other.batches == [["a"]]
+
+def test_disabled_cache_always_embeds(embedder, tmp_path):
+    service = make_service(embedder, tmp_path, enabled=False)
+    service.embed(["a"])
+    service.embed(["a"])
+    assert len(embedder.batches) == 2
+    assert blob_files(tmp_path) == []
+
+def test_disk_cache_drops_least_recently_used(embedder, tmp_path):
+    service = make_service(embedder, tmp_path, max_disk_bytes=3 * VECTOR_BYTES, max_entries=1)
+    service.embed(["a", "bb", "ccc"])
+    # Read "a" back from disk (memory only holds one vector), making "bb" the oldest
+    service.embed(["a"])
+    service.embed(["dddd"])
+
+    assert len(blob_files(tmp_path)) == 3
+    assert service.stats()["disk_evictions"] == 1
+    assert service.stats()["disk_bytes"] == 3 * VECTOR_BYTES
+    restarted = make_service(CountingEmbedder(), tmp_path)
+    restarted.embed(["a", "bb", "ccc", "dddd"])
+    assert restarted.embedding_function.batches == [["bb"]]
+
+def test_disk_order_survives_a_restart(embedder, tmp_path):
+    service = make_service(embedder, tmp_path)
+    service.embed(["a", "bb"])
+    # Make "a" the most recently used file on disk
+    time.sleep(0.01)
+    make_service(embedder, tmp_path).embed(["a"])
+
+    restarted = make_service(embedder, tmp_path, max_disk_bytes=2 * VECTOR_BYTES)
+    restarted.embed(["ccc"])
+    assert restarted.stats()["disk_evictions"] == 1
+    fresh = make_service(CountingEmbedder(), tmp_path)
+    fresh.embed(["a", "bb", "ccc"])
+    assert fresh.embedding_function.batches == [["bb"]]
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from app.services.browser_service import BrowserService
+from app.services.fetch_profiles import DEFAULT_PROFILE, TRACKER_DOMAINS, FetchProfile, host_matches, profile_for_url
+
+@pytest.mark.parametrize("host, expected", [
+    ("doubleclick.net", True),
+    ("stats.g.doubleclick.net", True),
+    ("WWW.Google-Analytics.com", True),
+    ("notdoubleclick.net", False),
+    ("doubleclick.net.example.com", False),
+    ("example.com", False),
+])
+def test_tracker_hosts_match_whole_labels(host, expected):
+    assert host_matches(host, TRACKER_DOMAINS) is expected
+
+def test_known_boards_get_their_selector_hint():
+    profile = profile_for_url("https://boards.greenhouse.io/example/jobs/42")
+    assert profile.wait_for_selector == "#content, .job__description, #app_body"
+    assert profile.selector_timeout_ms == 10000
+    assert profile.blocked_resource_types == DEFAULT_PROFILE.blocked_resource_types
+
+def test_other_sites_get_the_default_profile():
+    assert profile_for_url("https://careers.example.com/jobs/42") is DEFAULT_PROFILE
+
+class FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = SimpleNamespace(url=url, resource_type=resource_type)
+        self.outcome = None
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+class FakePage:
+    """Replays a fixed set of subresource requests through whatever route handler is installed."""
+    def __init__(self, requests, selector_found=True):
+        self.routes = [FakeRoute(url, resource_type) for url, resource_type in requests]
+        self.selector_found = selector_found
+        self.handler = None
+        self.waited_for = None
+
+    async def route(self, pattern, handler):
+        self.handler = handler
+
+    async def unroute(self, pattern, handler):
+        assert handler is self.handler
+        self.handler = None
+
+    async def goto(self, url, wait_until):
+        self.wait_until = wait_until
+        if self.handler:
+            for route in self.routes:
+                await self.handler(route)
+
+    async def wait_for_selector(self, selector, timeout):
+        self.waited_for = selector
+        if not self.selector_found:
+            raise PlaywrightTimeoutError("selector not found")
+
+    async def content(self):
+        return "<html>posting</html>"
+
+REQUESTS = [
+    ("https://jobs.example.com/app.js", "script"),
+    ("https://jobs.example.com/logo.png", "image"),
+    ("https://jobs.example.com/font.woff2", "font"),
+    ("https://www.googletagmanager.com/gtm.js", "script"),
+    ("https://jobs.example.com/api/posting", "xhr"),
+]
+
+def load(page, profile):
+    service = BrowserService(pool_size=1)
+    html = asyncio.run(service._load(page, "https://jobs.example.com/42", profile, profile.wait_until))
+    return service, html
+
+def test_heavy_resources_and_trackers_are_blocked():
+    page = FakePage(REQUESTS)
+    service, html = load(page, DEFAULT_PROFILE)
+    assert html == "<html>posting</html>"
+    assert [route.outcome for route in page.routes] == ["continued", "aborted", "aborted", "aborted", "continued"]
+    assert service.blocked_requests == 3
+    assert page.handler is None
+    assert page.waited_for == DEFAULT_PROFILE.wait_for_selector
+
+def test_missing_selector_still_returns_what_rendered():
+    page = FakePage(REQUESTS, selector_found=False)
+    _, html = load(page, DEFAULT_PROFILE)
+    assert html == "<html>posting</html>"
+
+def test_profile_without_blocking_installs_no_route():
+    page = FakePage(REQUESTS)
+    load(page, FetchProfile(blocked_resource_types=frozenset(), block_trackers=False, wait_for_selector=None))
+    assert all(route.outcome is None for route in page.routes)
+    assert page.waited_for is None
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models.job_description_data import JobDescriptionData
+from app.models.job_description_models import JobDescription
+from app.repositories.job_description_repository import JobDescriptionRepository
+from app.services.content_extraction_service import ExtractedContent
+from app.services.job_description_batch_service import CREATED, EXISTING, FAILED, UPDATED, JobDescriptionBatchService
+from app.services.job_description_service import JobDescriptionService
+
+GOOD = JobDescriptionData(role="Data Engineer", company="Example", summary="Pipelines")
+
+class FakeLLM:
+    def __init__(self, answer):
+        self.answer = answer
+
+    async def extract_job_description_data(self, description, priority=None):
+        return self.answer
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr("app.services.job_description_batch_service.rag_service.index_in_background", lambda **kwargs: None)
+    service = JobDescriptionService(llm_service=FakeLLM(GOOD))
+    service.fetched = []
+
+    async def fetch_content(url):
+        service.fetched.append(url)
+        return ExtractedContent(text=f"Posting at {url}", title="Data Engineer", method="test", original_chars=100)
+    service.fetch_content = fetch_content
+    return service
+
+@pytest.fixture
+def batch(service):
+    return JobDescriptionBatchService(service, per_host_delay=0, upsert_max_wait=0.01)
+
+async def run(batch, urls, force_refresh=False):
+    results = [result async for result in batch.process(urls, force_refresh=force_refresh)]
+    return {result["url"]: result for result in results[:-1]}, results[-1]
+
+def stale(**fields) -> JobDescription:
+    return JobDescription(fetched_at=datetime.now(timezone.utc) - timedelta(days=365), **fields)
+
+def test_new_fresh_and_duplicate_urls(batch, service, run_with_db):
+    async def main():
+        fresh = await JobDescription(url="https://example.com/jobs/1", fetched_at=datetime.now(timezone.utc)).insert()
+        results, summary = await run(batch, [
+            "https://example.com/jobs/1",
+            "https://example.com/jobs/2?utm_source=feed",
+            "https://www.example.com/jobs/2/",
+        ])
+        assert results["https://example.com/jobs/1"]["status"] == EXISTING
+        assert results["https://example.com/jobs/1"]["job_description_id"] == str(fresh.id)
+        assert results["https://example.com/jobs/2"]["status"] == CREATED
+        assert service.fetched == ["https://example.com/jobs/2?utm_source=feed"]
+        assert summary["total"] == 2
+        assert (await JobDescription.find_one(JobDescription.url == "https://example.com/jobs/2")).structured_data == GOOD
+
+    run_with_db(main)
+
+def test_force_refresh_keeps_structured_data_when_extraction_fails(batch, service, run_with_db):
+    async def main():
+        stored = await stale(url="https://example.com/jobs/1", structured_data=GOOD).insert()
+        service.llm_service.answer = None
+        results, _ = await run(batch, ["https://example.com/jobs/1"], force_refresh=True)
+
+        assert results["https://example.com/jobs/1"]["status"] == UPDATED
+        reloaded = await JobDescription.get(stored.id)
+        assert reloaded.description == "Posting at https://example.com/jobs/1"
+        assert reloaded.structured_data == GOOD
+
+    run_with_db(main)
+
+def test_refresh_onto_a_url_owned_elsewhere_is_reported_failed(batch, service, run_with_db):
+    async def main():
+        legacy = await stale(url="https://www.example.com/jobs/1/").insert()
+        fetch_content = service.fetch_content
+
+        async def racing_fetch(url):
+            # Another request stores the canonical URL while the batch is fetching
+            await JobDescription(url="https://example.com/jobs/1", description="concurrent").insert()
+            return await fetch_content(url)
+        service.fetch_content = racing_fetch
+
+        results, summary = await run(batch, ["https://www.example.com/jobs/1/"])
+        result = results["https://example.com/jobs/1"]
+        assert result["status"] == FAILED
+        assert "already belongs to another job description" in result["error"]
+        assert summary[FAILED] == 1 and summary[UPDATED] == 0
+        assert (await JobDescription.get(legacy.id)).url == "https://www.example.com/jobs/1/"
+
+    run_with_db(main)
+
+def test_malformed_url_fails_without_sinking_the_batch(batch, run_with_db):
+    async def main():
+        results, summary = await run(batch, ["https://example.com:99999/jobs/1", "https://example.com/jobs/2"])
+        assert results["https://example.com:99999/jobs/1"]["status"] == FAILED
+        assert "Invalid port" in results["https://example.com:99999/jobs/1"]["error"]
+        assert results["https://example.com/jobs/2"]["status"] == CREATED
+        assert summary[FAILED] == 1 and summary[CREATED] == 1
+
+    run_with_db(main)
+
+def test_url_keyed_upsert_matches_the_stored_document(run_with_db):
+    repository = JobDescriptionRepository()
+
+    async def main():
+        winner = await JobDescription(url="https://example.com/jobs/1").insert()
+        documents = [JobDescription(url="https://example.com/jobs/1", title="refreshed"), JobDescription(url="https://example.com/jobs/2")]
+        assert await repository.upsert_job_descriptions(documents) == {}
+        assert documents[0].id == winner.id
+        assert (await JobDescription.get(winner.id)).title == "refreshed"
+        assert documents[1].id is not None
+
+    run_with_db(main)
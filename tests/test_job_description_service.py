@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.dependencies import get_job_description_service
+from app.main import app
+from app.models.job_description_data import JobDescriptionData
+from app.models.job_description_models import JobDescription, JobDescriptionRequest
+from app.services.content_extraction_service import ExtractedContent
+from app.services.job_description_service import JobDescriptionService
+
+CANONICAL = "https://example.com/jobs/42"
+RAW = "https://www.example.com/jobs/42/?utm_source=feed"
+GOOD = JobDescriptionData(role="Data Engineer", company="Example", summary="Pipelines")
+
+class FakeLLM:
+    def __init__(self, answers):
+        self.answers = list(answers)
+
+    async def extract_job_description_data(self, description, priority=None):
+        return self.answers.pop(0)
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr("app.services.job_description_service.rag_service.index_in_background", lambda **kwargs: None)
+    service = JobDescriptionService(llm_service=FakeLLM([]))
+    service.fetched = []
+
+    async def fetch_content(url):
+        service.fetched.append(url)
+        return ExtractedContent(text=f"Posting text {len(service.fetched)}", title="Data Engineer", method="test", original_chars=100)
+    service.fetch_content = fetch_content
+    return service
+
+def stale(**fields) -> JobDescription:
+    return JobDescription(fetched_at=datetime.now(timezone.utc) - timedelta(days=365), **fields)
+
+def test_refresh_keeps_structured_data_when_extraction_fails(service, run_with_db):
+    async def main():
+        stored = await stale(url=CANONICAL, description="old", structured_data=GOOD).insert()
+        # The model gives back something unusable this time
+        service.llm_service.answers = [None]
+        refreshed = await service.extract_job_description(JobDescriptionRequest(url=CANONICAL, force_refresh=True))
+
+        assert refreshed.id == stored.id
+        assert refreshed.description == "Posting text 1"
+        assert refreshed.structured_data == GOOD
+        reloaded = await JobDescription.get(stored.id)
+        assert reloaded.structured_data == GOOD
+
+    run_with_db(main)
+
+def test_refresh_replaces_structured_data_when_extraction_succeeds(service, run_with_db):
+    async def main():
+        stored = await stale(url=CANONICAL, structured_data=GOOD).insert()
+        newer = GOOD.model_copy(update={"summary": "Streaming pipelines"})
+        service.llm_service.answers = [newer]
+        refreshed = await service.extract_job_description(JobDescriptionRequest(url=CANONICAL, force_refresh=True))
+        assert (await JobDescription.get(stored.id)).structured_data == newer
+        assert refreshed.structured_data == newer
+
+    run_with_db(main)
+
+def test_canonical_url_taken_during_refresh_returns_that_copy(service, run_with_db):
+    async def main():
+        legacy = await stale(url=RAW).insert()
+        fetch_content = service.fetch_content
+
+        async def racing_fetch(url):
+            # Another request stores the canonical URL while this one is fetching
+            await JobDescription(url=CANONICAL, description="concurrent").insert()
+            return await fetch_content(url)
+        service.fetch_content = racing_fetch
+        service.llm_service.answers = [GOOD]
+
+        result = await service.extract_job_description(JobDescriptionRequest(url=RAW))
+        assert result.url == CANONICAL and result.description == "concurrent"
+        assert (await JobDescription.get(legacy.id)).url == RAW
+
+    run_with_db(main)
+
+def test_malformed_port_is_rejected_with_422(service):
+    app.dependency_overrides[get_job_description_service] = lambda: service
+    try:
+        response = TestClient(app).post("/", json={"url": "https://example.com:99999/jobs/42"})
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 422
+    assert "Invalid port" in response.json()["detail"]
+    assert service.fetched == []
@@ -0,0 +1,238 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import asyncio
+
+from app.models.job_model import Job, JobStatus
+from app.repositories.job_repository import JobRepository
+from app.services.job_queue_service import JobQueueService
+from app.services.llm_scheduler import LLMUnavailableError
+
+def utc(value: datetime) -> datetime:
+    """Mongo hands datetimes back naive, in UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+async def eventually(condition, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.02)
+
+def test_job_is_claimed_once(run_with_db):
+    repository = JobRepository()
+
+    async def main():
+        job = await repository.create_job(Job(kind="resume_upload"))
+        claimed = await repository.claim_job(str(job.id), lease_seconds=60)
+        assert claimed is not None
+        assert claimed.status == JobStatus.RUNNING
+        assert claimed.attempts == 1
+        assert utc(claimed.lease_until) > datetime.now(timezone.utc) + timedelta(seconds=50)
+        assert await repository.claim_job(str(job.id), lease_seconds=60) is None
+
+    run_with_db(main)
+
+def test_concurrent_claims_have_one_winner(run_with_db):
+    repository = JobRepository()
+
+    async def main():
+        job = await repository.create_job(Job(kind="resume_upload"))
+        claims = await asyncio.gather(*(repository.claim_job(str(job.id), lease_seconds=60) for _ in range(10)))
+        assert sum(claim is not None for claim in claims) == 1
+
+    run_with_db(main)
+
+def test_deferred_job_waits_for_run_after(run_with_db):
+    repository = JobRepository()
+
+    async def main():
+        now = datetime.now(timezone.utc)
+        later = await repository.create_job(Job(kind="resume_upload", run_after=now + timedelta(minutes=5)))
+        due = await repository.create_job(Job(kind="resume_upload", run_after=now - timedelta(seconds=1)))
+        fresh = await repository.create_job(Job(kind="resume_upload"))
+
+        assert set(await repository.get_queued_job_ids(limit=10)) == {str(due.id), str(fresh.id)}
+        assert await repository.claim_job(str(later.id), lease_seconds=60) is None
+        claimed = await repository.claim_job(str(due.id), lease_seconds=60)
+        assert claimed is not None and claimed.run_after is None
+
+    run_with_db(main)
+
+def test_expired_leases_are_requeued_or_failed(run_with_db):
+    repository = JobRepository()
+
+    async def main():
+        now = datetime.now(timezone.utc)
+        expired = await repository.create_job(Job(kind="resume_upload", status=JobStatus.RUNNING, attempts=1, lease_until=now - timedelta(seconds=1)))
+        exhausted = await repository.create_job(Job(kind="resume_upload", status=JobStatus.RUNNING, attempts=3, lease_until=now - timedelta(seconds=1)))
+        alive = await repository.create_job(Job(kind="resume_upload", status=JobStatus.RUNNING, attempts=1, lease_until=now + timedelta(minutes=5)))
+
+        assert await repository.requeue_expired_jobs(max_attempts=3) == (1, 1)
+
+        expired, exhausted, alive = [await repository.get_job_by_id(str(job.id)) for job in (expired, exhausted, alive)]
+        assert expired.status == JobStatus.QUEUED and expired.lease_until is None
+        assert exhausted.status == JobStatus.FAILED and exhausted.finished_at is not None
+        assert "3 attempt(s)" in exhausted.error
+        assert alive.status == JobStatus.RUNNING
+
+    run_with_db(main)
+
+def test_requeue_jobs_only_touches_running_jobs(run_with_db):
+    repository = JobRepository()
+
+    async def main():
+        running = await repository.create_job(Job(kind="resume_upload", status=JobStatus.RUNNING, lease_until=datetime.now(timezone.utc)))
+        finished = await repository.create_job(Job(kind="resume_upload", status=JobStatus.SUCCEEDED))
+        assert await repository.requeue_jobs([str(running.id), str(finished.id)]) == 1
+        assert (await repository.get_job_by_id(str(running.id))).status == JobStatus.QUEUED
+        assert (await repository.get_job_by_id(str(finished.id))).status == JobStatus.SUCCEEDED
+        assert await repository.requeue_jobs([]) == 0
+
+    run_with_db(main)
+
+def test_workers_record_success_and_failure(run_with_db):
+    async def main():
+        queue = JobQueueService(workers=2, max_attempts=2, poll_interval=0.05)
+
+        async def succeed(job):
+            return "result-1"
+
+        async def fail(job):
+            raise ValueError("not a PDF")
+
+        await queue.start({"succeed": succeed, "fail": fail})
+        try:
+            succeeded = await queue.submit("succeed")
+            failed = await queue.submit("fail")
+            succeeded = await queue.wait(str(succeeded.id), timeout=5)
+            failed = await queue.wait(str(failed.id), timeout=5)
+        finally:
+            await queue.stop()
+
+        assert succeeded.status == JobStatus.SUCCEEDED and succeeded.result_id == "result-1"
+        assert failed.status == JobStatus.FAILED and failed.error == "not a PDF"
+        assert queue.stats()["succeeded"] == 1 and queue.stats()["failed"] == 1
+
+    run_with_db(main)
+
+def test_unavailable_model_defers_the_job(run_with_db):
+    async def main():
+        queue = JobQueueService(workers=1, max_attempts=3, poll_interval=0.05)
+
+        async def unavailable(job):
+            raise LLMUnavailableError("model circuit is open", retry_after=30)
+
+        await queue.start({"extract": unavailable})
+        try:
+            job = await queue.submit("extract")
+
+            async def deferred():
+                current = await queue.get_job(str(job.id))
+                return current.status == JobStatus.QUEUED and current.run_after is not None
+            await eventually(deferred)
+        finally:
+            await queue.stop()
+
+        job = await queue.get_job(str(job.id))
+        assert job.status == JobStatus.QUEUED
+        assert job.attempts == 1
+        assert queue.retried == 1
+        assert utc(job.run_after) > datetime.now(timezone.utc) + timedelta(seconds=20)
+        assert await queue.repository.get_queued_job_ids(limit=10) == []
+
+    run_with_db(main)
+
+def test_stop_requeues_running_jobs_for_the_next_start(run_with_db):
+    async def main():
+        first = JobQueueService(workers=1, poll_interval=0.05)
+
+        async def hang(job):
+            await asyncio.Event().wait()
+
+        await first.start({"extract": hang})
+        job = await first.submit("extract")
+        running = await first.wait(str(job.id), timeout=5, since=JobStatus.QUEUED)
+        assert running.status == JobStatus.RUNNING
+        await first.stop()
+
+        requeued = await first.get_job(str(job.id))
+        assert requeued.status == JobStatus.QUEUED and requeued.lease_until is None
+
+        second = JobQueueService(workers=1, poll_interval=0.05)
+
+        async def finish(job):
+            return "result-2"
+
+        await second.start({"extract": finish})
+        try:
+            done = await second.wait(str(job.id), timeout=5)
+        finally:
+            await second.stop()
+        assert done.status == JobStatus.SUCCEEDED
+        assert done.attempts == 2
+
+    run_with_db(main)
+
+def test_worker_survives_a_failed_result_write(run_with_db):
+    async def main():
+        queue = JobQueueService(workers=1, poll_interval=0.05)
+        update_job = queue.repository.update_job
+        calls = []
+
+        async def flaky_update(job_id, fields):
+            calls.append(job_id)
+            if len(calls) == 1:
+                raise ConnectionError("mongo went away")
+            return await update_job(job_id, fields)
+        queue.repository.update_job = flaky_update
+
+        async def finish(job):
+            return "result"
+
+        await queue.start({"extract": finish})
+        try:
+            lost = await queue.submit("extract")
+
+            async def write_failed():
+                return bool(calls)
+            await eventually(write_failed)
+            # The same (only) worker still picks up the next job
+            done = await queue.wait(str((await queue.submit("extract")).id), timeout=5)
+        finally:
+            await queue.stop()
+
+        assert done.status == JobStatus.SUCCEEDED
+        # The lost write leaves the job leased; lease expiry hands it out again
+        lost = await queue.get_job(str(lost.id))
+        assert lost.status == JobStatus.RUNNING and lost.lease_until is not None
+
+    run_with_db(main)
+
+class StaticJobs:
+    """Stands in for the repository: jobs whose status is changed by "another process"."""
+    def __init__(self):
+        self.jobs = {}
+
+    async def get_job_by_id(self, job_id):
+        return self.jobs.get(job_id)
+
+def test_wait_events_are_dropped_for_jobs_finished_elsewhere():
+    async def main():
+        queue = JobQueueService(workers=1, poll_interval=0.01)
+        queue.repository = StaticJobs()
+        queue.repository.jobs["a"] = SimpleNamespace(status=JobStatus.QUEUED)
+
+        waiters = [asyncio.create_task(queue.wait("a", timeout=5)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert "a" in queue._changed
+        queue.repository.jobs["a"] = SimpleNamespace(status=JobStatus.SUCCEEDED)
+        done = await asyncio.gather(*waiters)
+
+        assert all(job.status == JobStatus.SUCCEEDED for job in done)
+        assert queue._changed == {} and queue._watchers == {}
+
+        # Timing out cleans up too
+        queue.repository.jobs["b"] = SimpleNamespace(status=JobStatus.RUNNING)
+        assert (await queue.wait("b", timeout=0.03)).status == JobStatus.RUNNING
+        assert queue._changed == {} and queue._watchers == {}
+
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+import asyncio
+import time
+
+from pydantic import BaseModel
+
+from app.models.llm_cache_model import LLMCacheEntry
+from app.services.llm_cache_service import LLMCacheService
+
+class Posting(BaseModel):
+    role: str
+
+class PostingV2(BaseModel):
+    role: str
+    company: str = ""
+
+def test_key_ignores_whitespace_but_not_model_or_schema():
+    cache = LLMCacheService()
+    key = cache.make_key("gemini", Posting, "Data  Engineer\n\nat Example")
+    assert key == cache.make_key("gemini", Posting, " Data Engineer at   Example ")
+    assert key != cache.make_key("gemini-pro", Posting, "Data Engineer at Example")
+    assert key != cache.make_key("gemini", PostingV2, "Data Engineer at Example")
+    assert key != cache.make_key("gemini", Posting, "Data Engineer at Example Corp")
+
+def test_memory_tier_is_bounded_by_entries_and_bytes():
+    cache = LLMCacheService(max_entries=2, max_bytes=1000, ttl_seconds=60)
+    cache._remember("a", {"role": "a"})
+    cache._remember("b", {"role": "b"})
+    asyncio.run(cache.get("a"))  # "b" is now least recently used
+    cache._remember("c", {"role": "c"})
+    assert list(cache._lru) == ["a", "c"]
+
+    cache._remember("big", {"role": "x" * 900})
+    assert "big" in cache._lru and cache.stats()["bytes"] <= 1000
+    # Payloads bigger than the whole tier are never kept
+    cache._remember("huge", {"role": "x" * 2000})
+    assert "huge" not in cache._lru
+
+def test_expired_memory_entries_miss(monkeypatch):
+    cache = LLMCacheService(ttl_seconds=60)
+    cache._remember("a", {"role": "a"})
+    now = time.monotonic()
+    monkeypatch.setattr("app.services.llm_cache_service.time.monotonic", lambda: now + 61)
+    # Mongo isn't initialized here either: the lookup failure is a miss, not an error
+    assert asyncio.run(cache.get("a")) is None
+    assert cache.stats()["entries"] == 0 and cache.misses == 1
+
+def test_mongo_tier_survives_a_cleared_memory_tier(run_with_db):
+    cache = LLMCacheService(ttl_seconds=3600)
+
+    async def main():
+        key = cache.make_key("gemini", Posting, "Data Engineer")
+        await cache.set(key, "gemini", Posting, {"role": "Data Engineer"})
+        cache.clear()
+        assert await cache.get(key) == {"role": "Data Engineer"}
+        assert cache.mongo_hits == 1
+        # Promoted back into memory
+        assert await cache.get(key) == {"role": "Data Engineer"}
+        assert cache.memory_hits == 1
+
+        stale = cache.make_key("gemini", Posting, "Old posting")
+        await LLMCacheEntry(key=stale, model_name="gemini", schema_hash="x", payload={"role": "old"}, created_at=datetime.now(timezone.utc) - timedelta(hours=2)).insert()
+        assert await cache.get(stale) is None
+
+    run_with_db(main)
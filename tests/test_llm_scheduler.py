@@ -0,0 +1,287 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.llm_scheduler import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    CircuitBreaker,
+    LLMScheduler,
+    LLMUnavailableError,
+)
+
+class Throttled(Exception):
+    code = 429
+
+class BadRequest(Exception):
+    code = 400
+
+class ResourceExhausted(Exception):
+    """Shaped like google-genai's APIError, which may only carry the status name."""
+    status = "RESOURCE_EXHAUSTED"
+
+def make_scheduler(**overrides) -> LLMScheduler:
+    options = dict(
+        requests_per_minute=10_000,
+        tokens_per_minute=10_000_000,
+        max_concurrency=8,
+        min_concurrency=1,
+        max_retries=3,
+        retry_base_seconds=0.001,
+        retry_max_seconds=0.001,
+        failure_threshold=100,
+        reset_seconds=60,
+    )
+    options.update(overrides)
+    return LLMScheduler(**options)
+
+def failing(*errors):
+    """Coroutine factory raising the given errors in turn, then returning "ok"."""
+    remaining = list(errors)
+
+    async def call():
+        if remaining:
+            raise remaining.pop(0)
+        return "ok"
+    return call
+
+async def succeed():
+    return "ok"
+
+def test_throttle_halves_concurrency_limit():
+    scheduler = make_scheduler()
+
+    async def main():
+        return await scheduler.run(failing(Throttled("429 RESOURCE_EXHAUSTED")))
+
+    assert asyncio.run(main()) == "ok"
+    assert scheduler.throttled == 1
+    assert scheduler.retries == 1
+    # 8 halved to 4, then one success adds 1/4
+    assert scheduler.concurrency_limit == pytest.approx(4.25)
+
+def test_throttle_stops_at_min_concurrency():
+    scheduler = make_scheduler(min_concurrency=2, max_retries=5)
+
+    async def main():
+        await scheduler.run(failing(*[Throttled("rate limit")] * 6))
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(main())
+    assert scheduler.throttled == 6
+    assert scheduler.concurrency_limit == 2
+    assert scheduler.failed == 1
+
+def test_throttle_detected_from_status_name():
+    scheduler = make_scheduler()
+
+    async def main():
+        return await scheduler.run(failing(ResourceExhausted("quota exceeded")))
+
+    assert asyncio.run(main()) == "ok"
+    assert scheduler.throttled == 1
+
+def test_429_in_message_alone_is_not_a_throttle():
+    scheduler = make_scheduler()
+
+    async def main():
+        await scheduler.run(failing(ValueError("invoice 429 has no total")))
+
+    with pytest.raises(ValueError):
+        asyncio.run(main())
+    assert scheduler.throttled == 0
+    assert scheduler.retries == 0
+
+def test_throttles_do_not_open_the_circuit():
+    scheduler = make_scheduler(failure_threshold=3, max_retries=4)
+
+    async def main():
+        await scheduler.run(failing(*[Throttled("429")] * 5))
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(main())
+    assert scheduler.throttled == 5
+    assert scheduler.breaker.state == CircuitBreaker.CLOSED
+    assert scheduler.breaker.failures == 0
+
+def test_cancelled_trial_call_frees_the_half_open_slot():
+    scheduler = make_scheduler(failure_threshold=1, reset_seconds=0.01, max_retries=0)
+
+    async def hang():
+        await asyncio.Event().wait()
+
+    async def main():
+        with pytest.raises(LLMUnavailableError):
+            await scheduler.run(failing(ConnectionError("down")))
+        await asyncio.sleep(0.02)
+        trial = asyncio.create_task(scheduler.run(hang))
+        await asyncio.sleep(0.01)
+        assert scheduler.breaker.trial_in_flight
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert not scheduler.breaker.trial_in_flight
+        return await scheduler.run(succeed)
+
+    assert asyncio.run(main()) == "ok"
+    assert scheduler.breaker.state == CircuitBreaker.CLOSED
+    assert scheduler.in_flight == 0
+
+def test_successes_recover_limit_additively():
+    scheduler = make_scheduler()
+    scheduler.concurrency_limit = 2.0
+
+    async def main():
+        limits = []
+        for _ in range(6):
+            await scheduler.run(succeed)
+            limits.append(scheduler.concurrency_limit)
+        return limits
+
+    limits = asyncio.run(main())
+    # Roughly one extra slot per window of `limit` successes, never a jump
+    assert limits == sorted(limits)
+    assert limits[0] == pytest.approx(2.5)
+    assert int(limits[1]) == 2 and int(limits[-1]) == 4
+    assert all(later - earlier <= 0.5 for earlier, later in zip(limits, limits[1:]))
+
+def test_recovery_is_capped_at_max_concurrency():
+    scheduler = make_scheduler(max_concurrency=3)
+    scheduler.concurrency_limit = 1.0
+
+    async def main():
+        for _ in range(50):
+            await scheduler.run(succeed)
+
+    asyncio.run(main())
+    assert scheduler.concurrency_limit == 3
+
+def test_non_retryable_error_is_raised_unchanged():
+    scheduler = make_scheduler(failure_threshold=1)
+
+    async def main():
+        await scheduler.run(failing(BadRequest("invalid argument")))
+
+    with pytest.raises(BadRequest):
+        asyncio.run(main())
+    assert scheduler.retries == 0
+    assert scheduler.breaker.state == CircuitBreaker.CLOSED
+
+def test_circuit_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0.05)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert 0 < breaker.retry_after() <= 0.05
+
+    time.sleep(0.06)
+    # One trial call goes through, everyone else keeps failing fast
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow()
+    assert breaker.opened == 1
+
+def test_failed_trial_reopens_circuit():
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=0.05)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.opened == 2
+
+def test_open_circuit_rejects_without_calling_model():
+    scheduler = make_scheduler(failure_threshold=2, max_retries=1)
+    calls = []
+
+    async def unavailable():
+        calls.append(1)
+        raise ConnectionError("connection reset")
+
+    async def main():
+        with pytest.raises(LLMUnavailableError):
+            await scheduler.run(unavailable)
+        with pytest.raises(LLMUnavailableError) as rejected:
+            await scheduler.run(unavailable)
+        return rejected.value
+
+    error = asyncio.run(main())
+    assert len(calls) == 2
+    assert scheduler.breaker.state == CircuitBreaker.OPEN
+    assert scheduler.rejected == 1
+    assert error.retry_after > 0
+
+def test_waiters_run_in_priority_order():
+    scheduler = make_scheduler(max_concurrency=1)
+    order = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+            return "blocker"
+
+        def record(name):
+            async def call():
+                order.append(name)
+                return name
+            return call
+
+        running = asyncio.create_task(scheduler.run(blocker))
+        await asyncio.sleep(0)
+        assert scheduler.in_flight == 1
+
+        waiting = [
+            asyncio.create_task(scheduler.run(record("batch-1"), priority=PRIORITY_BATCH)),
+            asyncio.create_task(scheduler.run(record("batch-2"), priority=PRIORITY_BATCH)),
+            asyncio.create_task(scheduler.run(record("interactive"), priority=PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queued"] == 3
+
+        release.set()
+        await asyncio.gather(running, *waiting)
+
+    asyncio.run(main())
+    # Interactive jumps the queue; equal priorities stay first come, first served
+    assert order == ["interactive", "batch-1", "batch-2"]
+    assert scheduler.in_flight == 0
+
+def test_cancelled_waiter_gives_up_its_place():
+    scheduler = make_scheduler(max_concurrency=1)
+    order = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def blocker():
+            await release.wait()
+
+        async def call():
+            order.append("after")
+
+        running = asyncio.create_task(scheduler.run(blocker))
+        await asyncio.sleep(0)
+        cancelled = asyncio.create_task(scheduler.run(call))
+        waiting = asyncio.create_task(scheduler.run(call, priority=PRIORITY_BATCH))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        release.set()
+        await asyncio.gather(running, waiting)
+        assert cancelled.cancelled()
+
+    asyncio.run(main())
+    assert order == ["after"]
+    assert scheduler.in_flight == 0
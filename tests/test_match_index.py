@@ -0,0 +1,149 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.matching_service import MAX, MEAN, MatchIndex, MatchingService, normalize_rows
+
+def unit(*values: float) -> list:
+    vector = np.array(values, dtype=np.float32)
+    return list(vector / np.linalg.norm(vector))
+
+# Two requirements along the x and y axes
+QUERIES = np.array([[1, 0, 0], [0, 1, 0]], dtype=np.float32)
+
+@pytest.fixture
+def index():
+    # Rows deliberately interleaved across resumes
+    resume_ids = ["both", "x-only", "both", "y-weak", "x-only"]
+    embeddings = np.array([
+        unit(1, 0, 0),       # both: matches x
+        unit(1, 0.1, 0),     # x-only
+        unit(0, 1, 0),       # both: matches y
+        unit(0.3, 0.5, 1),   # y-weak
+        unit(0.9, 0, 0.1),   # x-only
+    ], dtype=np.float32)
+    return MatchIndex(resume_ids, embeddings)
+
+def test_rows_are_grouped_by_resume(index):
+    assert index.resume_ids == ["both", "x-only", "y-weak"]
+    assert index.offsets.tolist() == [0, 2, 4]
+    assert index.chunk_count == 5
+    assert index.resume_count == 3
+    assert index.matrix.flags["C_CONTIGUOUS"]
+    assert index.nbytes == 5 * 3 * 4
+
+def test_mean_rewards_covering_every_requirement(index):
+    matches = index.top_k(QUERIES, k=3, aggregate=MEAN)
+    assert [resume_id for resume_id, _, _ in matches] == ["both", "x-only", "y-weak"]
+    resume_id, score, per_requirement = matches[0]
+    assert score == pytest.approx(1.0)
+    assert per_requirement == [1.0, 1.0]
+
+def test_max_rewards_one_strong_hit(index):
+    matches = dict((resume_id, score) for resume_id, score, _ in index.top_k(QUERIES, k=3, aggregate=MAX))
+    assert matches["both"] == pytest.approx(1.0)
+    assert matches["x-only"] == pytest.approx(float(unit(1, 0.1, 0)[0]))
+    assert matches["x-only"] > matches["y-weak"]
+
+def test_scores_match_brute_force(index):
+    rng = np.random.default_rng(7)
+    queries = rng.standard_normal((4, 3)).astype(np.float32)
+    matches = index.top_k(queries, k=3)
+    normalized = normalize_rows(queries.copy())
+    owners = np.repeat(index.resume_ids, np.diff(np.r_[index.offsets, index.chunk_count]))
+    for resume_id, score, per_requirement in matches:
+        expected = np.max(index.matrix[owners == resume_id] @ normalized.T, axis=0)
+        assert per_requirement == pytest.approx(expected.tolist(), abs=1e-4)
+        assert score == pytest.approx(float(expected.mean()), abs=1e-5)
+
+def test_top_k_limits_and_orders(index):
+    matches = index.top_k(QUERIES, k=2)
+    assert len(matches) == 2
+    assert matches[0][1] >= matches[1][1]
+    assert len(index.top_k(QUERIES, k=10)) == 3
+
+def test_larger_pool_agrees_with_full_sort():
+    rng = np.random.default_rng(0)
+    resume_ids = [f"resume-{index}" for index in rng.integers(0, 200, size=1500)]
+    index = MatchIndex(resume_ids, rng.standard_normal((1500, 16)).astype(np.float32))
+    queries = rng.standard_normal((5, 16)).astype(np.float32)
+    everything = index.top_k(queries, k=index.resume_count)
+    top = index.top_k(queries, k=10)
+    assert [resume_id for resume_id, _, _ in top] == [resume_id for resume_id, _, _ in everything[:10]]
+    scores = [score for _, score, _ in everything]
+    assert scores == sorted(scores, reverse=True)
+
+def test_caller_embeddings_are_not_modified():
+    embeddings = np.array([[3, 4]], dtype=np.float32)
+    MatchIndex(["a"], embeddings)
+    assert embeddings.tolist() == [[3, 4]]
+
+def test_zero_vectors_score_zero():
+    index = MatchIndex(["a", "b"], np.array([[0, 0], [1, 0]], dtype=np.float32))
+    matches = dict((resume_id, score) for resume_id, score, _ in index.top_k(np.array([[1, 0]], dtype=np.float32), k=2))
+    assert matches == {"b": pytest.approx(1.0), "a": 0.0}
+
+@pytest.mark.parametrize("queries, k", [(np.zeros((0, 3), dtype=np.float32), 5), (QUERIES, 0)])
+def test_empty_requests_return_nothing(index, queries, k):
+    assert index.top_k(queries, k) == []
+
+def test_empty_index():
+    index = MatchIndex([], np.zeros((0, 3), dtype=np.float32))
+    assert index.resume_count == 0
+    assert index.top_k(QUERIES, k=5) == []
+
+def test_unknown_aggregate_is_rejected(index):
+    with pytest.raises(ValueError):
+        index.top_k(QUERIES, k=1, aggregate="median")
+
+class FakeRag:
+    """Stands in for the vector store: `size` changes when "another process" writes."""
+    def __init__(self):
+        self.version = 0
+        self.size = 1
+        self.size_checks = 0
+
+    def resume_store_size(self):
+        self.size_checks += 1
+        return self.size
+
+    def resume_embeddings(self):
+        return ["a"] * self.size, np.ones((self.size, 3), dtype=np.float32)
+
+    async def run(self, fn, *args):
+        return fn(*args)
+
+@pytest.mark.parametrize("mode, sees_other_writers", [("http", True), ("persistent", False)])
+def test_index_rebuilds_only_when_the_store_changed(monkeypatch, mode, sees_other_writers):
+    monkeypatch.setattr("app.services.matching_service.settings.CHROMA_MODE", mode)
+    rag = FakeRag()
+    service = MatchingService(rag=rag, refresh_seconds=0)
+
+    async def main():
+        await service.get_index()
+        await service.get_index()
+        assert service.builds == 1
+        rag.version += 1
+        await service.get_index()
+        assert service.builds == 2
+        # Another worker adds resume chunks to the shared store
+        rag.size = 3
+        index = await service.get_index()
+        assert service.builds == (3 if sees_other_writers else 2)
+        assert index.chunk_count == (3 if sees_other_writers else 1)
+
+    asyncio.run(main())
+    assert (rag.size_checks > 0) == sees_other_writers
+
+def test_index_is_not_rechecked_within_the_refresh_interval():
+    rag = FakeRag()
+    service = MatchingService(rag=rag, refresh_seconds=60)
+
+    async def main():
+        await service.get_index()
+        rag.version += 1
+        await service.get_index()
+
+    asyncio.run(main())
+    assert service.builds == 1
@@ -0,0 +1,184 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import threading
+
+import pytest
+
+from app.services.crawl_cache_service import CrawlCacheService
+from app.services.page_fetch_service import BROWSER, STATIC, PageFetchService
+
+PARAGRAPH = "We are hiring a backend engineer to build and operate our Python services. " * 20
+STATIC_PAGE = f"<html><body><nav>Jobs</nav><main><h1>Backend Engineer</h1><p>{PARAGRAPH}</p></main></body></html>"
+SHELL_PAGE = "<html><body><div id='root'></div><noscript>You need to enable JavaScript to run this app.</noscript><script>render()</script></body></html>"
+RENDERED_PAGE = "<html><body><main>rendered by the browser</main></body></html>"
+MAX_BYTES = 64 * 1024
+
+class Handler(BaseHTTPRequestHandler):
+    routes = {
+        "/static": (200, "text/html; charset=utf-8", STATIC_PAGE),
+        "/shell": (200, "text/html; charset=utf-8", SHELL_PAGE),
+        "/plain": (200, "text/plain", PARAGRAPH),
+        "/huge": (200, "text/html", STATIC_PAGE + "<!-- padding -->" * (MAX_BYTES // 8)),
+    }
+
+    # Pages served with an ETag, answering 304 when it is sent back
+    tagged = {"/tagged-static": STATIC_PAGE, "/tagged-shell": SHELL_PAGE}
+
+    def do_GET(self):
+        self.server.hits.append(self.path)
+        if self.path in self.tagged:
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            payload = self.tagged[self.path].encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+        if self.path == "/redirect":
+            self.send_response(302)
+            self.send_header("Location", "/static")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/chunked":
+            # No Content-Length, so the cap has to be enforced while reading
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for _ in range(MAX_BYTES // 1024 + 8):
+                self.wfile.write(b"<p>" + b"x" * 1021 + b"\n")
+            return
+        status, content_type, body = self.routes.get(self.path, (404, "text/html", "<html><body>missing</body></html>"))
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+class FakeBrowser:
+    def __init__(self):
+        self.urls = []
+
+    async def fetch_html(self, url: str) -> str:
+        self.urls.append(url)
+        return RENDERED_PAGE
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    httpd.hits = []
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+@pytest.fixture
+def base_url(server):
+    server.hits.clear()
+    return f"http://127.0.0.1:{server.server_address[1]}"
+
+@pytest.fixture
+def browser():
+    return FakeBrowser()
+
+@pytest.fixture
+def fetcher(browser, monkeypatch):
+    monkeypatch.setattr("app.services.page_fetch_service.settings.CRAWL_CACHE_ENABLED", False)
+    return PageFetchService(browser=browser, min_text_chars=200, max_bytes=MAX_BYTES)
+
+def fetch(fetcher: PageFetchService, *urls: str):
+    async def main():
+        try:
+            return [await fetcher.fetch_html(url) for url in urls]
+        finally:
+            await fetcher.stop()
+    return asyncio.run(main())
+
+def test_server_rendered_page_skips_browser(fetcher, browser, base_url):
+    [html] = fetch(fetcher, f"{base_url}/static")
+    assert html == STATIC_PAGE
+    assert browser.urls == []
+    assert fetcher.stats()["static_fetches"] == 1
+    assert fetcher._mode_for("127.0.0.1") == STATIC
+
+def test_js_shell_falls_back_to_browser(fetcher, browser, base_url):
+    [html] = fetch(fetcher, f"{base_url}/shell")
+    assert html == RENDERED_PAGE
+    assert browser.urls == [f"{base_url}/shell"]
+    assert fetcher.stats()["static_rejected"] == 1
+
+def test_browser_decision_is_remembered_per_domain(fetcher, browser, base_url, server):
+    fetch(fetcher, f"{base_url}/shell", f"{base_url}/static")
+    # The second page on the same host goes straight to the browser, without a static probe
+    assert browser.urls == [f"{base_url}/shell", f"{base_url}/static"]
+    assert server.hits == ["/shell"]
+    assert fetcher._mode_for("127.0.0.1") == BROWSER
+
+def test_non_html_and_error_responses_fall_back(fetcher, browser, base_url, server):
+    fetch(fetcher, f"{base_url}/plain", f"{base_url}/missing", f"{base_url}/static")
+    assert browser.urls == [f"{base_url}/plain", f"{base_url}/missing"]
+    # Neither says anything about the rest of the domain
+    assert server.hits == ["/plain", "/missing", "/static"]
+    assert fetcher._mode_for("127.0.0.1") == STATIC
+
+def test_redirect_is_followed(fetcher, browser, base_url, server):
+    [html] = fetch(fetcher, f"{base_url}/redirect")
+    assert html == STATIC_PAGE
+    assert server.hits == ["/redirect", "/static"]
+    assert browser.urls == []
+
+@pytest.mark.parametrize("path", ["/huge", "/chunked"])
+def test_oversized_body_is_abandoned(fetcher, browser, base_url, path):
+    [html] = fetch(fetcher, f"{base_url}{path}")
+    assert html == RENDERED_PAGE
+    assert browser.urls == [f"{base_url}{path}"]
+    assert fetcher.stats()["static_oversized"] == 1
+    assert fetcher._mode_for("127.0.0.1") is None
+
+def test_unreachable_host_falls_back(fetcher, browser):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    port = server.server_address[1]
+    server.server_close()
+    [html] = fetch(fetcher, f"http://127.0.0.1:{port}/static")
+    assert html == RENDERED_PAGE
+    assert fetcher._mode_for("127.0.0.1") is None
+
+def test_has_enough_content(fetcher):
+    assert fetcher.has_enough_content(STATIC_PAGE)
+    assert not fetcher.has_enough_content(SHELL_PAGE)
+    # Long enough text next to a JavaScript notice is a real page with a banner
+    assert fetcher.has_enough_content(f"<html><body><main><p>Please enable JavaScript.</p><p>{PARAGRAPH * 2}</p></main></body></html>")
+    # Scripts don't count as content
+    assert not fetcher.has_enough_content(f"<html><body><script>{PARAGRAPH}</script></body></html>")
+
+@pytest.fixture
+def cached_fetcher(browser, tmp_path):
+    cache = CrawlCacheService(directory=str(tmp_path / "crawl"), fresh_seconds=0, flush_seconds=0)
+    return PageFetchService(browser=browser, crawl_cache=cache, min_text_chars=200, max_bytes=MAX_BYTES)
+
+def test_static_page_is_revalidated_from_the_cache(cached_fetcher, browser, base_url, server):
+    first, second = fetch(cached_fetcher, f"{base_url}/tagged-static", f"{base_url}/tagged-static")
+    assert first == second == STATIC_PAGE
+    assert server.hits == ["/tagged-static", "/tagged-static"]
+    assert cached_fetcher.stats()["revalidated"] == 1
+    assert browser.urls == []
+
+def test_rendered_page_is_not_revalidated_with_the_probe_validators(cached_fetcher, browser, base_url, server):
+    url = f"{base_url}/tagged-shell"
+    first, second = fetch(cached_fetcher, url, url)
+    assert first == second == RENDERED_PAGE
+    # The second fetch goes back to the browser instead of trusting a 304 for the static shell
+    assert browser.urls == [url, url]
+    assert cached_fetcher.stats()["revalidated"] == 0
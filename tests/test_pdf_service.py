@@ -0,0 +1,86 @@
+from io import BytesIO
+import asyncio
+
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from app.services.pdf_service import PdfService, PdfTooLargeError
+
+def make_pdf(texts) -> bytes:
+    """A PDF with one line of Helvetica text per page."""
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    for text in texts:
+        page = writer.add_blank_page(612, 792)
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1"))
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})})
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+PAGES = [f"Page {number} text" for number in range(1, 8)]
+
+@pytest.fixture(scope="module")
+def pdf_service():
+    service = PdfService(max_workers=2, pages_per_chunk=2, stop_after_chars=10_000_000)
+    yield service
+    service.stop()
+
+def extract(service, source, **options):
+    return asyncio.run(service.extract_pages_from_pdf(source, **options))
+
+def test_pages_come_back_in_order_across_chunks(pdf_service):
+    result = extract(pdf_service, make_pdf(PAGES))
+    assert result.page_count == 7
+    assert result.text.split("\n\f") == PAGES
+    assert [page.page_number for page in result.pages] == list(range(1, 8))
+    assert all(page.characters == len(PAGES[0]) for page in result.pages)
+    assert not result.stopped_early
+
+def test_async_extraction_matches_the_sync_helper(pdf_service):
+    data = make_pdf(PAGES[:3])
+    text = asyncio.run(pdf_service.extract_text_from_pdf_async(data))
+    assert text.replace("\n\f", "\n") == PdfService.extract_text_from_pdf(data)
+
+def test_unreadable_pdf_raises_value_error(pdf_service):
+    with pytest.raises(ValueError, match="Failed to extract text"):
+        extract(pdf_service, b"%PDF-1.7 this is not really a PDF")
+    # The pool is still usable afterwards
+    assert extract(pdf_service, make_pdf(PAGES[:1])).text == PAGES[0]
+
+def test_spooled_file_is_read_by_path(pdf_service, tmp_path):
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(make_pdf(PAGES[:3]))
+    assert extract(pdf_service, str(path)).text.split("\n\f") == PAGES[:3]
+
+def test_extraction_stops_once_enough_text_is_collected(pdf_service):
+    result = extract(pdf_service, make_pdf(PAGES), stop_after_chars=1)
+    # One wave: two workers, two pages each
+    assert result.stopped_early
+    assert result.page_count == 7
+    assert result.text.split("\n\f") == PAGES[:4]
+
+def test_oversized_pdf_is_rejected_before_extraction(tmp_path):
+    data = make_pdf(PAGES)
+    service = PdfService(max_workers=1, max_bytes=len(data) - 1)
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(data)
+    for source in (data, str(path)):
+        with pytest.raises(PdfTooLargeError, match="bytes"):
+            extract(service, source)
+    assert service._executor is None
+
+def test_pdf_with_too_many_pages_is_rejected():
+    service = PdfService(max_workers=1, max_pages=3)
+    try:
+        with pytest.raises(PdfTooLargeError, match="7 pages"):
+            extract(service, make_pdf(PAGES))
+    finally:
+        service.stop()
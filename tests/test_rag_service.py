@@ -0,0 +1,191 @@
+import asyncio
+import threading
+
+import chromadb
+import numpy as np
+import pytest
+from chromadb.config import Settings as ChromaSettings
+
+from app.repositories.lease_repository import LeaseRepository
+from app.services.rag_service import PER_DOCUMENT, RESUME_PREFIX, RESUMES, SHARED, SYNC_LEASE, RagService, VectorKind, chunk_id
+
+class FakeLeases:
+    def __init__(self, free=True):
+        self.free = free
+        self.calls = []
+
+    async def acquire(self, name, holder, seconds):
+        self.calls.append("acquire")
+        return self.free
+
+    async def renew(self, name, holder, seconds):
+        self.calls.append("renew")
+        return True
+
+    async def release(self, name, holder):
+        self.calls.append("release")
+
+def test_sync_lease_is_renewed_while_syncing(monkeypatch):
+    monkeypatch.setattr("app.services.rag_service.settings.CHROMA_SYNC_LEASE_SECONDS", 0.03)
+    rag = RagService()
+    rag.lease_repository = FakeLeases()
+
+    async def slow_sync():
+        await asyncio.sleep(0.1)
+    rag.sync_index = slow_sync
+
+    async def main():
+        await rag._sync_in_background()
+        calls = list(rag.lease_repository.calls)
+        await asyncio.sleep(0.05)
+        # Nothing renews the lease once the sync is over
+        assert rag.lease_repository.calls == calls
+        return calls
+
+    calls = asyncio.run(main())
+    assert calls[0] == "acquire" and calls[-1] == "release"
+    assert calls.count("renew") >= 2
+
+def test_sync_is_skipped_while_another_process_holds_the_lease():
+    rag = RagService()
+    rag.lease_repository = FakeLeases(free=False)
+    synced = []
+
+    async def sync():
+        synced.append(1)
+    rag.sync_index = sync
+
+    asyncio.run(rag._sync_in_background())
+    assert synced == [] and rag.lease_repository.calls == ["acquire"]
+
+def test_lease_renewal_only_extends_our_own_lease(run_with_db):
+    leases = LeaseRepository()
+
+    async def main():
+        assert await leases.acquire(SYNC_LEASE, "worker-1", 60)
+        assert not await leases.acquire(SYNC_LEASE, "worker-2", 60)
+        assert await leases.renew(SYNC_LEASE, "worker-1", 60)
+        assert not await leases.renew(SYNC_LEASE, "worker-2", 60)
+        await leases.release(SYNC_LEASE, "worker-1")
+        assert not await leases.renew(SYNC_LEASE, "worker-1", 60)
+        assert await leases.acquire(SYNC_LEASE, "worker-2", 60)
+
+    run_with_db(main)
+
+@pytest.fixture
+def client(tmp_path):
+    return chromadb.PersistentClient(path=str(tmp_path / "chroma"), settings=ChromaSettings(anonymized_telemetry=False))
+
+def test_migration_leaves_a_prefixed_shared_collection_alone(client, monkeypatch):
+    # A shared resume collection whose name also starts with the per-document prefix
+    monkeypatch.setattr("app.services.rag_service.RESUMES", VectorKind(RESUME_PREFIX, "resume_chunks", "resume_id"))
+    shared = client.create_collection("resume_chunks")
+    shared.add(ids=["r1:summary"], documents=["existing"], metadatas=[{"resume_id": "r1", "type": "summary"}], embeddings=[[1.0, 0.0]])
+    legacy = client.create_collection(f"{RESUME_PREFIX}r2")
+    legacy.add(ids=["summary"], documents=["legacy"], metadatas=[{"type": "summary"}], embeddings=[[0.0, 1.0]])
+
+    rag = RagService(client=client)
+    assert rag.migrate_to_shared_layout() == 1
+    names = {getattr(collection, "name", collection) for collection in client.list_collections()}
+    assert names == {"resume_chunks"}
+    stored = client.get_collection("resume_chunks").get(include=["metadatas"])
+    assert sorted(metadata["resume_id"] for metadata in stored["metadatas"]) == ["r1", "r2"]
+    # Running it again finds nothing left to migrate
+    assert rag.migrate_to_shared_layout() == 0
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def embed(self, texts):
+        self.texts.extend(texts)
+        return [np.array([len(text), 1.0], dtype=np.float32) for text in texts]
+
+def chunks(*texts):
+    metadatas = [{"type": "summary" if index == 0 else "skill"} for index in range(len(texts))]
+    return list(texts), metadatas, [chunk_id(text, metadata) for text, metadata in zip(texts, metadatas)]
+
+@pytest.fixture(params=[SHARED, PER_DOCUMENT])
+def indexed_rag(request, client):
+    rag = RagService(client=client, embedder=CountingEmbedder())
+    rag.layout = request.param
+    return rag
+
+def stored_chunks(rag, document_id):
+    collection = rag._collection_for(RESUMES, document_id)
+    where = {RESUMES.id_key: document_id} if rag.layout == SHARED else None
+    return sorted(collection.get(where=where, include=["documents"])["documents"])
+
+def test_chunk_ids_are_deterministic():
+    assert chunk_id("Python", {"type": "skill"}) == chunk_id("Python", {"type": "skill"})
+    assert chunk_id("Python", {"type": "skill"}).startswith("skill:")
+    assert chunk_id("Python", {"type": "skill"}) != chunk_id("Go", {"type": "skill"})
+    assert chunk_id("Python", {"type": "skill"}) != chunk_id("Python", {"type": "summary"})
+
+def test_rewriting_unchanged_chunks_embeds_nothing(indexed_rag):
+    indexed_rag._write(RESUMES, "r1", *chunks("Backend engineer", "Python", "Mongo"))
+    version = indexed_rag.version
+    indexed_rag.embedder.texts.clear()
+
+    indexed_rag._write(RESUMES, "r1", *chunks("Backend engineer", "Python", "Mongo"))
+    assert indexed_rag.embedder.texts == []
+    assert indexed_rag.version == version
+    assert indexed_rag.chunks_unchanged == 3
+
+def test_only_changed_chunks_are_embedded_and_removed(indexed_rag):
+    indexed_rag._write(RESUMES, "r1", *chunks("Backend engineer", "Python", "Mongo"))
+    indexed_rag._write(RESUMES, "r2", *chunks("Designer", "Figma"))
+    indexed_rag.embedder.texts.clear()
+
+    indexed_rag._write(RESUMES, "r1", *chunks("Backend engineer", "Python", "Postgres"))
+    assert indexed_rag.embedder.texts == ["Postgres"]
+    assert indexed_rag.chunks_deleted == 1
+    assert stored_chunks(indexed_rag, "r1") == ["Backend engineer", "Postgres", "Python"]
+    # Other documents' chunks are left alone
+    assert stored_chunks(indexed_rag, "r2") == ["Designer", "Figma"]
+
+def test_repeated_identical_chunks_are_all_kept(indexed_rag):
+    indexed_rag._write(RESUMES, "r1", *chunks("Summary", "Python", "Python"))
+    assert stored_chunks(indexed_rag, "r1") == ["Python", "Python", "Summary"]
+    indexed_rag.embedder.texts.clear()
+    indexed_rag._write(RESUMES, "r1", *chunks("Summary", "Python", "Python"))
+    assert indexed_rag.embedder.texts == []
+
+def test_blocking_work_runs_off_the_event_loop(client):
+    rag = RagService(client=client, embedder=CountingEmbedder())
+
+    async def main():
+        loop_thread = threading.get_ident()
+        worker_thread = await rag.run(threading.get_ident)
+        assert worker_thread != loop_thread
+        assert rag.in_flight == 0
+        await rag.stop()
+        assert rag._executor is None
+        # A stopped service starts a fresh executor on the next call
+        assert await rag.run(lambda: "again") == "again"
+        await rag.stop()
+
+    asyncio.run(main())
+
+def test_query_many_fans_out_per_document(client):
+    rag = RagService(client=client, embedder=CountingEmbedder())
+    rag._write(RESUMES, "r1", *chunks("Backend engineer", "Python"))
+    rag._write(RESUMES, "r2", *chunks("Designer", "Figma"))
+
+    async def main():
+        try:
+            return await rag.query_many(
+                resume_queries={"r1": ["Python", "Go"], "r2": ["Python"]},
+                jd_queries={"missing": ["Python"]},
+                resume_top_k=1,
+            )
+        finally:
+            await rag.stop()
+
+    results = asyncio.run(main())
+    assert set(results["resumes"]) == {"r1", "r2"}
+    assert results["job_descriptions"] == {"missing": []}
+    # One result list per query text, each limited to the document's own chunks
+    r1 = results["resumes"]["r1"]
+    assert len(r1) == 2 and all(len(part["document"]) == 1 for part in r1)
+    assert all(metadata[RESUMES.id_key] == "r2" for part in results["resumes"]["r2"] for metadata in part["metadata"])
@@ -0,0 +1,136 @@
+import asyncio
+import io
+import os
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.background import BackgroundTask
+
+from app.core.dependencies import get_resume_batch_service
+from app.main import app
+from app.routes.resume_routes import _CleanupStreamingResponse
+from app.services.resume_batch_service import FAILED, expand_uploads
+
+PDF = b"%PDF-1.7\n" + b"0" * 1000
+
+@pytest.fixture(autouse=True)
+def spool_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "spool"
+    directory.mkdir()
+    monkeypatch.setattr("app.core.uploads.settings.UPLOAD_SPOOL_DIR", str(directory))
+    return directory
+
+def write(path, data: bytes) -> str:
+    path.write_bytes(data)
+    return str(path)
+
+def make_zip(path, members, compression=zipfile.ZIP_DEFLATED) -> str:
+    with zipfile.ZipFile(path, "w", compression=compression) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return str(path)
+
+def expand(files, max_files=10, max_file_bytes=10_000, max_expanded_bytes=100_000):
+    return expand_uploads(files, max_files, max_file_bytes, max_expanded_bytes)
+
+def test_pdfs_pass_through_and_other_files_are_rejected(tmp_path):
+    pdf = write(tmp_path / "a.pdf", PDF)
+    text = write(tmp_path / "notes.txt", b"hello")
+    pdfs, rejected, created = expand([("a.pdf", pdf), ("notes.txt", text)])
+    assert pdfs == [("a.pdf", pdf)]
+    assert [result["filename"] for result in rejected] == ["notes.txt"]
+    assert created == []
+
+def test_zip_members_are_inflated_to_spool_files(tmp_path, spool_dir):
+    archive = make_zip(tmp_path / "batch.zip", {
+        "one.pdf": PDF,
+        "nested/two.PDF": PDF,
+        "readme.txt": b"skip me",
+        "__MACOSX/._one.pdf": b"resource fork",
+    })
+    pdfs, rejected, created = expand([("batch.zip", archive)])
+    assert [name for name, _ in pdfs] == ["batch.zip/one.pdf", "batch.zip/nested/two.PDF"]
+    assert rejected == []
+    assert sorted(created) == sorted(path for _, path in pdfs)
+    for path in created:
+        assert os.path.dirname(path) == str(spool_dir)
+        with open(path, "rb") as handle:
+            assert handle.read() == PDF
+
+def test_file_count_and_size_limits(tmp_path):
+    archive = make_zip(tmp_path / "batch.zip", {f"{index}.pdf": PDF for index in range(3)} | {"big.pdf": PDF * 20})
+    pdfs, rejected, created = expand([("batch.zip", archive)], max_files=2, max_file_bytes=5_000)
+    assert len(pdfs) == 2
+    errors = {result["filename"]: result["error"] for result in rejected}
+    assert "Batch is limited to 2 files" in errors["batch.zip/2.pdf"]
+    assert "exceeds 5000 bytes" in errors["batch.zip/big.pdf"]
+    assert all(result["status"] == FAILED for result in rejected)
+
+def test_zip_bomb_stops_at_the_expanded_bytes_budget(tmp_path, spool_dir):
+    # 40 KB of zeros compresses to almost nothing
+    member = b"%PDF-" + b"\0" * 40_000
+    archive = make_zip(tmp_path / "bomb.zip", {f"{index}.pdf": member for index in range(10)})
+    assert os.path.getsize(archive) < 10_000
+
+    pdfs, rejected, created = expand([("bomb.zip", archive)], max_file_bytes=50_000, max_expanded_bytes=100_000)
+    assert len(pdfs) == 2
+    assert len(rejected) == 8
+    assert all("expand to more than 100000 bytes" in result["error"] for result in rejected)
+    assert sum(os.path.getsize(path) for path in created) <= 100_000
+    assert sorted(os.listdir(spool_dir)) == sorted(os.path.basename(path) for path in created)
+
+def test_unreadable_zip_is_rejected(tmp_path):
+    archive = make_zip(tmp_path / "batch.zip", {"one.pdf": PDF})
+    data = open(archive, "rb").read()
+    broken = write(tmp_path / "broken.zip", data[:30] + b"\xff" * 50 + data[80:])
+    _, rejected, created = expand([("broken.zip", broken)])
+    assert rejected and rejected[0]["filename"].startswith("broken.zip")
+    assert created == []
+
+class RecordingBatchService:
+    def __init__(self):
+        self.paths = []
+
+    async def process(self, files):
+        for filename, path in files:
+            self.paths.append(path)
+            assert os.path.exists(path)
+            yield {"filename": filename, "status": "created"}
+        yield {"done": True}
+
+def test_batch_route_removes_spooled_uploads(spool_dir):
+    service = RecordingBatchService()
+    app.dependency_overrides[get_resume_batch_service] = lambda: service
+    try:
+        response = TestClient(app).post("/api/resumes/batch", files=[
+            ("files", ("a.pdf", io.BytesIO(PDF), "application/pdf")),
+            ("files", ("b.pdf", io.BytesIO(PDF), "application/pdf")),
+        ])
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 200
+    assert len(response.text.strip().split("\n")) == 3
+    assert len(service.paths) == 2
+    assert os.listdir(spool_dir) == []
+
+def test_cleanup_runs_when_client_is_gone_before_streaming():
+    cleaned = []
+    started = []
+
+    async def body():
+        started.append(1)
+        yield b"never sent"
+
+    async def send(message):
+        raise OSError("client disconnected")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    response = _CleanupStreamingResponse(body(), background=BackgroundTask(lambda: cleaned.append(1)))
+    scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+    with pytest.raises(Exception):
+        asyncio.run(response(scope, receive, send))
+    assert started == []
+    assert cleaned == [1]
@@ -0,0 +1,105 @@
+import pytest
+
+from app.core.hashing import normalize_text, sha256_text
+from app.models.resume_data import ResumeData
+from app.services.resume_batch_service import CREATED, DUPLICATE, ResumeBatchService
+from app.services.resume_service import ResumeService
+
+class FakePdfService:
+    """Maps uploaded bytes (or a spooled file's bytes) to the text a PDF would yield."""
+    max_workers = 1
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.calls = 0
+
+    async def extract_text_from_pdf_async(self, source):
+        self.calls += 1
+        if isinstance(source, str):
+            with open(source, "rb") as handle:
+                source = handle.read()
+        return self.texts[bytes(source)]
+
+class FakeLLM:
+    def __init__(self):
+        self.inputs = []
+
+    async def extract_resume_data(self, text, priority=None):
+        self.inputs.append(text)
+        return ResumeData(full_name=f"Candidate {len(self.inputs)}", summary=text)
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr("app.services.resume_service.settings.RESUME_HEURISTICS_ENABLED", False)
+    # Indexing is covered elsewhere; keep these tests to Mongo
+    monkeypatch.setattr("app.services.resume_service.rag_service.index_in_background", lambda **kwargs: None)
+    monkeypatch.setattr("app.services.resume_batch_service.rag_service.index_in_background", lambda **kwargs: None)
+    llm = FakeLLM()
+    service = ResumeService(llm_service=llm)
+    service.pdf_service = FakePdfService({
+        b"%PDF-ada-v1": "Ada Lovelace\nAnalyst",
+        b"%PDF-ada-v2": "ADA   LOVELACE\n\nanalyst ",
+        b"%PDF-scan-1": "",
+        b"%PDF-scan-2": " \n\f ",
+    })
+    return service
+
+def test_cosmetic_text_changes_hash_the_same():
+    assert sha256_text("Ada Lovelace\nAnalyst") == sha256_text("  ada   LOVELACE analyst")
+    assert normalize_text(" \n\f ") == ""
+
+def test_same_bytes_return_the_stored_resume(service, run_with_db):
+    async def main():
+        first = await service.extract_and_save_resume(b"%PDF-ada-v1")
+        second = await service.extract_and_save_resume(b"%PDF-ada-v1")
+        assert second.id == first.id
+        assert service.pdf_service.calls == 1
+        assert len(service.llm_service.inputs) == 1
+
+    run_with_db(main)
+
+def test_re_exported_pdf_reuses_the_extraction(service, run_with_db):
+    async def main():
+        first = await service.extract_and_save_resume(b"%PDF-ada-v1")
+        second = await service.extract_and_save_resume(b"%PDF-ada-v2")
+        assert second.id != first.id
+        assert second.text_hash == first.text_hash
+        assert second.content == first.content
+        assert len(service.llm_service.inputs) == 1
+
+    run_with_db(main)
+
+def test_pdfs_without_text_are_not_deduped_together(service, run_with_db):
+    async def main():
+        first = await service.extract_and_save_resume(b"%PDF-scan-1")
+        second = await service.extract_and_save_resume(b"%PDF-scan-2")
+        assert first.text_hash is None and second.text_hash is None
+        assert second.id != first.id
+        # Each one got its own extraction instead of the first one's
+        assert len(service.llm_service.inputs) == 2
+        assert second.content.full_name != first.content.full_name
+
+    run_with_db(main)
+
+def test_batch_dedupes_by_text_but_not_empty_text(service, run_with_db, tmp_path):
+    def spool(name, data):
+        path = tmp_path / name
+        path.write_bytes(data)
+        return name, str(path)
+
+    async def main():
+        stored = await service.extract_and_save_resume(b"%PDF-ada-v1")
+        batch = ResumeBatchService(service, pdf_concurrency=2, llm_concurrency=2, insert_size=10, insert_max_wait=0.01)
+        files = [spool("ada.pdf", b"%PDF-ada-v2"), spool("scan-1.pdf", b"%PDF-scan-1"), spool("scan-2.pdf", b"%PDF-scan-2"), spool("copy.pdf", b"%PDF-ada-v1")]
+        results = {result["filename"]: result async for result in batch.process(files) if "filename" in result}
+
+        assert results["copy.pdf"]["status"] == DUPLICATE
+        assert results["copy.pdf"]["resume_id"] == str(stored.id)
+        # Same text as the stored resume: a new resume, but no new LLM call for it
+        assert results["ada.pdf"]["status"] == CREATED
+        assert results["scan-1.pdf"]["status"] == CREATED
+        assert results["scan-2.pdf"]["status"] == CREATED
+        assert results["scan-1.pdf"]["resume_id"] != results["scan-2.pdf"]["resume_id"]
+        assert len(service.llm_service.inputs) == 3
+
+    run_with_db(main)
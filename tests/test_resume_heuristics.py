@@ -0,0 +1,87 @@
+import pytest
+
+from app.models.resume_data import ResumeData
+from app.services.resume_heuristics import PREAMBLE, ResumeHeuristicParser
+
+RESUME = "\n".join([
+    "JANE DOE",
+    "jane.doe@example.com | +1 (555) 123-4567 | linkedin.com/in/janedoe",
+    "",
+    "Skills:",
+    "Languages: Python, Go; SQL",
+    "• Docker | Kubernetes | python",
+    "",
+    "Education",
+    "BSc Computer Science",
+    "University of Somewhere, 2012 - 2016",
+    "Imperial College London (2017)",
+])
+
+@pytest.fixture
+def parser():
+    return ResumeHeuristicParser(min_confidence=0.8)
+
+def test_sections_are_split_on_known_headings(parser):
+    sections = parser.segment("Jane Doe\nWork Experience:\nAcme\nTECHNICAL SKILLS\nPython")
+    assert sections == {PREAMBLE: "Jane Doe", "experience": "Work Experience:\nAcme", "skills": "TECHNICAL SKILLS\nPython"}
+
+def test_contact_skills_and_education_are_extracted(parser):
+    result = parser.parse(RESUME)
+    assert result.fields["full_name"] == "Jane Doe"
+    assert result.fields["contact"] == {
+        "email": "jane.doe@example.com",
+        "phone": "+1 (555) 123-4567",
+        "website": "linkedin.com/in/janedoe",
+        "location": None,
+    }
+    assert result.fields["skills"] == ["Python", "Go", "SQL", "Docker", "Kubernetes"]
+    assert result.fields["education"] == [
+        {"institution": "University of Somewhere", "degree": "BSc Computer Science", "date": "2012 - 2016"},
+        {"institution": "Imperial College London", "degree": None, "date": "2017"},
+    ]
+    assert result.contact_only_preamble
+    assert result.handled_sections == ["skills", "education"]
+    assert parser.can_skip_llm(result)
+
+def test_unhandled_sections_are_left_for_the_llm(parser):
+    result = parser.parse(RESUME + "\nExperience\nAcme Corp, Engineer, 2016 - present")
+    assert not parser.can_skip_llm(result)
+    assert result.remaining_sections() == ["experience"]
+    assert result.llm_input().startswith("JANE DOE")
+    assert "Acme Corp" in result.llm_input()
+    assert "Kubernetes" not in result.llm_input()
+
+def test_resume_without_headings_keeps_the_preamble(parser):
+    result = parser.parse("Jane Doe\njane@example.com\nBuilt payment systems at Acme for six years")
+    assert not result.contact_only_preamble
+    assert result.remaining_sections() == [PREAMBLE]
+
+@pytest.mark.parametrize("first_line", ["Curriculum Vitae", "Senior Software Engineer", "Experience"])
+def test_titles_are_not_taken_for_names(parser, first_line):
+    result = parser.parse(f"{first_line}\njane@example.com")
+    assert "full_name" not in result.fields
+
+def test_document_title_is_skipped_before_the_name(parser):
+    assert parser.parse("Resume\nAda Lovelace\nada@example.com").fields["full_name"] == "Ada Lovelace"
+
+def test_ambiguous_contact_and_thin_sections_are_not_trusted(parser):
+    result = parser.parse("Jane Doe\na@example.com b@example.com\nSkills\nPython\nEducation\nSelf taught")
+    assert result.confidence["contact"] == 0.6
+    assert result.confidence["skills"] < 0.8
+    assert result.confidence["education"] == 0.0
+    assert result.handled_sections == []
+
+def test_apply_overlays_confident_fields_but_keeps_the_llm_name(parser):
+    result = parser.parse(RESUME)
+    llm = ResumeData(full_name="Jane A. Doe", skills=["python"], contact={"location": "Berlin"})
+    merged = parser.apply(result, llm)
+    assert merged.full_name == "Jane A. Doe"
+    assert merged.skills == result.fields["skills"]
+    assert merged.contact.location == "Berlin"
+    assert merged.contact.email == "jane.doe@example.com"
+    assert [entry.institution for entry in merged.education] == ["University of Somewhere", "Imperial College London"]
+
+def test_apply_without_llm_output_builds_from_rules(parser):
+    merged = parser.apply(parser.parse(RESUME))
+    assert merged.full_name == "Jane Doe"
+    assert merged.experience == []
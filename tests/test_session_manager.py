@@ -0,0 +1,60 @@
+import asyncio
+import time
+
+import pytest
+from google.adk.events import Event
+
+from app.services.session_manager import SessionManager
+
+def test_ephemeral_sessions_leave_nothing_behind():
+    manager = SessionManager(max_events=10, ttl_seconds=60, sweep_interval=60)
+
+    async def main():
+        async with manager.ephemeral_session("extractor", "worker") as first:
+            async with manager.ephemeral_session("extractor", "worker") as second:
+                assert first.id != second.id
+                assert manager.stats()["live_sessions"] == 2
+        return manager.session_service.sessions
+
+    assert asyncio.run(main()) == {}
+    assert manager.created == manager.deleted == 2
+
+def test_session_is_deleted_when_the_caller_fails():
+    manager = SessionManager()
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            async with manager.ephemeral_session("extractor", "worker"):
+                raise RuntimeError("model call failed")
+
+    asyncio.run(main())
+    assert manager.stats()["live_sessions"] == 0
+
+def test_event_history_is_capped():
+    manager = SessionManager(max_events=3)
+
+    async def main():
+        async with manager.ephemeral_session("extractor", "worker") as session:
+            for index in range(5):
+                await manager.session_service.append_event(session, Event(author=f"agent-{index}"))
+            stored = await manager.session_service.get_session(app_name="extractor", user_id="worker", session_id=session.id)
+            return session, stored
+
+    session, stored = asyncio.run(main())
+    assert [event.author for event in session.events] == ["agent-2", "agent-3", "agent-4"]
+    assert len(stored.events) == 3
+
+def test_sweep_evicts_only_stale_sessions():
+    manager = SessionManager(ttl_seconds=60)
+
+    async def main():
+        service = manager.session_service
+        await service.create_session(app_name="extractor", user_id="worker", session_id="stale")
+        await service.create_session(app_name="extractor", user_id="worker", session_id="live")
+        service.sessions["extractor"]["worker"]["stale"].last_update_time = time.time() - 120
+        assert await manager.sweep() == 1
+        return list(service.sessions["extractor"]["worker"])
+
+    remaining = asyncio.run(main())
+    assert remaining == ["live"]
+    assert manager.evicted == 1
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def extract():
+            calls.append(1)
+            await release.wait()
+            return {"name": "Ada"}
+
+        waiters = [asyncio.create_task(flight.do("same-hash", extract)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flight.in_flight == 1
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 4}
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+
+    async def main():
+        async def echo(value):
+            await asyncio.sleep(0)
+            return value
+        return await asyncio.gather(flight.do("a", lambda: echo("a")), flight.do("b", lambda: echo("b")))
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert flight.executions == 2
+    assert flight.coalesced == 0
+
+def test_finished_call_is_not_reused():
+    flight = SingleFlight()
+    calls = []
+
+    async def main():
+        async def extract():
+            calls.append(1)
+            return len(calls)
+        return [await flight.do("key", extract), await flight.do("key", extract)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight()
+    attempts = []
+
+    async def main():
+        async def flaky():
+            attempts.append(1)
+            await asyncio.sleep(0)
+            if len(attempts) == 1:
+                raise ValueError("model returned garbage")
+            return "ok"
+
+        results = await asyncio.gather(flight.do("key", flaky), flight.do("key", flaky), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.in_flight == 0
+        return await flight.do("key", flaky)
+
+    assert asyncio.run(main()) == "ok"
+    assert len(attempts) == 2
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flight = SingleFlight()
+
+    async def main():
+        release = asyncio.Event()
+
+        async def extract():
+            await release.wait()
+            return "done"
+
+        first = asyncio.create_task(flight.do("key", extract))
+        second = asyncio.create_task(flight.do("key", extract))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+    assert flight.in_flight == 0
+
+def test_work_finishes_after_every_caller_is_cancelled():
+    flight = SingleFlight()
+    finished = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def extract():
+            await release.wait()
+            finished.append(1)
+
+        caller = asyncio.create_task(flight.do("key", extract))
+        await asyncio.sleep(0)
+        caller.cancel()
+        release.set()
+        await asyncio.sleep(0.01)
+
+    asyncio.run(main())
+    assert finished == [1]
+    assert flight.in_flight == 0
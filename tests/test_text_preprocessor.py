@@ -0,0 +1,111 @@
+import pytest
+
+from app.services.text_preprocessor import MAP_REDUCE, PAGE_BREAK, TRUNCATE, TextPreprocessor
+
+def page(*lines: str) -> str:
+    return "\n".join(lines)
+
+@pytest.fixture
+def preprocessor():
+    return TextPreprocessor(max_input_tokens=8000, strategy=TRUNCATE, chars_per_token=4.0)
+
+def test_unknown_strategy_is_rejected():
+    with pytest.raises(ValueError):
+        TextPreprocessor(strategy="summarize")
+
+def test_count_tokens_rounds_up(preprocessor):
+    assert preprocessor.count_tokens("") == 0
+    assert preprocessor.count_tokens("abcd") == 1
+    assert preprocessor.count_tokens("abcde") == 2
+
+def test_normalize_whitespace_and_hyphenation(preprocessor):
+    text = "Senior  Soft-\nware Engineer\r\n\r\n\r\n\r\nBuilt\tthings  "
+    assert preprocessor.normalize(text) == "Senior Software Engineer\n\nBuilt things"
+
+def test_normalize_keeps_page_breaks(preprocessor):
+    assert preprocessor.normalize(" one \f two ") == f"one{PAGE_BREAK}two"
+
+def test_running_header_and_page_numbers_are_dropped(preprocessor):
+    text = PAGE_BREAK.join([
+        page("Jane Doe - Resume", "Experience", "Built the billing system", "Page 1 of 3"),
+        page("Jane Doe - Resume", "Led the data team", "Page 2 of 3"),
+        page("Jane Doe - Resume", "Education", "BSc Computer Science", "3"),
+    ])
+    deduped, removed = preprocessor.dedupe_repeated_lines(text)
+    lines = deduped.split("\n")
+    assert lines.count("Jane Doe - Resume") == 1
+    assert not any(line.startswith("Page") for line in lines)
+    assert "3" not in lines
+    assert removed == 5
+
+def test_dates_in_page_body_are_kept(preprocessor):
+    text = PAGE_BREAK.join([
+        page("Header", "Acme Corp", "2019", "Built things", "Led things", "Footer"),
+        page("Header", "Globex", "2019/2020", "Shipped things", "Hired people", "Footer"),
+    ])
+    deduped, _ = preprocessor.dedupe_repeated_lines(text)
+    lines = deduped.split("\n")
+    assert "2019" in lines and "2019/2020" in lines
+
+def test_repeated_body_lines_are_kept(preprocessor):
+    # The same bullet under two jobs is content, not a running header
+    text = PAGE_BREAK.join([
+        page("Header", "Acme", "Python", "Mentored engineers", "Details", "Footer 1"),
+        page("Header", "Globex", "Python", "Mentored engineers", "Details", "Footer 2"),
+    ])
+    deduped, _ = preprocessor.dedupe_repeated_lines(text)
+    assert deduped.split("\n").count("Mentored engineers") == 2
+
+def test_single_page_is_untouched(preprocessor):
+    text = page("Jane Doe", "Page 1", "Experience")
+    assert preprocessor.dedupe_repeated_lines(text) == ("Jane Doe\nExperience", 1)
+
+def test_headings_split_sections(preprocessor):
+    text = page("Jane Doe", "jane@example.com", "EXPERIENCE", "Acme", "Skills:", "Python")
+    assert preprocessor.split_sections(text) == ["Jane Doe\njane@example.com", "EXPERIENCE\nAcme", "Skills:\nPython"]
+
+def test_is_heading(preprocessor):
+    assert preprocessor.is_heading("Work Experience")
+    assert preprocessor.is_heading("TECHNICAL SKILLS:")
+    assert not preprocessor.is_heading("AWS")
+    assert not preprocessor.is_heading("Built a payments platform used by 2M customers")
+
+def test_small_input_passes_through(preprocessor):
+    prepared = preprocessor.prepare("Summary\nBackend engineer")
+    assert prepared.chunks == ["Summary\nBackend engineer"]
+    assert not prepared.truncated
+    assert prepared.tokens == preprocessor.count_tokens("Summary\nBackend engineer")
+
+def oversized_text() -> str:
+    sections = []
+    for heading in ("EXPERIENCE", "EDUCATION", "PROJECTS"):
+        sections.append("\n".join([heading] + [f"{heading.lower()} detail line {index} " + "x" * 60 for index in range(40)]))
+    return "\n".join(sections)
+
+def test_truncate_keeps_every_section_within_budget():
+    preprocessor = TextPreprocessor(max_input_tokens=300, strategy=TRUNCATE, chars_per_token=4.0)
+    prepared = preprocessor.prepare(oversized_text())
+    assert prepared.truncated
+    assert len(prepared.chunks) == 1
+    assert prepared.tokens <= 300 + len(prepared.sections)
+    for heading in ("EXPERIENCE", "EDUCATION", "PROJECTS"):
+        assert heading in prepared.text
+    assert preprocessor.stats()["truncated"] == 1
+
+def test_map_reduce_chunks_cover_everything_within_budget():
+    preprocessor = TextPreprocessor(max_input_tokens=300, strategy=MAP_REDUCE, chars_per_token=4.0)
+    text = oversized_text()
+    prepared = preprocessor.prepare(text)
+    assert not prepared.truncated
+    assert len(prepared.chunks) > 1
+    assert all(preprocessor.count_tokens(chunk) <= 300 for chunk in prepared.chunks)
+    # Nothing is lost: every input line lands in exactly one chunk
+    chunk_lines = [line for chunk in prepared.chunks for line in chunk.split("\n") if line]
+    assert chunk_lines == text.split("\n")
+    assert preprocessor.stats()["chunked"] == 1
+
+def test_chunk_splits_a_single_overlong_line():
+    preprocessor = TextPreprocessor(max_input_tokens=10, strategy=MAP_REDUCE, chars_per_token=4.0)
+    chunks = preprocessor.chunk(["y" * 100], 10)
+    assert "".join(chunks) == "y" * 100
+    assert all(preprocessor.count_tokens(chunk) <= 10 for chunk in chunks)
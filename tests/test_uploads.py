@@ -0,0 +1,70 @@
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import UploadFile
+
+from app.core.uploads import UploadRejectedError, UploadTooLargeError, spool_upload
+
+PDF = b"%PDF-1.7\n" + b"0123456789" * 100
+
+@pytest.fixture(autouse=True)
+def spool_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "spool"
+    directory.mkdir()
+    monkeypatch.setattr("app.core.uploads.settings.UPLOAD_SPOOL_DIR", str(directory))
+    monkeypatch.setattr("app.core.uploads.settings.UPLOAD_SPOOL_CHUNK_BYTES", 64)
+    return directory
+
+class CountingFile(io.BytesIO):
+    def __init__(self, data):
+        super().__init__(data)
+        self.reads = 0
+
+    def read(self, size=-1):
+        self.reads += 1
+        return super().read(size)
+
+def upload(data: bytes, size=None) -> UploadFile:
+    return UploadFile(file=CountingFile(data), filename="resume.pdf", size=size)
+
+def spool(file, max_bytes=10_000, **options):
+    return asyncio.run(spool_upload(file, max_bytes, **options))
+
+def test_upload_is_copied_in_chunks_and_hashed(spool_dir):
+    file = upload(PDF)
+    spooled = spool(file)
+    assert spooled.size == len(PDF)
+    assert spooled.sha256 == hashlib.sha256(PDF).hexdigest()
+    assert spooled.read_bytes() == PDF
+    assert os.path.dirname(spooled.path) == str(spool_dir)
+    assert file.file.reads > len(PDF) // 64
+    spooled.remove()
+    spooled.remove()
+    assert os.listdir(spool_dir) == []
+
+def test_declared_size_is_rejected_without_reading(spool_dir):
+    file = upload(PDF, size=len(PDF))
+    with pytest.raises(UploadTooLargeError, match="limit is 100"):
+        spool(file, max_bytes=100)
+    assert file.file.reads == 0
+    assert os.listdir(spool_dir) == []
+
+def test_undeclared_oversized_upload_stops_at_the_limit(spool_dir):
+    file = upload(PDF)
+    with pytest.raises(UploadTooLargeError, match="exceeds 200 bytes"):
+        spool(file, max_bytes=200)
+    assert file.file.reads == 4
+    assert os.listdir(spool_dir) == []
+
+def test_non_pdf_is_rejected_and_cleaned_up(spool_dir):
+    with pytest.raises(UploadRejectedError):
+        spool(upload(b"PK\x03\x04 a zip file" * 10))
+    assert os.listdir(spool_dir) == []
+
+def test_magic_check_can_be_disabled():
+    spooled = spool(upload(b"PK\x03\x04 a zip file"), magic=None)
+    assert spooled.read_bytes() == b"PK\x03\x04 a zip file"
+    spooled.remove()
@@ -0,0 +1,45 @@
+import pytest
+
+from app.core.urls import canonicalize_url
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://jobs.example.com/posting/42", "https://jobs.example.com/posting/42"),
+        ("HTTPS://Jobs.Example.COM/posting/42", "https://jobs.example.com/posting/42"),
+        ("https://www.example.com/jobs/42/", "https://example.com/jobs/42"),
+        ("https://example.com:443/jobs/42", "https://example.com/jobs/42"),
+        ("http://example.com:80/jobs/42", "http://example.com/jobs/42"),
+        ("https://example.com:8443/jobs/42", "https://example.com:8443/jobs/42"),
+        ("https://example.com./jobs/42", "https://example.com/jobs/42"),
+        ("https://example.com/jobs/42#apply", "https://example.com/jobs/42"),
+        ("  https://example.com/jobs/42  ", "https://example.com/jobs/42"),
+        ("https://example.com/", "https://example.com"),
+    ],
+)
+def test_host_path_and_fragment(url, expected):
+    assert canonicalize_url(url) == expected
+
+def test_tracking_parameters_are_dropped():
+    url = "https://example.com/jobs?id=42&utm_source=linkedin&UTM_Campaign=x&gclid=abc&gh_src=feed&ref=home"
+    assert canonicalize_url(url) == "https://example.com/jobs?id=42"
+
+def test_remaining_parameters_are_sorted_and_kept():
+    assert canonicalize_url("https://example.com/jobs?team=data&id=42&empty=") == "https://example.com/jobs?empty=&id=42&team=data"
+
+def test_parameter_order_does_not_matter():
+    assert canonicalize_url("https://example.com/jobs?b=2&a=1") == canonicalize_url("https://example.com/jobs?a=1&b=2&utm_medium=email")
+
+def test_path_case_is_preserved():
+    assert canonicalize_url("https://example.com/Jobs/ABC") == "https://example.com/Jobs/ABC"
+
+def test_international_host_is_punycoded():
+    assert canonicalize_url("https://bücher.example/jobs") == "https://xn--bcher-kva.example/jobs"
+
+def test_missing_scheme_defaults_to_https():
+    assert canonicalize_url("//example.com/jobs") == "https://example.com/jobs"
+
+@pytest.mark.parametrize("url", ["https://example.com:99999/jobs", "https://example.com:port/jobs"])
+def test_malformed_port_is_a_value_error(url):
+    with pytest.raises(ValueError, match="Invalid port"):
+        canonicalize_url(url)